@@ -0,0 +1,3 @@
+"""
+Benchmarks for Container Image Inventory.
+"""
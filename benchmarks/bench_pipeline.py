@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scan -> normalise -> render -> save pipeline.
+
+Runtime output is generated synthetically and served through a stubbed
+``subprocess.Popen``, so no container runtime is needed. Each benchmark is
+timed without tracing and then run once more under tracemalloc to record
+peak Python memory. Results are printed (or written) as JSON.
+
+Usage:
+    python -m benchmarks.bench_pipeline --sizes 100,10000 --output bench.json
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks.fixtures import FakePopen, docker_image_lines, podman_image_lines
+from container_inventory.core import ContainerInventory
+from container_inventory.incremental import state_path
+from container_inventory.render import TableRenderer
+
+DEFAULT_SIZES = [100, 10_000, 100_000]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Send stdout to /dev/null so terminal speed does not skew results."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def stubbed_runtimes(count: int):
+    """Serve ``count`` synthetic images from stubbed docker and podman CLIs."""
+    FakePopen.fixtures = {
+        "docker": lambda: docker_image_lines(count),
+        "podman": lambda: podman_image_lines(count),
+    }
+    with patch("container_inventory.streaming.subprocess.Popen", FakePopen), patch(
+        "container_inventory.core.default_socket_path", return_value=None
+    ), patch(
+        "container_inventory.core.ContainerInventory._check_tool_availability",
+        return_value=True,
+    ):
+        yield ContainerInventory("all")
+
+
+def measure(
+    name: str,
+    count: int,
+    run: Callable[[], None],
+    setup: Optional[Callable[[], None]] = None,
+    repeat: int = 3,
+) -> Dict:
+    """
+    Time a benchmark and record its peak traced memory.
+
+    Args:
+        name: Benchmark name
+        count: Number of images the fixture produces
+        run: The code under test
+        setup: Untimed preparation run before every repetition
+        repeat: Timed repetitions; the fastest is reported
+
+    Returns:
+        A result dictionary
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "benchmark": name,
+        "images": count,
+        "seconds": min(timings),
+        "seconds_all": timings,
+        "peak_bytes": peak,
+    }
+
+
+def run_size(count: int, history: int, repeat: int, workdir: str) -> List[Dict]:
+    """Run every benchmark for one fixture size."""
+    results = []
+    output = os.path.join(workdir, f"inventory-{count}")
+
+    with stubbed_runtimes(count) as inventory, quiet():
+        records = inventory.get_images()
+
+        def reset_output():
+            for path in (output, state_path(output)):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+        def prime_incremental():
+            # A first scan writes the snapshot; the timed scan finds no changes
+            reset_output()
+            save_incremental()
+
+        def save_incremental():
+            inventory.save_inventory(
+                records, output, append=True, output_format="jsonl", incremental=True
+            )
+
+        # Existing history of the same size as the current scan, in both formats
+        legacy = os.path.join(workdir, f"legacy-{count}.json")
+        store = os.path.join(workdir, f"store-{count}.jsonl")
+        inventory.save_inventory(records * history, legacy)
+        for _ in range(history):
+            inventory.save_inventory(records, store, append=True, output_format="jsonl")
+
+        benchmarks = [
+            ("fetch_docker", lambda: list(inventory._iter_docker_images()), None),
+            ("fetch_podman", lambda: list(inventory._iter_podman_images()), None),
+            ("fetch_all", lambda: list(inventory.iter_images()), None),
+            ("display", lambda: inventory.display_inventory(records), None),
+            (
+                "save_json_fresh",
+                lambda: inventory.save_inventory(records, output),
+                reset_output,
+            ),
+            (
+                "save_json_append",
+                lambda: inventory.save_inventory(records, output, append=True),
+                lambda: shutil.copyfile(legacy, output),
+            ),
+            (
+                "save_jsonl_append",
+                lambda: inventory.save_inventory(
+                    records, output, append=True, output_format="jsonl"
+                ),
+                lambda: shutil.copyfile(store, output),
+            ),
+            ("save_incremental_unchanged", save_incremental, prime_incremental),
+            (
+                "pipeline_stream",
+                lambda: pipeline(inventory, output),
+                lambda: shutil.copyfile(store, output),
+            ),
+        ]
+        for name, run, setup in benchmarks:
+            results.append(measure(name, count, run, setup, repeat))
+            results[-1]["history_scans"] = history if "append" in name else 0
+
+    return results
+
+
+def pipeline(inventory: ContainerInventory, output: str) -> None:
+    """Stream a scan through the table renderer into the JSON Lines store."""
+    table = TableRenderer()
+    inventory.save_inventory(
+        table.observe(inventory.iter_images()), output, append=True, output_format="jsonl"
+    )
+    table.write()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmarks and emit JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated image counts",
+    )
+    parser.add_argument(
+        "--history", type=int, default=5, help="Scans already in the file for append benchmarks"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per benchmark")
+    parser.add_argument("--output", "-o", help="Write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            results.extend(run_size(size, args.history, args.repeat, workdir))
+            print(f"finished {size} images", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
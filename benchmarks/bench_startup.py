@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark how long the container-inventory command takes to start.
+
+Each case runs a fresh interpreter, so the timings include interpreter
+start-up and every import, as a systemd timer tick pays them. The bare
+interpreter is timed too, so the cost of the package itself can be read off.
+Modules that only some options need (the HTTP client, sqlite3, the exporter's
+HTTP server, the profilers) must not be imported by a plain start; the
+benchmark fails if they are, or if ``--budget`` is exceeded. Results are
+printed (or written) as JSON.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 20 --zipapp container-inventory.pyz
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from container_inventory.cli import DEFERRED_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints which of the DEFERRED_MODULES importing the CLI loaded
+IMPORTED_MODULES = (
+    "import sys, container_inventory.cli; "
+    "print(','.join(sorted(m for m in {modules!r} if m in sys.modules)))"
+)
+
+
+def run_time(argv: List[str], repeat: int) -> Dict:
+    """Run a command ``repeat`` times and return its timings."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return {
+        "seconds": min(timings),
+        "median": statistics.median(timings),
+        "seconds_all": timings,
+    }
+
+
+def deferred_imports() -> List[str]:
+    """Return the modules that should be deferred but are imported with the CLI."""
+    code = IMPORTED_MODULES.format(modules=list(DEFERRED_MODULES))
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(os.environ, PYTHONPATH=ROOT),
+        stdout=subprocess.PIPE,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    return output.split(",") if output else []
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmarks and emit JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per case")
+    parser.add_argument("--zipapp", help="Also time this zipapp bundle")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Fail if starting the CLI takes more than this many seconds over the "
+        "bare interpreter",
+    )
+    parser.add_argument("--output", "-o", help="Write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Byte-compile first so the timings do not include compiling
+    subprocess.run(
+        [sys.executable, "-m", "compileall", "-q", os.path.join(ROOT, "container_inventory")],
+        check=True,
+    )
+
+    cases = [
+        ("interpreter", [sys.executable, "-c", "pass"]),
+        ("import_cli", [sys.executable, "-c", "import container_inventory.cli"]),
+        ("help", [sys.executable, os.path.join(ROOT, "container-inventory"), "--help"]),
+    ]
+    if args.zipapp:
+        cases.append(("zipapp_help", [sys.executable, args.zipapp, "--help"]))
+
+    results = []
+    for name, command in cases:
+        results.append(dict(run_time(command, args.repeat), benchmark=name))
+        print(f"finished {name}", file=sys.stderr)
+
+    baseline = results[0]["seconds"]
+    for result in results:
+        result["over_interpreter"] = result["seconds"] - baseline
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "deferred_imports_loaded": deferred_imports(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    failures = []
+    if report["deferred_imports_loaded"]:
+        failures.append(f"imported at start-up: {', '.join(report['deferred_imports_loaded'])}")
+    if args.budget is not None and results[1]["over_interpreter"] > args.budget:
+        failures.append(
+            f"importing the CLI took {results[1]['over_interpreter']:.3f}s over the "
+            f"interpreter (budget {args.budget:g}s)"
+        )
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
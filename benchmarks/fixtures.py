@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Synthetic runtime output for benchmarks.
+
+Fixtures are generators, so producing the output of a 100k-image host does
+not itself hold the whole output in memory.
+"""
+
+import json
+from typing import Iterator, List
+
+# Every image gets this many extra tags, like a host that retags releases
+TAGS_PER_IMAGE = 2
+
+_BASE_CREATED = 1700000000
+
+
+def _repository(index: int) -> str:
+    """Return a repository name, with a registry port on some images."""
+    if index % 5 == 0:
+        return f"registry.example.com:5000/team{index % 37}/service{index}"
+    return f"docker.io/library/app{index}"
+
+
+def docker_image_lines(count: int) -> Iterator[str]:
+    """Yield ``docker images --format '{{json .}}'`` output for ``count`` images."""
+    for index in range(count):
+        yield json.dumps(
+            {
+                "Containers": "N/A",
+                "CreatedAt": "2023-11-14 22:13:20 +0000 UTC",
+                "CreatedSince": "2 years ago",
+                "Digest": "<none>",
+                "ID": f"{index:012x}",
+                "Repository": _repository(index),
+                "SharedSize": "N/A",
+                "Size": f"{(index % 900) + 10}.5MB",
+                "Tag": f"v{index % 50}",
+                "UniqueSize": "N/A",
+                "VirtualSize": f"{(index % 900) + 10}.5MB",
+            }
+        ) + "\n"
+
+
+def podman_image_lines(count: int) -> Iterator[str]:
+    """Yield ``podman images --format json`` output for ``count`` images, line by line."""
+    yield "[\n"
+    for index in range(count):
+        repository = _repository(index)
+        names: List[str] = [f"{repository}:v{index % 50}"]
+        names.extend(f"{repository}:extra{tag}" for tag in range(TAGS_PER_IMAGE - 1))
+        element = json.dumps(
+            {
+                "Id": f"{index:064x}",
+                "ParentId": "",
+                "RepoTags": None,
+                "RepoDigests": [f"{repository}@sha256:{index:064x}"],
+                "Size": (index % 900) * 1048576 + 10485760,
+                "SharedSize": 0,
+                "VirtualSize": (index % 900) * 1048576 + 10485760,
+                "Labels": {"maintainer": "bench"},
+                "Containers": 0,
+                "Names": names,
+                "Digest": f"sha256:{index:064x}",
+                "History": names,
+                "Created": _BASE_CREATED + index,
+                "CreatedAt": "2023-11-14T22:13:20Z",
+            },
+            indent=4,
+        )
+        separator = ",\n" if index < count - 1 else "\n"
+        for line in ("    " + element.replace("\n", "\n    ") + separator).splitlines(True):
+            yield line
+    yield "]\n"
+
+
+class FakePopen:
+    """Stand-in for ``subprocess.Popen`` that serves fixture output."""
+
+    fixtures = {}
+
+    def __init__(self, argv, stdout=None, stderr=None, text=None):
+        self.args = argv
+        self.returncode = None
+        self.stdout = _Stream(self.fixtures[argv[0]]())
+
+    def wait(self, timeout=None):
+        self.returncode = 0
+        return 0
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+class _Stream:
+    """Iterable stdout with a ``close`` method."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+
+    def __iter__(self):
+        return self._lines
+
+    def close(self):
+        pass
@@ -9,5 +9,6 @@ __author__ = "coopdloop"
 __email__ = "coopdevsec@proton.me"
 
 from container_inventory.core import ContainerInventory, Colors
+from container_inventory.models import ImageRecord
 
-__all__ = ["ContainerInventory", "Colors"]
+__all__ = ["ContainerInventory", "Colors", "ImageRecord"]
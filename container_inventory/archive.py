@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Segment rotation and compression for the Container Image Inventory store.
+
+When the active JSON Lines file grows past a size or age limit it is sealed:
+renamed to ``<output>.<UTC time>`` and compressed with gzip (or zstd, if the
+optional ``zstandard`` module is installed). Sealed segments past the
+retention limits are deleted. Readers open segments through ``open_segment``,
+which decompresses transparently.
+
+The compression modules are only imported once a segment is sealed or read,
+so a scan that does not rotate does not load them.
+"""
+
+import io
+import os
+import re
+from typing import Optional, TextIO
+
+# File suffix of each compression
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+DEFAULT_COMPRESSION = "gzip"
+
+# Bytes copied per read while compressing a segment
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _zstandard():
+    """Import the optional zstandard module, or return None if it is not installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def available_compressions() -> list:
+    """Return the compressions usable on this system."""
+    return [name for name in COMPRESSIONS if name != "zstd" or _zstandard() is not None]
+
+
+def parse_duration(text: str) -> float:
+    """
+    Parse a duration such as ``90``, ``12h`` or ``7d`` into seconds.
+
+    Raises:
+        ValueError: If the duration is not understood
+    """
+    match = _DURATION.match(str(text))
+    if not match:
+        raise ValueError(f"Unrecognized duration: {text!r}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def open_segment(path: str) -> TextIO:
+    """Open a plain or compressed segment for reading as text."""
+    if path.endswith(COMPRESSIONS["gzip"]):
+        import gzip
+
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(COMPRESSIONS["zstd"]):
+        zstandard = _zstandard()
+        if zstandard is None:
+            raise ValueError(f"{path} is zstd-compressed but zstandard is not installed")
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def compress_file(source: str, compression: str) -> str:
+    """
+    Compress a file next to itself and remove the original.
+
+    The compressed file is written under a temporary name, fsynced and
+    renamed into place before the original is removed, so an interruption
+    leaves either the original or a complete compressed copy.
+
+    Args:
+        source: File to compress
+        compression: 'gzip' or 'zstd'
+
+    Returns:
+        Path of the compressed file
+    """
+    target = source + COMPRESSIONS[compression]
+    tmp_path = f"{target}.tmp.{os.getpid()}"
+    try:
+        with open(source, "rb") as src, open(tmp_path, "wb") as raw:
+            if compression == "zstd":
+                zstandard = _zstandard()
+                if zstandard is None:
+                    raise ValueError("zstd compression needs the zstandard module")
+                writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+            else:
+                import gzip
+
+                writer = gzip.GzipFile(fileobj=raw, mode="wb")
+            with writer:
+                for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                    writer.write(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, target)
+    os.unlink(source)
+    return target
+
+
+class RotationPolicy:
+    """When to seal the active store segment and how long to keep sealed ones."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        compression: str = DEFAULT_COMPRESSION,
+        keep: Optional[int] = None,
+        retention: Optional[float] = None,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            max_bytes: Seal the active segment once it reaches this size
+            max_age: Seal the active segment once its first record is this
+                many seconds old
+            compression: 'gzip', 'zstd' or 'none' for sealed segments
+            keep: Keep at most this many sealed segments
+            retention: Delete sealed segments older than this many seconds
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == "zstd" and _zstandard() is None:
+            raise ValueError("zstd compression needs the zstandard module")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self.keep = keep
+        self.retention = retention
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the policy ever rotates or prunes anything."""
+        return any(
+            value is not None for value in (self.max_bytes, self.max_age, self.keep, self.retention)
+        )
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+On-disk JSON caches for Container Image Inventory.
+
+Caches are best-effort: a missing, unreadable or corrupt cache file behaves
+like an empty cache, and a failed save is silently ignored.
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+
+def cache_dir() -> str:
+    """
+    Return the directory used for cache files.
+
+    ``CONTAINER_INVENTORY_CACHE_DIR`` takes precedence, then the
+    ``CACHE_DIRECTORY`` that systemd sets for ``CacheDirectory=``, then the
+    XDG user cache directory.
+    """
+    for env in ("CONTAINER_INVENTORY_CACHE_DIR", "CACHE_DIRECTORY"):
+        value = os.environ.get(env)
+        if value:
+            # systemd separates multiple cache directories with ':'
+            return value.split(":")[0]
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "container-inventory")
+
+
+class JsonCache:
+    """A small JSON object persisted in the cache directory."""
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            name: File name of the cache within the cache directory
+            directory: Override for the cache directory
+        """
+        self.path = os.path.join(directory or cache_dir(), name)
+
+    def load(self) -> Dict:
+        """Load the cached object, or an empty dict if unavailable."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self, data: Dict) -> bool:
+        """
+        Atomically replace the cached object.
+
+        Returns:
+            True if the cache was written
+        """
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return False
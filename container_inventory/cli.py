@@ -4,9 +4,213 @@ Command-line interface for Container Image Inventory.
 """
 
 import argparse
+import itertools
+import json
+import os
 import sys
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-from container_inventory.core import ContainerInventory, Colors
+from container_inventory.archive import (
+    COMPRESSIONS,
+    DEFAULT_COMPRESSION,
+    RotationPolicy,
+    parse_duration,
+)
+from container_inventory.core import DEFAULT_TIMEOUT, ContainerInventory, Colors
+from container_inventory.defaults import (
+    DEFAULT_ANALYZER_TIMEOUT,
+    DEFAULT_ANALYZER_WORKERS,
+    DEFAULT_EXPORTER_ADDRESS,
+    DEFAULT_EXPORTER_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MAX_LOAD,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_RECONCILE_INTERVAL,
+    DEFAULT_RETRIES,
+    DEFAULT_SCAN_BUDGET,
+    DEFAULT_SCAN_MAX_AGE,
+    DEFAULT_SCAN_TIMEOUT,
+    DEFAULT_SCAN_WORKERS,
+    DEFAULT_SCANNER,
+    DEFAULT_WORKERS,
+    SCANNERS,
+)
+from container_inventory.incremental import DEFAULT_SNAPSHOT_INTERVAL
+from container_inventory.models import format_size, parse_size
+from container_inventory.reference import parse_reference
+from container_inventory.trace import JOURNAL, TRACER, profiled
+
+# Modules only some options need are imported when those options are used,
+# so a plain scan (e.g. from the systemd timer) starts faster
+if TYPE_CHECKING:
+    from container_inventory.layers import LayerScanner
+    from container_inventory.plugins import Analyzer
+    from container_inventory.usage import ContainerUsage
+
+# Modules a plain scan must not import (checked by the tests and
+# benchmarks/bench_startup.py)
+DEFERRED_MODULES = (
+    "cProfile",
+    "container_inventory.daemon",
+    "container_inventory.exporter",
+    "container_inventory.fleet",
+    "container_inventory.plugins",
+    "container_inventory.scheduler",
+    "container_inventory.vulnscan",
+    "gzip",
+    "hashlib",
+    "http.client",
+    "http.server",
+    "pstats",
+    "resource",
+    "shlex",
+    "sqlite3",
+    "tracemalloc",
+    "urllib.parse",
+    "zstandard",
+)
+
+# Store read by 'query' when none is given (where the systemd service writes)
+DEFAULT_STORE = "/var/lib/container-inventory/inventory.json"
+
+# Formats of 'export' and of typed scan output (kept here so that a plain
+# scan does not import the columnar module)
+COLUMNAR_FORMATS = ("csv", "ndjson", "parquet")
+
+# Fleet store and push address of 'collect' when none are given
+DEFAULT_FLEET_DB = "/var/lib/container-inventory/fleet.db"
+DEFAULT_COLLECTOR_ADDRESS = ":9470"
+
+
+def size_arg(text: str) -> int:
+    """Parse a size option such as ``64MB``."""
+    size = parse_size(text)
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    return size
+
+
+def positive_int_arg(text: str) -> int:
+    """Parse a count option that must be 1 or more."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a whole number of 1 or more: {text!r}")
+    return value
+
+
+def duration_arg(text: str) -> float:
+    """Parse a duration option such as ``7d``."""
+    try:
+        return parse_duration(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def setup_query_cli(subparsers) -> None:
+    """Add the 'query' subcommand."""
+    parser = subparsers.add_parser(
+        "query",
+        help="Search the inventory history through its index",
+        description="Search the inventory history through its SQLite index",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("store", nargs="?", default=DEFAULT_STORE, help="Inventory file")
+    parser.add_argument("--id", help="Image ID or ID prefix")
+    parser.add_argument("--image", help="Repository:tag reference")
+    parser.add_argument("--repository", help="Repository name")
+    parser.add_argument("--tag", help="Tag name")
+    parser.add_argument("--source", choices=["docker", "podman"], help="Runtime")
+    parser.add_argument("--host", help="Fleet host")
+    parser.add_argument("--scan", help="Scan ID")
+    parser.add_argument("--since", help="Start time: ISO 8601 date/time (UTC) or age like 7d")
+    parser.add_argument("--until", help="End time: ISO 8601 date/time (UTC) or age like 1d")
+    parser.add_argument("--limit", type=int, help="Show at most this many records")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--first-seen", action="store_true", help="Show when each image ID first appeared"
+    )
+    mode.add_argument("--hosts", action="store_true", help="Show which hosts had the images")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per line")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Rebuild the index from the inventory file first"
+    )
+
+
+def setup_export_cli(subparsers) -> None:
+    """Add the 'export' subcommand."""
+    parser = subparsers.add_parser(
+        "export",
+        help="Export the inventory history as typed rows, or aggregate it",
+        description="Write the stored inventory history as CSV, NDJSON or Parquet rows with "
+        "integer sizes and UTC times, or print per-group totals, averages and largest images",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("store", nargs="?", default=DEFAULT_STORE, help="Inventory file")
+    parser.add_argument(
+        "--format", "-f", choices=COLUMNAR_FORMATS, default="csv", help="Export format"
+    )
+    parser.add_argument("--output", "-o", help="Export file")
+    parser.add_argument("--since", help="Start time: ISO 8601 date/time (UTC) or age like 7d")
+    parser.add_argument("--until", help="End time: ISO 8601 date/time (UTC) or age like 1d")
+    parser.add_argument(
+        "--group-by",
+        metavar="COLUMNS",
+        help="Instead of exporting, print totals per group of comma-separated columns, "
+        "e.g. 'repository', 'source' or 'scan_id,source'",
+    )
+    parser.add_argument("--limit", type=int, help="Show at most this many groups")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per line")
+
+
+def setup_collect_cli(subparsers) -> None:
+    """Add the 'collect' subcommand."""
+    parser = subparsers.add_parser(
+        "collect",
+        help="Merge the inventories of many hosts into a fleet store, or query it",
+        description="Accept inventories pushed by hosts (--listen) or pull inventory files "
+        "from a directory tree (--pull) into a SQLite fleet store, or query that store. "
+        "Without options, print a summary of the store.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--db", default=DEFAULT_FLEET_DB, help="Fleet store")
+    parser.add_argument(
+        "--listen",
+        nargs="?",
+        const=DEFAULT_COLLECTOR_ADDRESS,
+        metavar="[HOST]:PORT",
+        help=f"Accept inventories POSTed to /ingest (default address "
+        f"{DEFAULT_COLLECTOR_ADDRESS})",
+    )
+    parser.add_argument(
+        "--pull",
+        action="append",
+        metavar="DIR",
+        help="Read inventory files under DIR, one subdirectory per host (repeatable)",
+    )
+    parser.add_argument(
+        "--pattern", default="inventory.json", help="File name pattern of pulled inventories"
+    )
+    parser.add_argument(
+        "--interval",
+        type=duration_arg,
+        help="Keep running, pulling every this many seconds (or an age like 5m)",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--hosts-with",
+        metavar="IMAGE",
+        help="Show the hosts that have an image: repository[:tag], repository@digest or ID",
+    )
+    mode.add_argument(
+        "--image-bytes",
+        action="store_true",
+        help="Show the bytes each image takes across the fleet, largest first",
+    )
+    parser.add_argument("--limit", type=int, help="Show at most this many images")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per line")
 
 
 def setup_cli():
@@ -33,32 +237,947 @@ def setup_cli():
         help="Append to existing output file instead of overwriting",
     )
 
+    parser.add_argument(
+        "--format",
+        "-f",
+        choices=["json", "jsonl"] + list(COLUMNAR_FORMATS),
+        default="json",
+        help="Output file format; 'jsonl' is an append-only store with one record per line; "
+        "'csv', 'ndjson' and 'parquet' (needs pyarrow) write typed rows for analytics",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help="Append only images added, removed or retagged since the last scan "
+        "(implies --format jsonl --append)",
+    )
+
+    parser.add_argument(
+        "--snapshot-interval",
+        type=float,
+        default=DEFAULT_SNAPSHOT_INTERVAL,
+        help="Seconds between full snapshots in incremental mode",
+    )
+
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write the 'json' format without indentation",
+    )
+
+    parser.add_argument(
+        "--rotate-size",
+        type=size_arg,
+        help="Seal the JSON Lines store into a compressed segment once it reaches this size "
+        "(e.g. 64MB)",
+    )
+
+    parser.add_argument(
+        "--rotate-age",
+        type=duration_arg,
+        help="Seal the JSON Lines store once its oldest record is this old (e.g. 7d)",
+    )
+
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSIONS),
+        default=DEFAULT_COMPRESSION,
+        help="Compression of sealed store segments ('zstd' needs the zstandard module)",
+    )
+
+    parser.add_argument(
+        "--keep-segments",
+        type=int,
+        help="Delete all but this many sealed store segments",
+    )
+
+    parser.add_argument(
+        "--retention",
+        type=duration_arg,
+        help="Delete sealed store segments older than this (e.g. 365d)",
+    )
+
+    parser.add_argument(
+        "--no-table",
+        "--quiet",
+        "-q",
+        dest="no_table",
+        action="store_true",
+        help="Do not print the inventory table (e.g. when run from systemd)",
+    )
+
+    parser.add_argument(
+        "--max-rows",
+        type=positive_int_arg,
+        help="Show at most this many table rows per page",
+    )
+
+    parser.add_argument(
+        "--page",
+        type=positive_int_arg,
+        default=1,
+        help="Page of --max-rows rows to show",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds to wait for each container runtime before skipping it",
+    )
+
+    parser.add_argument(
+        "--target",
+        dest="targets",
+        action="append",
+        help="Scan a remote runtime, as [NAME=][docker+|podman+]ENDPOINT with ENDPOINT "
+        "unix://PATH, tcp://HOST:PORT, ssh://HOST, connection:NAME or ssh:HOST "
+        "(repeatable; enables fleet mode)",
+    )
+
+    parser.add_argument(
+        "--targets-file",
+        help="Read fleet targets from a file, one per line",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Fleet targets scanned at the same time",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="Extra attempts for a fleet target that fails",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running: follow runtime image events and append changes to --output "
+        "(implies --incremental)",
+    )
+
+    parser.add_argument(
+        "--reconcile-interval",
+        type=float,
+        default=DEFAULT_RECONCILE_INTERVAL,
+        help="Seconds between full rescans in daemon mode, to catch missed events",
+    )
+
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help="For periodic runs (the systemd timer): scan only when images changed and "
+        "the host is not busy, adapting the interval to the change rate, at low CPU "
+        "and I/O priority",
+    )
+
+    parser.add_argument(
+        "--min-interval",
+        type=duration_arg,
+        default=DEFAULT_MIN_INTERVAL,
+        help="Seconds (or an age like 10m) between checks while images keep changing",
+    )
+
+    parser.add_argument(
+        "--max-interval",
+        type=duration_arg,
+        default=DEFAULT_MAX_INTERVAL,
+        help="Seconds (or an age like 2h) after which a scan runs whatever changed or the load",
+    )
+
+    parser.add_argument(
+        "--max-load",
+        type=float,
+        default=DEFAULT_MAX_LOAD,
+        help="1-minute load average per CPU above which scans are deferred",
+    )
+
+    parser.add_argument(
+        "--schedule-log",
+        metavar="FILE",
+        help="Append each scheduling decision to FILE as a JSON line",
+    )
+
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Add digest, architecture, OS, labels and dangling status from image inspect "
+        "(cached per image)",
+    )
+
+    parser.add_argument(
+        "--layers",
+        nargs="?",
+        const="repository",
+        choices=["repository", "image"],
+        help="Inspect image layers and report unique and shared bytes per repository "
+        "(or per image)",
+    )
+
+    parser.add_argument(
+        "--usage",
+        action="store_true",
+        help="Add the number of containers (and running containers) using each image",
+    )
+
+    parser.add_argument(
+        "--unused",
+        action="store_true",
+        help="Report images no container uses and the bytes removing them would free "
+        "(implies --usage)",
+    )
+
+    parser.add_argument(
+        "--vuln-scan",
+        nargs="?",
+        const=DEFAULT_SCANNER,
+        metavar="SCANNER",
+        help=f"Scan images for vulnerabilities with {', '.join(SCANNERS)} (default "
+        f"{DEFAULT_SCANNER}) or a command printing JSON, e.g. 'my-scanner --json {{image}}'; "
+        f"results are cached per image digest or ID",
+    )
+
+    parser.add_argument(
+        "--vuln-workers",
+        type=int,
+        default=DEFAULT_SCAN_WORKERS,
+        help="Scanner processes run at the same time",
+    )
+
+    parser.add_argument(
+        "--vuln-timeout",
+        type=duration_arg,
+        default=DEFAULT_SCAN_TIMEOUT,
+        help="Seconds (or an age like 5m) the scanner may take per image",
+    )
+
+    parser.add_argument(
+        "--vuln-budget",
+        type=duration_arg,
+        default=DEFAULT_SCAN_BUDGET,
+        help="Seconds (or an age like 10m) after which images with stale results are no "
+        "longer rescanned in this run; new images are always scanned",
+    )
+
+    parser.add_argument(
+        "--vuln-max-age",
+        type=duration_arg,
+        default=DEFAULT_SCAN_MAX_AGE,
+        help="Seconds (or an age like 7d) after which a cached scan result is rescanned",
+    )
+
+    parser.add_argument(
+        "--vuln-reports",
+        metavar="DIR",
+        help="Also keep each scanner's full JSON report in DIR",
+    )
+
+    parser.add_argument(
+        "--exporter",
+        nargs="?",
+        const=DEFAULT_EXPORTER_ADDRESS,
+        metavar="[HOST]:PORT",
+        help=f"Keep running: rescan periodically and serve Prometheus metrics at /metrics "
+        f"(default address {DEFAULT_EXPORTER_ADDRESS})",
+    )
+
+    parser.add_argument(
+        "--exporter-interval",
+        type=duration_arg,
+        default=DEFAULT_EXPORTER_INTERVAL,
+        help="Seconds (or an age like 5m) between exporter scans",
+    )
+
+    parser.add_argument(
+        "--no-index",
+        dest="index",
+        action="store_false",
+        help="Do not record saved scans in the SQLite query index (<output>.db)",
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help=f"Write per-phase timings, runtime command and API I/O and peak RSS as JSON "
+        f"to FILE ('-' for stderr), or as structured fields to the systemd journal "
+        f"with '{JOURNAL}'",
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Run under cProfile and tracemalloc; write the profile to FILE and a report "
+        "of the slowest functions and largest allocations to FILE.txt",
+    )
+
+    parser.add_argument(
+        "--analyze",
+        action="append",
+        metavar="NAME",
+        help="Run an analysis plugin on the scanned images (repeatable, or comma-separated; "
+        "'all' runs every one); see --list-analyzers",
+    )
+
+    parser.add_argument(
+        "--list-analyzers",
+        action="store_true",
+        help="List the built-in, custom script and entry point analyzers, then exit",
+    )
+
+    parser.add_argument(
+        "--analyzer-workers",
+        type=int,
+        default=DEFAULT_ANALYZER_WORKERS,
+        help="Analyzers run at the same time",
+    )
+
+    parser.add_argument(
+        "--analyzer-timeout",
+        type=duration_arg,
+        default=DEFAULT_ANALYZER_TIMEOUT,
+        help="Seconds (or an age like 5m) each analyzer may run",
+    )
+
+    parser.add_argument(
+        "--analysis-output",
+        metavar="FILE",
+        help="Write the analyzer results as JSON to FILE instead of printing them",
+    )
+
+    parser.add_argument(
+        "--push",
+        metavar="URL",
+        help="Send the scan to a fleet collector, e.g. http://collector:9470/ingest",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    setup_query_cli(subparsers)
+    setup_export_cli(subparsers)
+    setup_collect_cli(subparsers)
+
     return parser.parse_args()
 
 
-def main():
-    """Main entry point for the script."""
+def create_inventory(args) -> ContainerInventory:
+    """Create a local inventory, or a fleet inventory if targets were given."""
+    if not (args.targets or args.targets_file):
+        return ContainerInventory(args.type, timeout=args.timeout)
+
+    from container_inventory.targets import load_targets, parse_target
+
+    targets = [parse_target(spec) for spec in args.targets or []]
+    if args.targets_file:
+        targets.extend(load_targets(args.targets_file))
+    if not targets:
+        return ContainerInventory(args.type, timeout=args.timeout)
+    # Before the fleet inventory exists, so no host is contacted in vain
+    check_local_options(args)
+
+    from container_inventory.fleet import FleetInventory
+
+    return FleetInventory(
+        targets, timeout=args.timeout, workers=args.workers, retries=args.retries
+    )
+
+
+def check_local_options(args) -> None:
+    """Reject options that only work on the local runtimes, as targets were given."""
+    for given, message in (
+        (args.enrich, "--enrich inspects local runtimes"),
+        (args.vuln_scan, "--vuln-scan scans local images"),
+        (args.usage or args.unused, "--usage lists local containers"),
+        (args.layers, "--layers inspects local runtimes"),
+        (args.daemon, "--daemon follows local runtimes"),
+    ):
+        if given:
+            raise ValueError(f"{message} and cannot be used with targets")
+
+
+def rotation_policy(args) -> Optional[RotationPolicy]:
+    """Build the store rotation policy from the command-line options, if any were given."""
+    policy = RotationPolicy(
+        max_bytes=args.rotate_size,
+        max_age=args.rotate_age,
+        compression=args.compress,
+        keep=args.keep_segments,
+        retention=args.retention,
+    )
+    if not policy.enabled:
+        return None
+    if args.format != "jsonl" and not (args.incremental or args.daemon):
+        raise ValueError("Store rotation needs --format jsonl, --incremental or --daemon")
+    return policy
+
+
+def check_columnar_output(args) -> None:
+    """Reject typed row output options that cannot be honoured, before scanning."""
+    from container_inventory.columnar import available_formats
+
+    if args.incremental or args.daemon:
+        raise ValueError(
+            f"--format {args.format} writes typed rows; --incremental and --daemon "
+            f"need the JSON Lines store"
+        )
+    if args.format not in available_formats():
+        raise ValueError(f"--format {args.format} needs the pyarrow module")
+    if args.format == "parquet" and args.append:
+        raise ValueError("Parquet files cannot be appended to; write one file per scan")
+
+
+def is_fleet(inventory: ContainerInventory) -> bool:
+    """Whether an inventory scans fleet targets rather than the local runtimes."""
+    # The fleet module is only loaded once create_inventory built a fleet inventory
+    fleet = sys.modules.get("container_inventory.fleet")
+    return fleet is not None and isinstance(inventory, fleet.FleetInventory)
+
+
+def warn_failed_targets(inventory: ContainerInventory) -> None:
+    """Print which fleet targets could not be scanned."""
+    summary = inventory.summary() if is_fleet(inventory) else None
+    if summary:
+        print(f"{Colors.YELLOW}Warning: {summary}{Colors.RESET}")
+
+
+def print_rows(rows: Iterable[Dict], columns: List[Tuple[str, str]]) -> int:
+    """Print dictionaries as an aligned table; returns the number of rows."""
+    rows = [[str(row.get(key) or "") for _, key in columns] for row in rows]
+    if not rows:
+        return 0
+    widths = [
+        max([len(header)] + [len(row[i]) for row in rows]) for i, (header, _) in enumerate(columns)
+    ]
+    lines = [
+        " | ".join(
+            f"{Colors.BOLD}{header:<{width}}{Colors.RESET}"
+            for (header, _), width in zip(columns, widths)
+        )
+    ]
+    lines.extend(" | ".join(f"{cell:<{w}}" for cell, w in zip(row, widths)) for row in rows)
+    print("\n".join(lines))
+    return len(rows)
+
+
+def print_layer_report(scanner: "LayerScanner", by: str = "repository") -> None:
+    """Scan the layers of the images a scanner observed and print their usage."""
+    print(f"\n{Colors.BLUE}Inspecting image layers...{Colors.RESET}")
+    index = scanner.scan()
+
+    if by == "image":
+        rows = []
+        seen = set()
+        for image in scanner.images:
+            key = (image.source, image.id)
+            if key in seen or key not in index.layers:
+                continue
+            seen.add(key)
+            row = {"id": image.id, "image": f"{image.repository}:{image.tag}"}
+            row.update(source=image.source, layers=len(index.layers[key]))
+            row.update(index.image_usage(*key))
+            rows.append(row)
+        columns = [("ID", "id"), ("Image", "image"), ("Source", "source"), ("Layers", "layers")]
+    else:
+        rows = index.repository_usage(scanner.images)
+        columns = [("Repository", "repository"), ("Source", "source"), ("Images", "images")]
+
+    for row in rows:
+        for key in ("size", "unique", "shared"):
+            row[key] = format_size(row[key])
+    columns += [("Size", "size"), ("Unique", "unique"), ("Shared", "shared")]
+    if not print_rows(rows, columns):
+        print(f"{Colors.YELLOW}No image layers found.{Colors.RESET}")
+        return
+
+    totals = index.totals()
+    print(
+        f"\n{Colors.GREEN}Listed sizes add up to {format_size(totals['listed'])}; "
+        f"{format_size(totals['deduplicated'])} stored once shared layers are "
+        f"counted once{Colors.RESET}"
+    )
+
+
+def print_unused_report(usage: "ContainerUsage") -> None:
+    """Print the images no container uses and the bytes their removal would free."""
+    unused, reclaimable = usage.unused()
+    print(f"\n{Colors.BOLD}Unused images{Colors.RESET}")
+    for runtime in sorted(usage.failed):
+        print(
+            f"{Colors.YELLOW}Warning: {runtime} images are left out; its containers could "
+            f"not be listed{Colors.RESET}"
+        )
+    rows = [
+        {
+            "id": image.id,
+            "repository": image.repository,
+            "tag": image.tag,
+            "source": image.source,
+            "size": format_size(image.size),
+        }
+        for image in unused
+    ]
+    columns = [
+        ("ID", "id"),
+        ("Repository", "repository"),
+        ("Tag", "tag"),
+        ("Source", "source"),
+        ("Size", "size"),
+    ]
+    if not print_rows(rows, columns):
+        print(f"{Colors.GREEN}Every image is used by a container.{Colors.RESET}")
+        return
+    print(
+        f"\n{Colors.GREEN}{len(unused)} unused images; up to {format_size(reclaimable)} "
+        f"reclaimable{Colors.RESET}"
+    )
+
+
+def run_query(args) -> None:
+    """Run the 'query' subcommand."""
+    from container_inventory.index import InventoryIndex, index_path, parse_time
+
+    index = InventoryIndex(index_path(args.store))
+    if args.rebuild or not os.path.exists(index.path):
+        if not os.path.exists(args.store):
+            raise ValueError(f"{args.store} does not exist")
+        count = index.rebuild(args.store)
+        print(
+            f"{Colors.GREEN}Indexed {count} records from {args.store}{Colors.RESET}",
+            file=sys.stderr,
+        )
+
+    repository, tag = args.repository, args.tag
+    if args.image:
+        repository, tag = parse_reference(args.image)
+    filters = {
+        "image_id": args.id,
+        "repository": repository,
+        "tag": tag,
+        "source": args.source,
+        "host": args.host,
+        "scan_id": args.scan,
+        "since": parse_time(args.since) if args.since else None,
+        "until": parse_time(args.until) if args.until else None,
+    }
+
+    if args.first_seen:
+        rows = index.first_seen(**filters)
+        columns = [
+            ("ID", "image_id"),
+            ("First Seen", "first_seen"),
+            ("Records", "records"),
+            ("Repository", "repository"),
+            ("Tag", "tag"),
+            ("Source", "source"),
+            ("Host", "host"),
+        ]
+    elif args.hosts:
+        rows = index.hosts(**filters)
+        columns = [
+            ("Host", "host"),
+            ("Source", "source"),
+            ("First Seen", "first_seen"),
+            ("Last Seen", "last_seen"),
+            ("Records", "records"),
+        ]
+    else:
+        rows = index.query(limit=args.limit, **filters)
+        columns = [
+            ("Timestamp", "timestamp"),
+            ("Host", "host"),
+            ("Source", "source"),
+            ("ID", "image_id"),
+            ("Repository", "repository"),
+            ("Tag", "tag"),
+            ("Change", "change"),
+            ("Scan", "scan_id"),
+        ]
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    elif not print_rows(rows, columns):
+        print(f"{Colors.YELLOW}No matching records.{Colors.RESET}")
+    index.close()
+
+
+def run_export(args) -> None:
+    """Run the 'export' subcommand."""
+    from container_inventory.columnar import ImageColumns, aggregate, iter_history_rows, write_rows
+    from container_inventory.index import parse_time
+
+    if not (args.output or args.group_by):
+        raise ValueError("export needs --output FILE or --group-by COLUMNS")
+    if not os.path.exists(args.store):
+        raise ValueError(f"{args.store} does not exist")
+    rows = iter_history_rows(
+        args.store,
+        since=parse_time(args.since) if args.since else None,
+        until=parse_time(args.until) if args.until else None,
+    )
+
+    if args.output:
+        count = write_rows(rows, args.output, args.format)
+        print(f"{Colors.GREEN}Exported {count} records to {args.output}{Colors.RESET}")
+        return
+
+    by = [name.strip() for name in args.group_by.split(",") if name.strip()]
+    groups = aggregate(ImageColumns.from_rows(rows), by, limit=args.limit)
+    if args.json:
+        for group in groups:
+            print(json.dumps(group))
+        return
+    for group in groups:
+        for key in ("bytes", "average", "largest"):
+            group[key] = format_size(group[key])
+    columns = [(name.replace("_", " ").title(), name) for name in by]
+    columns += [
+        ("Images", "images"),
+        ("Total", "bytes"),
+        ("Average", "average"),
+        ("Largest", "largest"),
+        ("Largest Image", "largest_image"),
+    ]
+    if not print_rows(groups, columns):
+        print(f"{Colors.YELLOW}No matching records.{Colors.RESET}")
+
+
+def run_collect(args) -> None:
+    """Run the 'collect' subcommand."""
+    from container_inventory.collector import FleetStore, run_collector
+
+    store = FleetStore(args.db)
     try:
-        args = setup_cli()
+        if args.listen or args.pull:
+            run_collector(store, args.listen, args.pull, args.pattern, args.interval)
+        elif args.hosts_with:
+            rows = hosts_with(store, args.hosts_with)
+            columns = [
+                ("Host", "host"),
+                ("Source", "source"),
+                ("ID", "image_id"),
+                ("Repository", "repository"),
+                ("Tag", "tag"),
+                ("Last Seen", "last_seen"),
+            ]
+            if args.json:
+                for row in rows:
+                    print(json.dumps(row))
+            elif not print_rows(rows, columns):
+                print(f"{Colors.YELLOW}No host has {args.hosts_with}.{Colors.RESET}")
+        elif args.image_bytes:
+            rows = store.image_bytes(limit=args.limit)
+            if args.json:
+                for row in rows:
+                    print(json.dumps(row))
+                return
+            rows = [
+                dict(row, size=format_size(row["size"]), bytes=format_size(row["bytes"]))
+                for row in rows
+            ]
+            columns = [
+                ("ID", "image_id"),
+                ("Repository", "repository"),
+                ("Hosts", "hosts"),
+                ("Size", "size"),
+                ("Fleet Bytes", "bytes"),
+            ]
+            if not print_rows(rows, columns):
+                print(f"{Colors.YELLOW}The fleet store is empty.{Colors.RESET}")
+        else:
+            summary = store.summary()
+            if args.json:
+                print(json.dumps(summary))
+            else:
+                print(
+                    f"{Colors.GREEN}{summary['hosts']} hosts, {summary['images']} images, "
+                    f"{summary['references']} image references from {summary['scans']} "
+                    f"scans{Colors.RESET}"
+                )
+    finally:
+        store.close()
+
+
+def hosts_with(store, ref: str) -> Iterable[Dict]:
+    """Look up an image reference, digest reference or ID in a fleet store."""
+    name, _, digest = ref.partition("@")
+    repository, tag = parse_reference(name) if name else (None, None)
+    if digest:
+        return store.hosts_with(repository=repository, digest=digest)
+    if ":" not in name.rpartition("/")[2]:
+        # A bare name may be an image ID; otherwise it matches every tag
+        rows = list(store.hosts_with(repository=name))
+        return rows or store.hosts_with(image_id=name)
+    return store.hosts_with(repository=repository, tag=tag)
+
+
+def list_analyzers() -> None:
+    """Print the available analysis plugins."""
+    from container_inventory.plugins import discover_analyzers
+
+    rows = [
+        {"name": name, "description": analyzer.description}
+        for name, analyzer in sorted(discover_analyzers().items())
+    ]
+    print_rows(rows, [("Name", "name"), ("Description", "description")])
+
+
+def load_analyzers(args) -> List["Analyzer"]:
+    """Find the analysis plugins selected with --analyze."""
+    from container_inventory.plugins import discover_analyzers, select_analyzers
+
+    names = [name.strip() for value in args.analyze for name in value.split(",") if name.strip()]
+    return select_analyzers(discover_analyzers(), names)
+
+
+def run_analysis(images: List, analyzers: List["Analyzer"], args) -> None:
+    """Run analysis plugins on the scanned images and report their results."""
+    from container_inventory.plugins import run_analyzers
+
+    with TRACER.phase("analyze"):
+        results = run_analyzers(
+            analyzers, images, workers=args.analyzer_workers, timeout=args.analyzer_timeout
+        )
+
+    for name, report in results.items():
+        if report["error"]:
+            print(
+                f"{Colors.YELLOW}Warning: analyzer {name} failed after "
+                f"{report['seconds']:.2f}s: {report['error']}{Colors.RESET}"
+            )
+    if args.analysis_output:
+        with open(args.analysis_output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"{Colors.GREEN}Analysis written to {args.analysis_output}{Colors.RESET}")
+        return
+    for name, report in results.items():
+        if report["error"]:
+            continue
+        print(f"\n{Colors.BOLD}Analysis: {name}{Colors.RESET} ({report['seconds']:.2f}s)")
+        print(json.dumps(report["result"], indent=2, default=str))
+
+
+def push_scan(images: List, url: str) -> None:
+    """Send a scan to a fleet collector."""
+    from container_inventory.collector import push_inventory
+
+    with TRACER.phase("push"):
+        try:
+            counts = push_inventory(images, url)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Could not push the scan to {url}: {e}")
+    print(f"{Colors.GREEN}Pushed {counts.get('records', 0)} records to {url}{Colors.RESET}")
+
+
+def run_scan(args) -> None:
+    """Scan the runtimes and display, save or serve the inventory."""
+    # Print header
+    print(f"\n{Colors.BOLD}{Colors.BLUE}Container Image Inventory{Colors.RESET}\n")
 
-        # Print header
-        print(f"\n{Colors.BOLD}{Colors.BLUE}Container Image Inventory{Colors.RESET}\n")
+    if args.format in COLUMNAR_FORMATS:
+        check_columnar_output(args)
 
-        inventory = ContainerInventory(args.type)
+    # Before scanning, so that a misspelt analyzer does not waste a scan
+    analyzers = load_analyzers(args) if args.analyze else None
 
-        # Get all images or filter for a specific one
-        all_images = inventory.get_images()
+    vuln_scanner = None
+    if args.vuln_scan:
+        from container_inventory.vulnscan import VulnerabilityScanner
 
-        if not all_images:
-            print(f"{Colors.YELLOW}No container images found.{Colors.RESET}")
+        vuln_scanner = VulnerabilityScanner(
+            args.vuln_scan,
+            workers=args.vuln_workers,
+            timeout=args.vuln_timeout,
+            budget=args.vuln_budget,
+            max_age=args.vuln_max_age,
+            reports_dir=args.vuln_reports,
+        )
+
+    inventory = create_inventory(args)
+    rotation = rotation_policy(args)
+
+    scheduler = decision = None
+    if args.schedule:
+        if args.daemon or args.exporter or is_fleet(inventory):
+            raise ValueError(
+                "--schedule decides on single local scans; it cannot be used with --daemon, "
+                "--exporter or targets"
+            )
+        from container_inventory.scheduler import ScanScheduler, lower_priority
+
+        scheduler = ScanScheduler(
+            args.output,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            max_load=args.max_load,
+            log_file=args.schedule_log,
+        )
+        decision = scheduler.decide(inventory)
+        if not decision.scan:
             return
+        lower_priority()
+
+    if args.exporter:
+        from container_inventory.exporter import run_exporter
+
+        run_exporter(inventory, args.exporter, args.exporter_interval)
+        return
+
+    if args.daemon:
+        if not args.output:
+            raise ValueError("--daemon requires --output")
+        from container_inventory.daemon import run_daemon
+
+        run_daemon(
+            inventory,
+            args.output,
+            reconcile_interval=args.reconcile_interval,
+            snapshot_interval=args.snapshot_interval,
+            rotation=rotation,
+        )
+        return
+
+    # Stream images from all runtimes
+    images = inventory.iter_images()
+    first = next(images, None)
+
+    if first is None:
+        print(f"{Colors.YELLOW}No container images found.{Colors.RESET}")
+        warn_failed_targets(inventory)
+        if scheduler is not None and not inventory.fetch_errors:
+            scheduler.record_scan(decision)
+        return
+
+    images = itertools.chain([first], images)
+
+    if args.enrich:
+        with TRACER.phase("enrich"):
+            from container_inventory.enrich import ImageEnricher
+
+            images = iter(ImageEnricher(inventory).enrich(images))
+
+    vulnerable = None
+    if vuln_scanner is not None:
+        with TRACER.phase("vulnscan"):
+            vulnerable = vuln_scanner.scan(images)
+        images = iter(vulnerable)
+
+    usage = None
+    if args.usage or args.unused:
+        from container_inventory.usage import ContainerUsage
+
+        usage = ContainerUsage(inventory)
+        with TRACER.phase("usage"):
+            usage.load()
+        images = usage.annotate(images)
+
+    layer_scanner = None
+    if args.layers:
+        from container_inventory.layers import LayerScanner
+
+        layer_scanner = LayerScanner(inventory)
+        images = layer_scanner.observe(images)
+
+    scanned = None
+    if args.push or args.analyze:
+        # Kept for pushing and analysis once saving or displaying has consumed the stream
+        scanned = list(images)
+        images = iter(scanned)
 
-        # Display inventory
-        inventory.display_inventory(all_images)
+    # Save inventory if requested, building the table from the same stream
+    if args.output:
+        table = None
+        if not args.no_table:
+            from container_inventory.render import TableRenderer
+
+            table = TableRenderer(max_rows=args.max_rows, page=args.page)
+            images = table.observe(images)
+        with TRACER.phase("save"):
+            inventory.save_inventory(
+                images,
+                args.output,
+                args.append,
+                args.format,
+                incremental=args.incremental,
+                snapshot_interval=args.snapshot_interval,
+                index=args.index,
+                compact=args.compact,
+                rotation=rotation,
+            )
+        if table is not None:
+            with TRACER.phase("render"):
+                table.write()
+    elif args.no_table:
+        count = sum(1 for _ in images)
+        print(f"{Colors.GREEN}Found {count} container images{Colors.RESET}")
+    else:
+        # Display inventory; the stream is consumed while building the table
+        with TRACER.phase("render"):
+            inventory.display_inventory(images, max_rows=args.max_rows, page=args.page)
+
+    if args.push:
+        push_scan(scanned, args.push)
+    if analyzers:
+        run_analysis(scanned, analyzers, args)
+
+    if layer_scanner is not None:
+        with TRACER.phase("layers"):
+            print_layer_report(layer_scanner, args.layers)
+    if args.unused:
+        print_unused_report(usage)
+    if vulnerable is not None:
+        from container_inventory.vulnscan import print_security_report
+
+        print_security_report(vulnerable, vuln_scanner, detail=not args.no_table)
+
+    warn_failed_targets(inventory)
+    # A scan missing a runtime's images is retried on the next run
+    if scheduler is not None and not inventory.fetch_errors:
+        scheduler.record_scan(decision)
+
+
+def main():
+    """Main entry point for the script."""
+    try:
+        args = setup_cli()
+
+        if getattr(args, "command", None) == "query":
+            run_query(args)
+            return
+        if getattr(args, "command", None) == "export":
+            run_export(args)
+            return
+        if getattr(args, "command", None) == "collect":
+            run_collect(args)
+            return
+
+        if args.list_analyzers:
+            list_analyzers()
+            return
 
-        # Save inventory if requested
-        if args.output:
-            inventory.save_inventory(all_images, args.output, args.append)
+        if args.trace:
+            TRACER.enable()
+        try:
+            if args.profile:
+                with profiled(args.profile):
+                    run_scan(args)
+                print(
+                    f"{Colors.GREEN}Profile written to {args.profile} "
+                    f"(report in {args.profile}.txt){Colors.RESET}"
+                )
+            else:
+                run_scan(args)
+        finally:
+            if args.trace:
+                try:
+                    TRACER.write(args.trace)
+                except OSError as e:
+                    print(f"{Colors.YELLOW}Warning: could not write trace: {e}{Colors.RESET}")
 
     except KeyboardInterrupt:
         print(f"\n{Colors.YELLOW}Operation cancelled by user{Colors.RESET}")
@@ -0,0 +1,741 @@
+#!/usr/bin/env python3
+"""
+Fleet collector for Container Image Inventory.
+
+The collector merges the inventories of many hosts into one SQLite store.
+Hosts push their scans over HTTP (``--push URL`` on a scan, or any client
+POSTing JSON Lines or a JSON array to ``/ingest``), or the collector pulls
+the inventory files it finds in a directory tree (e.g. one synced directory
+per host). Records are decoded as they are read and written in batches, so
+neither a large payload nor a large backlog of files is held in memory. A
+pushed body is received and decoded into a temporary file before the store
+is locked, so a slow or stalled client does not hold up other hosts.
+
+The store keeps, per host, the current images (the latest full scan plus
+the incremental changes after it) and, across hosts, one row per image ID:
+
+- ``images``: image ID, digest, size, first and last seen anywhere
+- ``host_images``: host, runtime, image ID, repository and tag currently present
+- ``host_scans``: every scan ingested, so a scan pushed or pulled twice is
+  only applied once, and scans older than the host's latest are ignored
+- ``sources``: pulled files and how far they have been read
+"""
+
+import datetime
+import fnmatch
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from container_inventory.colors import Colors
+from container_inventory.incremental import CHANGE_REMOVED, CHANGE_RETAGGED, CHANGE_SNAPSHOT
+from container_inventory.index import INSERT_BATCH_SIZE, _image_id
+from container_inventory.models import ImageRecord
+from container_inventory.store import (
+    LEGACY_SCAN_ID,
+    InventoryStore,
+    is_legacy_file,
+    new_scan_id,
+    utc_timestamp,
+)
+from container_inventory.streaming import iter_json_array, iter_json_lines
+
+# Inventory files picked up by a pull
+DEFAULT_PULL_PATTERN = "inventory.json"
+
+# Bytes read per chunk from request bodies and legacy files
+CHUNK_SIZE = 64 * 1024
+
+# Decoded records of a push kept in memory before spilling to a temporary file
+SPOOL_SIZE = 8 * 1024 * 1024
+
+# Seconds a pushing client may leave its connection idle before it is dropped
+REQUEST_TIMEOUT = 60.0
+
+FLEET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    image_id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS host_images (
+    host TEXT NOT NULL,
+    source TEXT NOT NULL,
+    image_id TEXT NOT NULL,
+    repository TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    scan_id TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (host, source, image_id, repository, tag)
+);
+CREATE TABLE IF NOT EXISTS host_scans (
+    host TEXT NOT NULL,
+    scan_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    received TEXT NOT NULL,
+    PRIMARY KEY (host, scan_id)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    watermark TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_digest ON images (digest);
+CREATE INDEX IF NOT EXISTS host_images_reference ON host_images (repository, tag);
+CREATE INDEX IF NOT EXISTS host_images_image ON host_images (image_id);
+CREATE INDEX IF NOT EXISTS host_scans_timestamp ON host_scans (host, timestamp);
+"""
+
+# Inserts then updates rather than upserts, for SQLite older than 3.24
+INSERT_IMAGE = (
+    "INSERT OR IGNORE INTO images (image_id, digest, size, first_seen, last_seen) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_IMAGE = """
+UPDATE images SET
+    digest = CASE WHEN ? != '' THEN ? ELSE digest END,
+    size = ?,
+    first_seen = MIN(first_seen, ?),
+    last_seen = MAX(last_seen, ?)
+WHERE image_id = ?
+"""
+
+INSERT_HOST_IMAGE = """
+INSERT OR IGNORE INTO host_images
+    (host, source, image_id, repository, tag, size, scan_id, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPDATE_HOST_IMAGE = (
+    "UPDATE host_images SET size = ?, scan_id = ?, last_seen = ? "
+    "WHERE host = ? AND source = ? AND image_id = ? AND repository = ? AND tag = ?"
+)
+
+DELETE_HOST_IMAGE = (
+    "DELETE FROM host_images "
+    "WHERE host = ? AND source = ? AND image_id = ? AND repository = ? AND tag = ?"
+)
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split byte chunks into lines."""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_json_records(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Decode a JSON array or JSON Lines document from byte chunks, record by record.
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if head.strip():
+            break
+    chunks = itertools.chain([head], chunks)
+    if head.lstrip().startswith(b"["):
+        records = iter_json_array(chunks)
+    else:
+        records = iter_json_lines(_iter_lines(chunks))
+    for record in records:
+        if isinstance(record, dict):
+            yield record
+
+
+def iter_request_body(rfile, headers) -> Iterator[bytes]:
+    """
+    Read an HTTP request body in chunks, with or without chunked transfer encoding.
+
+    Raises:
+        ValueError: If the body ends early or is malformed
+    """
+    if headers.get("Transfer-Encoding", "").lower() == "chunked":
+        while True:
+            size = int(rfile.readline().split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip any trailers up to the blank line ending the body
+                while rfile.readline().strip():
+                    pass
+                return
+            yield from _read_exactly(rfile, size)
+            rfile.readline()
+    else:
+        yield from _read_exactly(rfile, int(headers.get("Content-Length") or 0))
+
+
+def spool_records(chunks: Iterable[bytes]):
+    """
+    Decode a pushed body into a temporary file of JSON Lines, one record per line.
+
+    Returns:
+        The file, positioned at its start; ``iter_spooled`` reads it back
+
+    Raises:
+        ValueError: If the body is not valid JSON
+        OSError: If the body could not be read
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    try:
+        for record in iter_json_records(chunks):
+            spool.write(json.dumps(record).encode("utf-8") + b"\n")
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def iter_spooled(spool) -> Iterator[Dict]:
+    """Read back the records written by ``spool_records``."""
+    for line in spool:
+        yield json.loads(line)
+
+
+def _read_exactly(rfile, size: int) -> Iterator[bytes]:
+    """Read ``size`` bytes in chunks."""
+    while size > 0:
+        chunk = rfile.read(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise ValueError("request body ended early")
+        size -= len(chunk)
+        yield chunk
+
+
+class _Scan:
+    """A scan of one host being applied."""
+
+    __slots__ = ("scan_id", "timestamp", "skip", "records", "sources")
+
+    def __init__(self, scan_id: str, timestamp: str, skip: bool):
+        self.scan_id = scan_id
+        self.timestamp = timestamp
+        self.skip = skip
+        self.records = 0
+        # Runtimes the scan reported in full, whose older rows it replaces
+        self.sources: set = set()
+
+
+class _Ingest:
+    """Apply a stream of records to the fleet store, scan by scan."""
+
+    def __init__(self, conn: sqlite3.Connection, host: str):
+        self.conn = conn
+        self.host = host
+        self.records = 0
+        self.scans = 0
+        self.skipped = 0
+        self.latest = ""
+        # The scan being applied per host; a fleet scan interleaves hosts
+        self._open: Dict[str, _Scan] = {}
+        self._images: Dict[str, Tuple] = {}
+        self._upserts: List[Tuple] = []
+        self._deletes: List[Tuple] = []
+        self._retagged: List[Tuple] = []
+
+    def add(self, record: Dict) -> None:
+        """Apply one stored record."""
+        host = record.get("host") or self.host
+        scan_id = str(record.get("scan_id") or LEGACY_SCAN_ID)
+        timestamp = str(record.get("timestamp") or utc_timestamp())
+        scan = self._open.get(host)
+        if scan is None or scan.scan_id != scan_id:
+            if scan is not None:
+                self._finish(host, scan)
+            scan = self._open[host] = self._start(host, scan_id, timestamp)
+        if scan.skip:
+            return
+
+        image = ImageRecord.from_dict(record)
+        image_id = _image_id(image.id)
+        change = record.get("change")
+        key = (host, image.source, image_id, image.repository, image.tag)
+        if change == CHANGE_REMOVED:
+            self._deletes.append(key)
+        else:
+            if change == CHANGE_RETAGGED:
+                self._retagged.append((host, image.source, image_id, scan_id))
+            self._upserts.append(key + (image.size, scan_id, timestamp, timestamp))
+            self._images[image_id] = (
+                image_id,
+                str(record.get("digest") or ""),
+                image.size,
+                timestamp,
+                timestamp,
+            )
+        if change in (None, CHANGE_SNAPSHOT):
+            scan.sources.add(image.source)
+        scan.records += 1
+        self.records += 1
+        self.latest = max(self.latest, timestamp)
+        if len(self._upserts) + len(self._deletes) >= INSERT_BATCH_SIZE:
+            self._flush()
+
+    def _start(self, host: str, scan_id: str, timestamp: str) -> _Scan:
+        """Begin a scan, deciding whether it is new."""
+        seen = self.conn.execute(
+            "SELECT 1 FROM host_scans WHERE host = ? AND scan_id = ?", (host, scan_id)
+        ).fetchone()
+        latest = self.conn.execute(
+            "SELECT MAX(timestamp) FROM host_scans WHERE host = ?", (host,)
+        ).fetchone()[0]
+        # A scan already applied, or older than what the host has since reported
+        skip = seen is not None or (latest is not None and timestamp < latest)
+        if skip:
+            self.skipped += 1
+        return _Scan(scan_id, timestamp, skip)
+
+    def _flush(self) -> None:
+        """Write the buffered rows."""
+        if self._retagged:
+            # A retagged image's rows list all of its current tags
+            self.conn.executemany(
+                "DELETE FROM host_images "
+                "WHERE host = ? AND source = ? AND image_id = ? AND scan_id != ?",
+                self._retagged,
+            )
+        images = list(self._images.values())
+        self.conn.executemany(INSERT_IMAGE, images)
+        self.conn.executemany(
+            UPDATE_IMAGE, [(d, d, size, t0, t1, i) for i, d, size, t0, t1 in images]
+        )
+        self.conn.executemany(INSERT_HOST_IMAGE, self._upserts)
+        self.conn.executemany(
+            UPDATE_HOST_IMAGE, [(row[5], row[6], row[8]) + row[:5] for row in self._upserts]
+        )
+        self.conn.executemany(DELETE_HOST_IMAGE, self._deletes)
+        self._images, self._upserts, self._deletes, self._retagged = {}, [], [], []
+
+    def _finish(self, host: str, scan: _Scan) -> None:
+        """Complete a host's scan."""
+        if scan.skip:
+            return
+        self._flush()
+        # A full scan replaces what the host had for each runtime it reported
+        for source in sorted(scan.sources):
+            self.conn.execute(
+                "DELETE FROM host_images WHERE host = ? AND source = ? AND scan_id != ?",
+                (host, source, scan.scan_id),
+            )
+        self.conn.execute(
+            "INSERT INTO host_scans (host, scan_id, timestamp, records, received) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (host, scan.scan_id, scan.timestamp, scan.records, utc_timestamp()),
+        )
+        self.scans += 1
+
+    def finish(self) -> None:
+        """Complete every open scan."""
+        for host, scan in self._open.items():
+            self._finish(host, scan)
+        self._open = {}
+
+    def totals(self) -> Dict[str, int]:
+        """Return what was ingested."""
+        return {"records": self.records, "scans": self.scans, "skipped": self.skipped}
+
+
+class FleetStore:
+    """SQLite store merging the inventories of many hosts."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path to the SQLite database
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        # One writer at a time; HTTP pushes arrive on several threads
+        self.lock = threading.RLock()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, creating the schema on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(FLEET_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def ingest(self, records: Iterable[Dict], host: str = "") -> Dict[str, int]:
+        """
+        Apply stored records (as ``save_inventory`` writes them) in one transaction.
+
+        Args:
+            records: Records of one or more scans, each scan's records together
+            host: Host of records without a ``host`` field
+
+        Returns:
+            Counts of ``records`` applied, new ``scans`` and ``skipped`` scans
+        """
+        with self.lock:
+            conn = self.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ingest = _Ingest(conn, host)
+                for record in records:
+                    ingest.add(record)
+                ingest.finish()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ingest.totals()
+
+    def ingest_file(self, path: str, host: str = "") -> Dict[str, int]:
+        """
+        Apply the scans of an inventory file not applied yet.
+
+        Unchanged files are skipped without being read. JSON Lines stores are
+        read from the newest record already applied, so sealed segments
+        older than that are not opened again.
+
+        Args:
+            path: Inventory file (JSON Lines store or legacy JSON array)
+            host: Host of records without a ``host`` field
+
+        Returns:
+            Counts as returned by ``ingest``
+        """
+        stat = os.stat(path)
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute(
+                "SELECT size, mtime, watermark FROM sources WHERE path = ?", (path,)
+            ).fetchone()
+            if row is not None and (row["size"], row["mtime"]) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                return {"records": 0, "scans": 0, "skipped": 0}
+
+            watermark = row["watermark"] if row is not None else ""
+            if is_legacy_file(path):
+                records = self._iter_legacy(path, stat.st_mtime)
+            else:
+                records = InventoryStore(path).iter_records(since=watermark or None)
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ingest = _Ingest(conn, host)
+                for record in records:
+                    ingest.add(record)
+                ingest.finish()
+                conn.execute(
+                    "INSERT OR REPLACE INTO sources (path, size, mtime, watermark) "
+                    "VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, max(watermark, ingest.latest)),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ingest.totals()
+
+    def _iter_legacy(self, path: str, mtime: float) -> Iterator[Dict]:
+        """Stream a legacy JSON array file as one scan stamped with its modification time."""
+        when = datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc)
+        timestamp = utc_timestamp(when)
+        scan_id = f"{LEGACY_SCAN_ID}-{when.strftime('%Y%m%dT%H%M%SZ')}"
+        with open(path, "rb") as f:
+            for record in iter_json_array(iter(lambda: f.read(CHUNK_SIZE), b"")):
+                if isinstance(record, dict):
+                    yield dict(record, scan_id=scan_id, timestamp=timestamp)
+
+    def pull(self, root: str, pattern: str = DEFAULT_PULL_PATTERN) -> Dict[str, int]:
+        """
+        Apply every inventory file under a directory.
+
+        Records without a ``host`` field are attributed to the file's
+        directory relative to ``root`` (e.g. ``root/web1/inventory.json``
+        to ``web1``). Files that cannot be read are reported and skipped.
+
+        Returns:
+            Counts summed over the files, plus the number of ``files`` read
+        """
+        totals = {"files": 0, "records": 0, "scans": 0, "skipped": 0}
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            host = os.path.relpath(dirpath, root)
+            host = "" if host == "." else host.replace(os.sep, "/")
+            for name in sorted(fnmatch.filter(filenames, pattern)):
+                path = os.path.join(dirpath, name)
+                try:
+                    counts = self.ingest_file(path, host)
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    print(f"{Colors.YELLOW}Warning: could not ingest {path}: {e}{Colors.RESET}")
+                    continue
+                totals["files"] += 1
+                for key, value in counts.items():
+                    totals[key] += value
+        return totals
+
+    def hosts_with(
+        self,
+        repository: Optional[str] = None,
+        tag: Optional[str] = None,
+        image_id: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Find the hosts that currently have an image.
+
+        Args:
+            repository: Repository name
+            tag: Tag name
+            image_id: Image ID or ID prefix
+            digest: Repository digest (``sha256:...``), for enriched inventories
+
+        Yields:
+            Dictionaries with ``host``, ``source``, ``image_id``,
+            ``repository``, ``tag``, ``size`` and ``last_seen``
+        """
+        clauses = []
+        params: List = []
+        for column, value in (("h.repository", repository), ("h.tag", tag)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        prefix = _image_id(image_id or "")
+        if prefix:
+            clauses.append("h.image_id >= ? AND h.image_id < ?")
+            params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        if digest:
+            clauses.append("h.image_id IN (SELECT image_id FROM images WHERE digest = ?)")
+            params.append(digest)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        sql = (
+            "SELECT h.host, h.source, h.image_id, h.repository, h.tag, h.size, h.last_seen "
+            f"FROM host_images AS h{where} ORDER BY h.host, h.source, h.repository, h.tag"
+        )
+        with self.lock:
+            rows = self.connect().execute(sql, params)
+            for row in rows:
+                yield dict(row)
+
+    def image_bytes(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Sum the bytes each image takes across the fleet, largest first.
+
+        Yields:
+            Dictionaries with ``image_id``, ``digest``, ``size``, the number
+            of ``hosts`` holding it, ``bytes`` (size times hosts) and one
+            ``repository`` it is known as
+        """
+        sql = (
+            "SELECT i.image_id, i.digest, i.size, COUNT(DISTINCT h.host) AS hosts, "
+            "i.size * COUNT(DISTINCT h.host) AS bytes, MIN(h.repository) AS repository "
+            "FROM images AS i JOIN host_images AS h ON h.image_id = i.image_id "
+            "GROUP BY i.image_id ORDER BY bytes DESC, i.image_id"
+        )
+        params: List = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            for row in self.connect().execute(sql, params):
+                yield dict(row)
+
+    def summary(self) -> Dict[str, int]:
+        """Count hosts, distinct images, image references and scans in the store."""
+        with self.lock:
+            conn = self.connect()
+            hosts, references = conn.execute(
+                "SELECT COUNT(DISTINCT host), COUNT(*) FROM host_images"
+            ).fetchone()
+            images = conn.execute(
+                "SELECT COUNT(DISTINCT image_id) FROM host_images"
+            ).fetchone()[0]
+            scans = conn.execute("SELECT COUNT(*) FROM host_scans").fetchone()[0]
+        return {"hosts": hosts, "images": images, "references": references, "scans": scans}
+
+
+def _ingest_handler(store: FleetStore, request_timeout: float = REQUEST_TIMEOUT):
+    """Build a request handler class accepting pushed inventories at /ingest."""
+    import http.server
+    from urllib.parse import parse_qs, urlsplit
+
+    class IngestHandler(http.server.BaseHTTPRequestHandler):
+        # A stalled client times out instead of tying up its thread for good
+        timeout = request_timeout
+
+        def _reply(self, status: int, body: Dict) -> None:
+            data = (json.dumps(body) + "\n").encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path != "/ingest":
+                self._reply(404, {"error": "not found"})
+                return
+            host = parse_qs(url.query).get("host", [""])[0]
+            # The store is only locked once the whole body is in
+            try:
+                spool = spool_records(iter_request_body(self.rfile, self.headers))
+            except socket.timeout:
+                self.close_connection = True
+                self._reply(408, {"error": "timed out reading the request body"})
+                return
+            except ValueError as e:
+                self.close_connection = True
+                self._reply(400, {"error": str(e)})
+                return
+            with spool:
+                try:
+                    counts = store.ingest(iter_spooled(spool), host)
+                except (ValueError, sqlite3.Error) as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+            self._reply(200, counts)
+
+        def do_GET(self):
+            if self.path != "/":
+                self._reply(404, {"error": "not found"})
+                return
+            self._reply(200, store.summary())
+
+        def log_message(self, format, *args):
+            pass  # Every host pushes on every scan
+
+    return IngestHandler
+
+
+def push_inventory(
+    images: Iterable, url: str, host: Optional[str] = None, timeout: float = 60.0
+) -> Dict[str, int]:
+    """
+    Stream a scan to a collector as JSON Lines with chunked transfer encoding.
+
+    Args:
+        images: Image records of one scan
+        url: Collector ingest URL, e.g. ``http://collector:9470/ingest``
+        host: Host to attribute records without a ``host`` field to
+            (default: this machine's hostname)
+        timeout: Socket timeout in seconds
+
+    Returns:
+        The collector's counts
+
+    Raises:
+        OSError, ValueError: If the collector could not be reached or
+            rejected the scan
+    """
+    import http.client
+    from urllib.parse import quote, urlsplit
+
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported collector URL: {url!r}")
+    if parts.scheme == "https":
+        conn = http.client.HTTPSConnection(parts.netloc, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(parts.netloc, timeout=timeout)
+    path = parts.path or "/ingest"
+    query = f"host={quote(host if host is not None else socket.gethostname())}"
+    path += f"?{parts.query}&{query}" if parts.query else f"?{query}"
+
+    scan_id, timestamp = new_scan_id(), utc_timestamp()
+
+    def body() -> Iterator[bytes]:
+        for image in images:
+            record = dict(image, scan_id=scan_id, timestamp=timestamp)
+            yield (json.dumps(record) + "\n").encode("utf-8")
+
+    try:
+        conn.request(
+            "POST",
+            path,
+            body=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+            encode_chunked=True,
+        )
+        response = conn.getresponse()
+        reply = json.loads(response.read() or b"{}")
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise ValueError(f"collector returned HTTP {response.status}: {reply.get('error', '')}")
+    return reply
+
+
+def run_collector(
+    store: FleetStore,
+    address: Optional[str] = None,
+    pull: Optional[List[str]] = None,
+    pattern: str = DEFAULT_PULL_PATTERN,
+    interval: Optional[float] = None,
+) -> None:
+    """
+    Accept pushes and/or pull directories until SIGTERM or SIGINT.
+
+    Args:
+        store: Fleet store to ingest into
+        address: Listen address for pushes, ``[HOST]:PORT`` (None to not listen)
+        pull: Directories to pull inventory files from
+        pattern: File name pattern of the inventory files to pull
+        interval: Seconds between pulls (None to pull once)
+    """
+    import signal
+
+    from container_inventory.exporter import http_server, parse_address
+
+    stop = threading.Event()
+    server = None
+    if address:
+        server = http_server(parse_address(address), _ingest_handler(store))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        print(f"{Colors.GREEN}Accepting inventories on http://{host}:{port}/ingest{Colors.RESET}")
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    try:
+        while not stop.is_set():
+            for root in pull or []:
+                totals = store.pull(root, pattern)
+                print(
+                    f"{Colors.GREEN}Pulled {root}: {totals['files']} files, "
+                    f"{totals['scans']} new scans, {totals['records']} records"
+                    f"{Colors.RESET}"
+                )
+            if pull and interval is None:
+                break
+            stop.wait(interval)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Terminal colors for Container Image Inventory.
+"""
+
+import os
+import sys
+
+
+def _use_colors() -> bool:
+    """Color output only on a terminal, unless NO_COLOR is set."""
+    if os.environ.get("NO_COLOR"):
+        return False
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+# Initialize colors for terminal output (if supported)
+class Colors:
+    """Simple ANSI color codes for terminal output."""
+
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    RED = "\033[31m"
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    BLUE = "\033[34m"
+    MAGENTA = "\033[35m"
+    CYAN = "\033[36m"
+    WHITE = "\033[37m"
+
+    @staticmethod
+    def colored(text, color):
+        """Apply color to text if terminal supports it."""
+        if sys.stdout.isatty():
+            return f"{color}{text}{Colors.RESET}"
+        return text
+
+    @classmethod
+    def disable(cls) -> None:
+        """Turn every color code into an empty string, e.g. when writing to the journal."""
+        for name in ("RESET", "BOLD", "RED", "GREEN", "YELLOW", "BLUE", "MAGENTA", "CYAN", "WHITE"):
+            setattr(cls, name, "")
+
+
+# Plain text when piped or run by systemd, so logs carry no escape codes
+if not _use_colors():
+    Colors.disable()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Columnar exports and aggregation for Container Image Inventory.
+
+Scans (``--format csv|ndjson|parquet``) and the stored history (``export``)
+can be written as flat, typed rows for analytics tools: sizes are integer
+bytes, ``created`` and ``timestamp`` are ISO 8601 UTC times (Parquet
+``timestamp`` columns), and every row carries the scan it came from. CSV and
+NDJSON are written by the standard library; Parquet needs the optional
+``pyarrow`` module and is written in row groups, so exports of any size run in
+bounded memory.
+
+``ImageColumns`` holds rows column by column (sizes in an ``array``), and
+``aggregate`` computes per-group counts, totals, averages and largest images
+in one pass over the columns it needs.
+"""
+
+import csv
+import datetime
+import itertools
+import json
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from container_inventory.models import ImageRecord
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional dependency
+    pyarrow = None
+
+COLUMNAR_FORMATS = ("csv", "ndjson", "parquet")
+
+# Columns of exported rows, in order
+COLUMNS = (
+    "scan_id",
+    "timestamp",
+    "change",
+    "host",
+    "source",
+    "id",
+    "repository",
+    "tag",
+    "size",
+    "created",
+    "digest",
+    "architecture",
+    "os",
+    "dangling",
+    "containers",
+    "running",
+    "labels",
+)
+
+# Columns holding integers (None when unknown)
+INTEGER_COLUMNS = ("size", "containers", "running")
+
+# Columns holding ISO 8601 UTC times
+TIME_COLUMNS = ("timestamp", "created")
+
+# Rows per Parquet row group
+ROW_GROUP_SIZE = 64 * 1024
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def available_formats() -> List[str]:
+    """Return the columnar formats writable on this system."""
+    return [name for name in COLUMNAR_FORMATS if name != "parquet" or pyarrow is not None]
+
+
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise ValueError("Parquet needs the pyarrow module (pip install pyarrow)")
+
+
+def _iso_time(epoch: Optional[int]) -> Optional[str]:
+    if epoch is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime(_TIME_FORMAT)
+
+
+def export_row(image, scan_id: Optional[str] = None, timestamp: Optional[str] = None) -> Dict:
+    """
+    Flatten an image record or a stored record into a typed export row.
+
+    Args:
+        image: ImageRecord, or a dictionary as stored (legacy keys plus
+            ``scan_id``, ``timestamp`` and ``change`` in JSON Lines stores)
+        scan_id: Scan ID for records that do not carry one
+        timestamp: Scan time for records that do not carry one
+
+    Returns:
+        Dictionary with every key of ``COLUMNS``
+    """
+    record = image if isinstance(image, ImageRecord) else ImageRecord.from_dict(image)
+    get = image.get
+    return {
+        "scan_id": get("scan_id") or scan_id,
+        "timestamp": get("timestamp") or timestamp,
+        "change": get("change"),
+        "host": record.host,
+        "source": record.source,
+        "id": record.id,
+        "repository": record.repository,
+        "tag": record.tag,
+        "size": record.size,
+        "created": _iso_time(record.created),
+        "digest": record.digest,
+        "architecture": record.architecture,
+        "os": record.os,
+        "dangling": record.dangling,
+        "containers": record.containers,
+        "running": record.running,
+        "labels": record.labels,
+    }
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def write_csv(rows: Iterable[Dict], path: str, append: bool = False) -> int:
+    """Write export rows as CSV with a header line; returns the number of rows."""
+    header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+    count = 0
+    with open(path, "a" if append else "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow([_csv_value(row[name]) for name in COLUMNS])
+            count += 1
+    return count
+
+
+def write_ndjson(rows: Iterable[Dict], path: str, append: bool = False) -> int:
+    """Write export rows as newline-delimited JSON; returns the number of rows."""
+    count = 0
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def parquet_schema():
+    """Return the Arrow schema of exported rows."""
+    _require_pyarrow()
+    types = {name: pyarrow.string() for name in COLUMNS}
+    types.update({name: pyarrow.int64() for name in INTEGER_COLUMNS})
+    types.update({name: pyarrow.timestamp("s", tz="UTC") for name in TIME_COLUMNS})
+    types["dangling"] = pyarrow.bool_()
+    types["labels"] = pyarrow.map_(pyarrow.string(), pyarrow.string())
+    return pyarrow.schema([(name, types[name]) for name in COLUMNS])
+
+
+def _parquet_batch(rows: List[Dict], schema):
+    columns = {name: [row[name] for row in rows] for name in COLUMNS}
+    for name in TIME_COLUMNS:
+        columns[name] = [
+            datetime.datetime.strptime(value, _TIME_FORMAT).replace(tzinfo=datetime.timezone.utc)
+            if value
+            else None
+            for value in columns[name]
+        ]
+    columns["labels"] = [
+        [(str(k), str(v)) for k, v in labels.items()] if labels else None
+        for labels in columns["labels"]
+    ]
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(columns[field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def write_parquet(rows: Iterable[Dict], path: str, append: bool = False) -> int:
+    """
+    Write export rows as Parquet, one row group per ``ROW_GROUP_SIZE`` rows.
+
+    Raises:
+        ValueError: If pyarrow is not installed, or when appending (Parquet
+            files cannot be appended to)
+    """
+    _require_pyarrow()
+    if append:
+        raise ValueError("Parquet files cannot be appended to; write one file per scan")
+    schema = parquet_schema()
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch: List[Dict] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= ROW_GROUP_SIZE:
+                writer.write_batch(_parquet_batch(batch, schema))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            writer.write_batch(_parquet_batch(batch, schema))
+            count += len(batch)
+    return count
+
+
+WRITERS = {"csv": write_csv, "ndjson": write_ndjson, "parquet": write_parquet}
+
+
+def write_rows(rows: Iterable[Dict], path: str, output_format: str, append: bool = False) -> int:
+    """
+    Write export rows in a columnar format.
+
+    Args:
+        rows: Rows as returned by ``export_row``
+        path: Output file
+        output_format: One of ``COLUMNAR_FORMATS``
+        append: Append to an existing CSV or NDJSON file
+
+    Returns:
+        The number of rows written
+    """
+    return WRITERS[output_format](rows, path, append)
+
+
+class ImageColumns:
+    """Export rows held column by column."""
+
+    def __init__(self, columns: Optional[Dict[str, list]] = None):
+        """
+        Initialize the columns.
+
+        Args:
+            columns: Column lists by name, all the same length; missing
+                columns are filled with None
+        """
+        columns = columns or {}
+        length = len(next(iter(columns.values()))) if columns else 0
+        self.columns: Dict[str, list] = {
+            name: list(columns[name]) if name in columns else [None] * length
+            for name in COLUMNS
+            if name != "size"
+        }
+        self.size = array("q", (value or 0 for value in columns.get("size", [0] * length)))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> "ImageColumns":
+        """Collect export rows (or image records) into columns."""
+        table = cls()
+        for row in rows:
+            table.append(row if "scan_id" in row else export_row(row))
+        return table
+
+    @classmethod
+    def read(cls, path: str) -> "ImageColumns":
+        """Read columns back from a CSV, NDJSON or Parquet export."""
+        if path.endswith(".parquet"):
+            _require_pyarrow()
+            data = pyarrow.parquet.read_table(path).to_pydict()
+            for name in TIME_COLUMNS:
+                data[name] = [
+                    value.strftime(_TIME_FORMAT) if value is not None else None
+                    for value in data.get(name, [])
+                ]
+            return cls(data)
+        with open(path, newline="", encoding="utf-8") as f:
+            if path.endswith(".csv"):
+                rows = csv.DictReader(f)
+                return cls.from_rows(_typed_csv_row(row) for row in rows)
+            return cls.from_rows(json.loads(line) for line in f if line.strip())
+
+    def append(self, row: Dict) -> None:
+        """Add an export row."""
+        for name, column in self.columns.items():
+            column.append(row.get(name))
+        self.size.append(row.get("size") or 0)
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    def column(self, name: str) -> Sequence:
+        """Return one column."""
+        return self.size if name == "size" else self.columns[name]
+
+
+def _typed_csv_row(row: Dict) -> Dict:
+    """Restore the types of a row read back from CSV."""
+    typed: Dict = {name: (row.get(name) or None) for name in COLUMNS}
+    for name in INTEGER_COLUMNS:
+        if typed[name] is not None:
+            typed[name] = int(typed[name])
+    if typed["dangling"] is not None:
+        typed["dangling"] = typed["dangling"] == "True"
+    if typed["labels"] is not None:
+        typed["labels"] = json.loads(typed["labels"])
+    return typed
+
+
+def aggregate(
+    table: ImageColumns, by: Sequence[str] = ("repository",), limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Count, total, average and find the largest image of each group of rows.
+
+    This is one pass over the grouping and size columns zipped together,
+    with no per-row dictionaries, string sizes or times to parse.
+
+    Args:
+        table: Rows to aggregate
+        by: Columns to group by, e.g. ``("source",)`` or
+            ``("scan_id", "repository")`` for per-scan trends
+        limit: Return only this many groups
+
+    Returns:
+        One dictionary per group, largest total first, with the ``by``
+        columns, ``images`` (rows), ``bytes`` (total), ``average``,
+        ``largest`` (size) and the ``largest_id`` and ``largest_image``
+        (``repository:tag``) of the largest row
+    """
+    for name in by:
+        if name not in COLUMNS or name == "size":
+            raise ValueError(f"Cannot group by {name!r}")
+    if not len(table):
+        return []
+
+    if len(by) == 1:
+        keys: Iterable = table.column(by[0])
+    else:
+        keys = zip(*(table.column(name) for name in by))
+
+    # Per group: [rows, total bytes, largest size, index of the largest row]
+    groups: Dict = {}
+    for key, size, row in zip(keys, table.size, itertools.count()):
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, size, size, row]
+            continue
+        group[0] += 1
+        group[1] += size
+        if size > group[2]:
+            group[2] = size
+            group[3] = row
+
+    ids = table.column("id")
+    repositories = table.column("repository")
+    tags = table.column("tag")
+    results = []
+    for key, (count, total, largest, row) in groups.items():
+        result = dict(zip(by, key if len(by) > 1 else (key,)))
+        result.update(
+            images=count,
+            bytes=total,
+            average=total / count,
+            largest=largest,
+            largest_id=ids[row],
+            largest_image=f"{repositories[row]}:{tags[row]}",
+        )
+        results.append(result)
+
+    results.sort(key=lambda result: result["bytes"], reverse=True)
+    return results[:limit] if limit is not None else results
+
+
+def iter_history_rows(store_path: str, since=None, until=None) -> Iterator[Dict]:
+    """
+    Stream the stored history of an inventory file as export rows.
+
+    A legacy JSON array file is read as one scan stamped with its
+    modification time, as ``InventoryStore.migrate_legacy`` would.
+
+    Args:
+        store_path: Inventory file (JSON Lines store, or legacy JSON array)
+        since: Only records at or after this ISO 8601 UTC time
+        until: Only records at or before this ISO 8601 UTC time
+    """
+    from container_inventory.store import (
+        LEGACY_SCAN_ID,
+        InventoryStore,
+        is_legacy_file,
+        utc_timestamp,
+    )
+    from container_inventory.streaming import iter_json_array
+
+    if not is_legacy_file(store_path):
+        for record in InventoryStore(store_path).iter_records(since=since, until=until):
+            yield export_row(record, scan_id=LEGACY_SCAN_ID)
+        return
+
+    mtime = os.path.getmtime(store_path)
+    timestamp = utc_timestamp(datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc))
+    if (since is not None and timestamp < since) or (until is not None and timestamp > until):
+        return
+    with open(store_path, "rb") as f:
+        for record in iter_json_array(iter(lambda: f.read(ROW_GROUP_SIZE), b"")):
+            if isinstance(record, dict):
+                yield export_row(record, LEGACY_SCAN_ID, timestamp)
@@ -5,47 +5,100 @@ Core functionality for Container Image Inventory.
 
 import json
 import os
+import shutil
 import subprocess
 import sys
 import datetime
-from typing import Dict, List
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
+from container_inventory.cache import JsonCache
+from container_inventory.colors import Colors
+from container_inventory.discovery import RuntimeAPIError, default_socket_path
+from container_inventory.incremental import (
+    CHANGE_SNAPSHOT,
+    DEFAULT_SNAPSHOT_INTERVAL,
+    ScanState,
+    diff_images,
+    index_images,
+    state_path,
+)
+from container_inventory.models import ImageRecord, format_size, parse_created
+from container_inventory.reference import image_references
+from container_inventory.store import InventoryStore, new_scan_id, utc_timestamp
+from container_inventory.streaming import iter_command_output, iter_json_array, iter_json_lines
+from container_inventory.trace import TRACER
 
-# Initialize colors for terminal output (if supported)
-class Colors:
-    """Simple ANSI color codes for terminal output."""
+# The query index, table renderer and API client pull in sqlite3 and
+# http.client, so they are imported where they are first used
+if TYPE_CHECKING:
+    from container_inventory.archive import RotationPolicy
+    from container_inventory.index import ScanRecorder
+    from container_inventory.socket_api import RuntimeAPIClient
+    from container_inventory.targets import Target
 
-    RESET = "\033[0m"
-    BOLD = "\033[1m"
-    RED = "\033[31m"
-    GREEN = "\033[32m"
-    YELLOW = "\033[33m"
-    BLUE = "\033[34m"
-    MAGENTA = "\033[35m"
-    CYAN = "\033[36m"
-    WHITE = "\033[37m"
 
-    @staticmethod
-    def colored(text, color):
-        """Apply color to text if terminal supports it."""
-        if sys.stdout.isatty():
-            return f"{color}{text}{Colors.RESET}"
-        return text
+# Container runtimes in the order their images are reported
+RUNTIMES = ["docker", "podman"]
+
+# Seconds to wait for a runtime to list its images before giving up on it
+DEFAULT_TIMEOUT = 120.0
+
+# Records buffered between the runtime readers and the consumer of iter_images
+STREAM_QUEUE_SIZE = 1024
+
+# Cache of runtime binaries already probed, keyed on binary path and mtime
+CAPABILITY_CACHE = "capabilities.json"
+
+
+class RuntimeListingError(Exception):
+    """A runtime's image listing failed; the failure has already been reported."""
+
+
+class _RuntimeDone:
+    """End marker a runtime reader queues after its last image, with its outcome."""
+
+    __slots__ = ("error", "seconds")
+
+    def __init__(self, error: Optional[str], seconds: float):
+        self.error = error
+        self.seconds = seconds
 
 
 class ContainerInventory:
     """Manage Docker and Podman container image inventory."""
 
-    def __init__(self, container_type: str = "all"):
+    def __init__(
+        self,
+        container_type: str = "all",
+        timeout: Union[float, Dict[str, float]] = DEFAULT_TIMEOUT,
+        target: Optional["Target"] = None,
+    ):
         """
         Initialize the container inventory manager.
 
         Args:
             container_type: Type of container to inventory ('docker', 'podman', or 'all')
+            timeout: Seconds to wait for each runtime, or a mapping of runtime
+                name to seconds
+            target: Remote runtime endpoint to scan instead of the local host;
+                its runtime overrides ``container_type``
         """
-        self.container_type = container_type
-        self.docker_available = self._check_tool_availability("docker")
-        self.podman_available = self._check_tool_availability("podman")
+        self.target = target
+        self.container_type = target.runtime if target else container_type
+        self.timeout = timeout
+        # Per-runtime results of the most recent get_images call
+        self.fetch_durations: Dict[str, float] = {}
+        self.fetch_errors: Dict[str, str] = {}
+        self._api_clients: Dict[str, Optional["RuntimeAPIClient"]] = {}
+        # Runtimes are only probed when first needed
+        self._availability: Dict[str, bool] = {}
+
+        # A remote target is only found to be reachable (or not) when it is scanned
+        if target is not None:
+            return
 
         # Check if at least one container runtime is available
         if container_type != "all" and not getattr(self, f"{container_type}_available"):
@@ -63,173 +116,441 @@ class ContainerInventory:
             if "pytest" not in sys.modules:
                 sys.exit(1)
 
+    def _api_client(self, runtime: str) -> Optional["RuntimeAPIClient"]:
+        """Return a pooled API client for a runtime if its socket is present."""
+        if runtime not in self._api_clients:
+            if self.target is not None:
+                socket_path = self.target.socket_path()
+            else:
+                socket_path = default_socket_path(runtime)
+            self._api_clients[runtime] = None
+            if socket_path:
+                from container_inventory.socket_api import RuntimeAPIClient
+
+                self._api_clients[runtime] = RuntimeAPIClient(
+                    runtime, socket_path, timeout=self._runtime_timeout(runtime)
+                )
+        return self._api_clients[runtime]
+
+    @property
+    def docker_available(self) -> bool:
+        """Whether Docker is available, probed on first access."""
+        return self._runtime_available("docker")
+
+    @property
+    def podman_available(self) -> bool:
+        """Whether Podman is available, probed on first access."""
+        return self._runtime_available("podman")
+
+    def _runtime_available(self, runtime: str) -> bool:
+        """Probe a runtime once and remember the result."""
+        if self.target is not None:
+            return runtime == self.target.runtime
+        if runtime not in self._availability:
+            with TRACER.phase(f"probe.{runtime}"):
+                self._availability[runtime] = self._check_tool_availability(runtime)
+        return self._availability[runtime]
+
     def _check_tool_availability(self, tool: str) -> bool:
-        """Check if a command-line tool is available."""
+        """
+        Check if a container runtime API socket or command-line tool is available.
+
+        A present API socket or a cached probe of the same binary (matched on
+        path and mtime) answers without spawning a process. Only a new or
+        upgraded binary is run with ``--version``, and the result is cached.
+        """
+        if self._api_client(tool) is not None:
+            return True
+
+        path = shutil.which(tool)
+        if path is None:
+            return False
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+
+        cache = JsonCache(CAPABILITY_CACHE)
+        capabilities = cache.load()
+        entry = capabilities.get(tool)
+        if isinstance(entry, dict) and entry.get("path") == path and entry.get("mtime") == mtime:
+            return bool(entry.get("available"))
+
         try:
-            subprocess.run(
-                [tool, "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+            result = subprocess.run(
+                [path, "--version"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+                timeout=self._runtime_timeout(tool),
             )
-            return True
-        except FileNotFoundError:
+            available, version = True, result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired):
+            available, version = False, ""
+
+        capabilities[tool] = {
+            "path": path,
+            "mtime": mtime,
+            "available": available,
+            "version": version,
+        }
+        cache.save(capabilities)
+        return available
+
+    def _runtime_timeout(self, runtime: str) -> Optional[float]:
+        """Return the timeout in seconds for a runtime, or None for no limit."""
+        if isinstance(self.timeout, dict):
+            return self.timeout.get(runtime, DEFAULT_TIMEOUT)
+        return self.timeout
+
+    def _runtime_command(self, runtime: str, args: List[str]) -> List[str]:
+        """Build the CLI command line for a runtime, routed to the target if any."""
+        if self.target is not None:
+            return self.target.command(args)
+        return [runtime] + args
+
+    def _selected_runtimes(self, only: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the requested runtimes that are available, optionally limited to ``only``."""
+        return [
+            runtime
+            for runtime in RUNTIMES
+            if self.container_type in [runtime, "all"]
+            and (only is None or runtime in only)
+            and getattr(self, f"{runtime}_available")
+        ]
+
+    def _produce_runtime(self, runtime: str, queue: Queue, stop: threading.Event) -> None:
+        """
+        Stream a runtime's images into a queue, then put an end marker with its outcome.
+
+        The reader only talks to the scan that started it through the queue,
+        so a reader abandoned after its deadline cannot touch a later scan.
+        """
+        start = time.monotonic()
+
+        def put(item) -> bool:
+            # Block while the consumer catches up, but give up once it has gone
+            while not stop.is_set():
+                try:
+                    queue.put((runtime, item), timeout=0.1)
+                    return True
+                except Full:
+                    continue
             return False
 
-    def get_images(self) -> List[Dict]:
-        """Get a list of all container images."""
-        images = []
+        host = self.target.name if self.target else ""
+        count = 0
+        error = None
+        try:
+            for image in getattr(self, f"_iter_{runtime}_images")():
+                image.source = runtime
+                image.host = host
+                count += 1
+                if not put(image):
+                    return
+        except RuntimeListingError as e:
+            error = str(e)
+        except Exception as e:
+            error = str(e)
+            print(f"{Colors.BOLD}{Colors.RED}Error fetching {runtime} images:{Colors.RESET} {e}")
+        finally:
+            seconds = time.monotonic() - start
+            key = f"{host}/{runtime}" if host else runtime
+            TRACER.add_phase(f"fetch.{key}", seconds)
+            TRACER.count(f"records.{key}", count)
+            put(_RuntimeDone(error, seconds))
+
+    def iter_images(self, runtimes: Optional[Iterable[str]] = None) -> Iterator[ImageRecord]:
+        """
+        Stream all container images as the runtimes report them.
 
-        if self.container_type in ["docker", "all"] and self.docker_available:
-            docker_images = self._get_docker_images()
-            for image in docker_images:
-                image["source"] = "docker"
-                images.append(image)
+        All selected runtimes are read at the same time, so a scan takes about
+        as long as the slowest runtime, and records are yielded as soon as
+        they are parsed, interleaved between runtimes. A runtime that fails
+        or does not finish within its timeout contributes only the images it
+        had already reported; the failure is recorded in ``fetch_errors``.
+
+        Args:
+            runtimes: Only scan these of the selected runtimes (all if None)
+        """
+        runtimes = self._selected_runtimes(runtimes)
+        # Fresh dictionaries per scan, filled only from this scan's queue
+        durations: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        self.fetch_durations = durations
+        self.fetch_errors = errors
+        if not runtimes:
+            return
 
-        if self.container_type in ["podman", "all"] and self.podman_available:
-            podman_images = self._get_podman_images()
-            for image in podman_images:
-                image["source"] = "podman"
-                images.append(image)
+        queue: Queue = Queue(maxsize=STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+        start = time.monotonic()
+        deadlines = {}
+        for runtime in runtimes:
+            timeout = self._runtime_timeout(runtime)
+            deadlines[runtime] = None if timeout is None else start + timeout
+            threading.Thread(
+                target=self._produce_runtime, args=(runtime, queue, stop), daemon=True
+            ).start()
+
+        pending = set(runtimes)
+        try:
+            while pending:
+                waits = [deadlines[runtime] for runtime in pending if deadlines[runtime]]
+                wait = max(0.0, min(waits) - time.monotonic()) if waits else None
+                try:
+                    runtime, image = queue.get(timeout=wait)
+                except Empty:
+                    now = time.monotonic()
+                    for runtime in sorted(pending):
+                        if deadlines[runtime] is not None and now >= deadlines[runtime]:
+                            pending.discard(runtime)
+                            timeout = self._runtime_timeout(runtime)
+                            durations[runtime] = now - start
+                            errors[runtime] = f"timed out after {timeout:g}s"
+                            print(
+                                f"{Colors.YELLOW}Warning: {runtime} did not respond within "
+                                f"{timeout:g}s; continuing without the rest of its images"
+                                f"{Colors.RESET}"
+                            )
+                    continue
+
+                if runtime not in pending:
+                    continue  # Late output from a runtime that already timed out
+                if isinstance(image, _RuntimeDone):
+                    pending.discard(runtime)
+                    durations[runtime] = image.seconds
+                    if image.error is not None:
+                        errors[runtime] = image.error
+                    continue
+                yield image
+        finally:
+            # Release readers blocked on a full queue if iteration stopped early
+            stop.set()
+
+    def get_images(self) -> List[ImageRecord]:
+        """
+        Get a list of all container images, grouped by runtime.
 
-        return images
+        See ``iter_images`` for how runtimes are queried and how failures and
+        timeouts are handled.
+        """
+        by_runtime: Dict[str, List[ImageRecord]] = {runtime: [] for runtime in RUNTIMES}
+        for image in self.iter_images():
+            by_runtime[image.source].append(image)
+        return [image for runtime in RUNTIMES for image in by_runtime[runtime]]
 
-    def _get_docker_images(self) -> List[Dict]:
+    def _get_docker_images(self) -> List[ImageRecord]:
         """Get a list of Docker images."""
+        return list(self._iter_docker_images())
+
+    def _get_podman_images(self) -> List[ImageRecord]:
+        """Get a list of Podman images."""
+        return list(self._iter_podman_images())
+
+    def _iter_docker_images(self) -> Iterator[ImageRecord]:
+        """
+        Stream Docker images.
+
+        Raises:
+            RuntimeListingError: If the listing failed, after reporting it
+        """
         print(f"{Colors.BLUE}Fetching Docker images...{Colors.RESET}")
 
+        client = self._api_client("docker")
+        if client is not None:
+            streamed = False
+            try:
+                for image in self._normalize_docker_api_images(client.iter_images()):
+                    streamed = True
+                    yield image
+                return
+            except RuntimeAPIError as e:
+                if streamed:
+                    raise
+                print(f"{Colors.YELLOW}Warning: {e}; falling back to docker CLI{Colors.RESET}")
+
         try:
-            result = subprocess.run(
-                ["docker", "images", "--format", "{{json .}}"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True,
+            lines = iter_command_output(
+                self._runtime_command("docker", ["images", "--format", "{{json .}}"]),
+                timeout=self._runtime_timeout("docker"),
             )
-
-            images = []
-            for line in result.stdout.strip().split("\n"):
-                if line:
-                    image_data = json.loads(line)
-                    images.append(image_data)
-
-            return images
+            for row in iter_json_lines(lines):
+                yield ImageRecord.from_dict(row, "docker")
         except subprocess.CalledProcessError as e:
             print(
                 f"{Colors.BOLD}{Colors.RED}Error fetching Docker images:{Colors.RESET} {e.stderr}"
             )
-            return []
+            raise RuntimeListingError(str(e.stderr).strip())
+        except subprocess.TimeoutExpired as e:
+            print(
+                f"{Colors.YELLOW}Warning: docker images timed out after "
+                f"{e.timeout:g}s{Colors.RESET}"
+            )
+            raise RuntimeListingError(f"timed out after {e.timeout:g}s")
 
-    def _get_podman_images(self) -> List[Dict]:
-        """Get a list of Podman images."""
+    def _iter_podman_images(self) -> Iterator[ImageRecord]:
+        """
+        Stream Podman images.
+
+        Raises:
+            RuntimeListingError: If the listing failed, after reporting it
+        """
         print(f"{Colors.BLUE}Fetching Podman images...{Colors.RESET}")
 
+        client = self._api_client("podman")
+        if client is not None:
+            streamed = False
+            try:
+                for image in self._normalize_podman_images(client.iter_images()):
+                    streamed = True
+                    yield image
+                return
+            except RuntimeAPIError as e:
+                if streamed:
+                    raise
+                print(f"{Colors.YELLOW}Warning: {e}; falling back to podman CLI{Colors.RESET}")
+
         try:
-            result = subprocess.run(
-                ["podman", "images", "--format", "json"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True,
+            lines = iter_command_output(
+                self._runtime_command("podman", ["images", "--format", "json"]),
+                timeout=self._runtime_timeout("podman"),
             )
-
-            images = json.loads(result.stdout)
-
-            # Normalize podman data to match docker format
-            normalized_images = []
-            for img in images:
-                normalized = {
-                    "Repository": (
-                        img.get("Names", ["<none>"])[0].split(":")[0]
-                        if img.get("Names")
-                        else "<none>"
-                    ),
-                    "Tag": (
-                        img.get("Names", [":<none>"])[0].split(":")[-1]
-                        if img.get("Names")
-                        else "<none>"
-                    ),
-                    "ID": str(img.get("Id", ""))[:12],
-                    "CreatedAt": str(img.get("Created", "")),
-                    "Size": self._format_size(int(img.get("Size", 0))),
-                    "source": "podman",
-                }
-                normalized_images.append(normalized)
-
-            return normalized_images
+            yield from self._normalize_podman_images(iter_json_array(lines))
         except subprocess.CalledProcessError as e:
             print(
                 f"{Colors.BOLD}{Colors.RED}Error fetching Podman images:{Colors.RESET} {e.stderr}"
             )
-            return []
+            raise RuntimeListingError(str(e.stderr).strip())
+        except subprocess.TimeoutExpired as e:
+            print(
+                f"{Colors.YELLOW}Warning: podman images timed out after "
+                f"{e.timeout:g}s{Colors.RESET}"
+            )
+            raise RuntimeListingError(f"timed out after {e.timeout:g}s")
         except json.JSONDecodeError:
             print(f"{Colors.BOLD}{Colors.RED}Error:{Colors.RESET} Could not parse Podman output")
-            return []
+            raise RuntimeListingError("could not parse output")
+
+    def _normalize_docker_api_images(self, images: Iterable[Dict]) -> Iterator[ImageRecord]:
+        """Normalize Docker Engine API image summaries to match docker CLI rows."""
+        for img in images:
+            image_id = str(img.get("Id", ""))
+            if image_id.startswith("sha256:"):
+                image_id = image_id[len("sha256:") :]
+
+            # The CLI lists one row per tag, and a single <none> row for untagged images
+            for repository, tag in image_references(img.get("RepoTags")):
+                yield ImageRecord(
+                    id=image_id[:12],
+                    repository=repository,
+                    tag=tag,
+                    created=parse_created(img.get("Created")),
+                    size=int(img.get("Size", 0)),
+                    source="docker",
+                )
+
+    def _normalize_podman_images(self, images: Iterable[Dict]) -> Iterator[ImageRecord]:
+        """
+        Normalize podman data to match docker format.
+
+        Like ``docker images``, an image with several names yields one row
+        per name, and an image without names yields a single <none> row.
+        """
+        for img in images:
+            image_id = str(img.get("Id", ""))[:12]
+            created = parse_created(img.get("Created"))
+            size = int(img.get("Size", 0))
+            # Saved as podman printed it, shared by every name of the image
+            extra = {"CreatedAt": str(img.get("Created", ""))}
+            for repository, tag in image_references(img.get("Names") or img.get("RepoTags")):
+                yield ImageRecord(
+                    id=image_id,
+                    repository=repository,
+                    tag=tag,
+                    created=created,
+                    size=size,
+                    source="podman",
+                    extra=extra,
+                )
 
     def _format_size(self, size_bytes: int) -> str:
         """Format bytes to human-readable size."""
-        size = float(size_bytes)  # Create a separate float variable
-        for unit in ["B", "KB", "MB", "GB", "TB"]:
-            if size < 1024.0:
-                return f"{size:.2f}{unit}"
-            size /= 1024.0
-        return f"{size:.2f}PB"
-
-    def display_inventory(self, images: List[Dict]) -> None:
-        """Display the container image inventory in a formatted table."""
-        if not images:
-            print("No images found.")
-            return
-
-        # Get max width for each column for proper formatting
-        col_widths = {
-            "ID": max(12, max(len(str(img.get("ID", ""))) for img in images)),
-            "Repository": max(10, max(len(str(img.get("Repository", ""))) for img in images)),
-            "Tag": max(3, max(len(str(img.get("Tag", ""))) for img in images)),
-            "Created At": max(10, max(len(str(img.get("CreatedAt", ""))) for img in images)),
-            "Size": max(4, max(len(str(img.get("Size", ""))) for img in images)),
-            "Source": max(6, max(len(str(img.get("source", ""))) for img in images)),
-        }
-
-        # Print header
-        print("\n" + Colors.BOLD + "Container Image Inventory" + Colors.RESET + "\n")
-
-        # Print column headers
-        header = (
-            f"{Colors.CYAN}{'ID':<{col_widths['ID']}}{Colors.RESET} | "
-            f"{Colors.GREEN}{'Repository':<{col_widths['Repository']}}{Colors.RESET} | "
-            f"{Colors.BLUE}{'Tag':<{col_widths['Tag']}}{Colors.RESET} | "
-            f"{Colors.MAGENTA}{'Created At':<{col_widths['Created At']}}{Colors.RESET} | "
-            f"{Colors.YELLOW}{'Size':<{col_widths['Size']}}{Colors.RESET} | "
-            f"{Colors.RED}{'Source':<{col_widths['Source']}}{Colors.RESET}"
-        )
-        print(header)
-
-        # Print separator
-        separator = "-" * (sum(col_widths.values()) + len(col_widths) * 3)
-        print(separator)
-
-        # Print rows
-        for image in images:
-            row = (
-                f"{str(image.get('ID', '')):<{col_widths['ID']}} | "
-                f"{str(image.get('Repository', '')):<{col_widths['Repository']}} | "
-                f"{str(image.get('Tag', '')):<{col_widths['Tag']}} | "
-                f"{str(image.get('CreatedAt', '')):<{col_widths['Created At']}} | "
-                f"{str(image.get('Size', '')):<{col_widths['Size']}} | "
-                f"{str(image.get('source', '')):<{col_widths['Source']}}"
-            )
-            print(row)
-
-        print("")  # Add empty line after table
+        return format_size(size_bytes)
+
+    def display_inventory(
+        self,
+        images: Iterable[ImageRecord],
+        max_rows: Optional[int] = None,
+        page: int = 1,
+    ) -> None:
+        """
+        Display the container image inventory in a formatted table.
 
-    def save_inventory(self, images: List[Dict], output_file: str, append: bool = False) -> None:
+        Args:
+            images: Image records to display
+            max_rows: Show at most this many rows per page (all if None)
+            page: 1-based page of ``max_rows`` rows to show
+        """
+        from container_inventory.render import TableRenderer
+
+        table = TableRenderer(max_rows=max_rows, page=page)
+        table.extend(images)
+        table.write()
+
+    def save_inventory(
+        self,
+        images: Iterable[ImageRecord],
+        output_file: str,
+        append: bool = False,
+        output_format: str = "json",
+        incremental: bool = False,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        index: bool = True,
+        compact: bool = False,
+        rotation: Optional["RotationPolicy"] = None,
+    ) -> None:
         """
         Save inventory to a file.
 
         Args:
-            images: List of image data dictionaries
+            images: Image records (or legacy image dictionaries); any
+                iterable, which is consumed once and streamed to the file
+                where the output format allows
             output_file: Path to output file
             append: Whether to append to existing file
+            output_format: 'json' for a single array, 'jsonl' for the
+                append-only JSON Lines store, or 'csv', 'ndjson' or 'parquet'
+                for typed rows (not indexed)
+            incremental: Append only the changes since the previous scan to
+                the JSON Lines store (implies 'jsonl' and append)
+            snapshot_interval: Seconds between full snapshots in incremental mode
+            index: Also record the written records in the SQLite query index
+                next to the output file (for 'json', only once 'query' has
+                created it)
+            compact: Write the 'json' array without indentation
+            rotation: Seal and prune segments of the JSON Lines store before
+                appending to it
         """
-        mode = "a" if append and os.path.exists(output_file) else "w"
+        if incremental:
+            self._save_incremental(images, output_file, snapshot_interval, index, rotation)
+            return
+
+        if output_format == "jsonl":
+            self._save_jsonl(images, output_file, append, index, rotation)
+            return
+
+        if output_format in ("csv", "ndjson", "parquet"):
+            self._save_columnar(images, output_file, output_format, append)
+            return
+
+        # Only an index 'query' already built is kept current for a JSON array
+        recorder = self._index_recorder(output_file, index, replace=not append, create=False)
+        images = recorder.observe(images)
+
+        # Appending needs to read the existing array back, so open it read-write
+        mode = "r+" if append and os.path.exists(output_file) else "w"
 
         try:
             with open(output_file, mode) as f:
@@ -242,14 +563,21 @@ class ContainerInventory:
                     # Read existing content
                     f.seek(0)
                     try:
-                        existing_data = json.load(f)
+                        with TRACER.phase("save.read_existing"):
+                            existing_data = json.load(f)
 
                         # If it's a list, append to it
                         if isinstance(existing_data, list):
-                            combined_data = existing_data + images
-                            f.seek(0)
-                            f.truncate(0)
-                            json.dump(combined_data, f, indent=2)
+                            existing_data.extend(dict(image) for image in images)
+                            combined_data = existing_data
+                            with TRACER.phase("save.rewrite"):
+                                f.seek(0)
+                                f.truncate(0)
+                                if compact:
+                                    json.dump(combined_data, f, separators=(",", ":"))
+                                else:
+                                    json.dump(combined_data, f, indent=2)
+                            recorder.commit()
                             print(
                                 f"{Colors.GREEN}Successfully appended to {output_file}{Colors.RESET}"
                             )
@@ -268,8 +596,211 @@ class ContainerInventory:
                 # Write new content
                 if mode == "w":
                     with open(output_file, "w") as f:
-                        json.dump(images, f, indent=2)
-                        print(f"{Colors.GREEN}Successfully saved to {output_file}{Colors.RESET}")
+                        self._write_json_array(images, f, compact)
+                    recorder.commit()
+                    print(f"{Colors.GREEN}Successfully saved to {output_file}{Colors.RESET}")
 
         except IOError as e:
+            recorder.rollback()
+            print(f"{Colors.BOLD}{Colors.RED}Error saving inventory:{Colors.RESET} {e}")
+
+    def _index_recorder(
+        self, output_file: str, enabled: bool, replace: bool = False, create: bool = True
+    ) -> "ScanRecorder":
+        """Start recording a new scan in the query index next to an output file."""
+        from container_inventory.index import ScanRecorder, open_index
+
+        return ScanRecorder(
+            open_index(output_file, create, replace) if enabled else None,
+            new_scan_id(),
+            utc_timestamp(),
+            replace=replace,
+        )
+
+    def _write_json_array(self, images: Iterable[ImageRecord], f, compact: bool = False) -> None:
+        """Stream images to a file as a JSON array, one element at a time."""
+        if compact:
+            f.write("[")
+            separator = ""
+            for image in images:
+                f.write(separator + json.dumps(dict(image), separators=(",", ":")))
+                separator = ","
+            f.write("]")
+            return
+
+        f.write("[")
+        separator = "\n  "
+        for image in images:
+            f.write(separator + json.dumps(dict(image), indent=2).replace("\n", "\n  "))
+            separator = ",\n  "
+        f.write("]" if separator == "\n  " else "\n]")
+
+    def _rotate_store(
+        self, output_file: str, rotation: Optional["RotationPolicy"], index: bool = True
+    ) -> None:
+        """Seal and prune segments of the JSON Lines store as a rotation policy requires."""
+        if rotation is None or not rotation.enabled:
+            return
+        store = InventoryStore(output_file)
+        try:
+            with TRACER.phase("save.rotate"):
+                sealed = store.rotate(rotation)
+                pruned = store.prune(rotation)
+        except (IOError, ValueError) as e:
+            print(f"{Colors.YELLOW}Warning: could not rotate {output_file}: {e}{Colors.RESET}")
+            return
+        if sealed:
+            print(f"{Colors.GREEN}Sealed {output_file} into {sealed}{Colors.RESET}")
+
+        # Records of deleted segments leave the query index too; sqlite3 is
+        # only imported when segments were deleted
+        if not (pruned and index):
+            return
+        import sqlite3
+
+        from container_inventory.index import InventoryIndex, index_path
+
+        if os.path.exists(index_path(output_file)):
+            inventory_index = InventoryIndex(index_path(output_file))
+            try:
+                inventory_index.prune(pruned)
+            except sqlite3.Error as e:
+                print(
+                    f"{Colors.YELLOW}Warning: could not prune index "
+                    f"{inventory_index.path}: {e}{Colors.RESET}"
+                )
+            finally:
+                inventory_index.close()
+
+    def _save_jsonl(
+        self,
+        images: Iterable[ImageRecord],
+        output_file: str,
+        append: bool,
+        index: bool = True,
+        rotation: Optional["RotationPolicy"] = None,
+    ) -> None:
+        """Save inventory as one scan in the append-only JSON Lines store."""
+        if append:
+            self._rotate_store(output_file, rotation, index)
+        store = InventoryStore(output_file)
+        recorder = self._index_recorder(output_file, index, replace=not append)
+        images = recorder.observe(images)
+        scan_id, timestamp = recorder.scan_id, recorder.timestamp
+
+        try:
+            if append:
+                migrated = store.migrate_legacy()
+                if migrated:
+                    print(
+                        f"{Colors.YELLOW}Migrated {migrated} legacy records in {output_file} "
+                        f"to JSON Lines{Colors.RESET}"
+                    )
+                store.append_scan(images, scan_id, timestamp)
+                recorder.commit()
+                print(f"{Colors.GREEN}Successfully appended to {output_file}{Colors.RESET}")
+            else:
+                store.write_scan(images, scan_id, timestamp)
+                recorder.commit()
+                print(f"{Colors.GREEN}Successfully saved to {output_file}{Colors.RESET}")
+        except (IOError, ValueError) as e:
+            recorder.rollback()
+            print(f"{Colors.BOLD}{Colors.RED}Error saving inventory:{Colors.RESET} {e}")
+
+    def _save_columnar(
+        self,
+        images: Iterable[ImageRecord],
+        output_file: str,
+        output_format: str,
+        append: bool,
+    ) -> None:
+        """Save inventory as typed rows for analytics tools (CSV, NDJSON or Parquet)."""
+        from container_inventory.columnar import export_row, write_rows
+
+        scan_id, timestamp = new_scan_id(), utc_timestamp()
+        rows = (export_row(image, scan_id, timestamp) for image in images)
+        try:
+            count = write_rows(rows, output_file, output_format, append)
+        except (IOError, ValueError) as e:
+            print(f"{Colors.BOLD}{Colors.RED}Error saving inventory:{Colors.RESET} {e}")
+            return
+        action = "appended" if append else "saved"
+        print(f"{Colors.GREEN}Successfully {action} {count} rows to {output_file}{Colors.RESET}")
+
+    def _failed_runtimes(self) -> Set[Tuple[str, str]]:
+        """Return the (host, runtime) pairs whose listing failed in the most recent scan."""
+        failed = set()
+        for key in self.fetch_errors:
+            host, _, runtime = key.rpartition("/")
+            failed.add((host, runtime))
+        return failed
+
+    def _save_incremental(
+        self,
+        images: Iterable[ImageRecord],
+        output_file: str,
+        snapshot_interval: float,
+        index: bool = True,
+        rotation: Optional["RotationPolicy"] = None,
+    ) -> None:
+        """Append the changes since the previous scan to the JSON Lines store."""
+        # Changes are only known once the whole scan has been seen
+        images = list(images)
+        # A freshly sealed store starts its new segment with a full snapshot
+        self._rotate_store(output_file, rotation, index)
+        store = InventoryStore(output_file)
+        state = ScanState(state_path(output_file))
+        state.load()
+        recorder = self._index_recorder(output_file, index)
+        scan_id, timestamp = recorder.scan_id, recorder.timestamp
+
+        try:
+            migrated = store.migrate_legacy()
+            if migrated:
+                print(
+                    f"{Colors.YELLOW}Migrated {migrated} legacy records in {output_file} "
+                    f"to JSON Lines{Colors.RESET}"
+                )
+
+            # Runtimes whose listing failed keep their previous images
+            failed = self._failed_runtimes()
+            for host, runtime in sorted(failed):
+                name = f"{host}/{runtime}" if host else runtime
+                print(
+                    f"{Colors.YELLOW}Warning: keeping previous {name} images: "
+                    f"{self.fetch_errors.get(name, 'listing failed')}{Colors.RESET}"
+                )
+
+            now = time.time()
+            snapshot = state.snapshot_due(snapshot_interval, now) or not os.path.exists(output_file)
+            if snapshot and failed and state.loaded:
+                # A snapshot replaces the whole scan: write the changes now and
+                # the snapshot on the next scan without failures
+                snapshot = False
+                state.snapshot_at = 0.0
+            if snapshot:
+                state.images = index_images(images)
+                state.snapshot_at = now
+                store.append_scan(
+                    recorder.observe(dict(image, change=CHANGE_SNAPSHOT) for image in images),
+                    scan_id,
+                    timestamp,
+                )
+                print(f"{Colors.GREEN}Wrote full snapshot to {output_file}{Colors.RESET}")
+            else:
+                deltas, current = diff_images(state.images, images, failed)
+                if not deltas:
+                    recorder.rollback()
+                    print(f"{Colors.GREEN}No image changes since the last scan{Colors.RESET}")
+                    return
+                store.append_scan(recorder.observe(deltas), scan_id, timestamp)
+                state.images = current
+                print(
+                    f"{Colors.GREEN}Appended {len(deltas)} changes to {output_file}{Colors.RESET}"
+                )
+
+            state.save()
+            recorder.commit()
+        except (IOError, ValueError) as e:
+            recorder.rollback()
             print(f"{Colors.BOLD}{Colors.RED}Error saving inventory:{Colors.RESET} {e}")
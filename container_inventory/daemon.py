@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Long-running daemon mode for Container Image Inventory.
+
+The daemon does one full scan, then follows ``docker events`` and ``podman
+events`` for image pulls, tags, untags and deletions. A burst of events is
+debounced into a single re-list of the runtime that changed, and the result
+is diffed against the in-memory inventory so only the changes are appended to
+the JSON Lines store. A periodic reconciliation scan of every runtime catches
+events missed while an event stream was down.
+
+systemd is told when the first scan is done (``READY=1``) and, if the unit
+sets ``WatchdogSec=``, pinged from the main loop.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from queue import Empty, Queue
+from typing import Dict, Iterable, List, Optional, Set
+
+from container_inventory.archive import RotationPolicy
+from container_inventory.colors import Colors
+from container_inventory.core import ContainerInventory
+from container_inventory.defaults import DEFAULT_RECONCILE_INTERVAL
+from container_inventory.incremental import DEFAULT_SNAPSHOT_INTERVAL
+from container_inventory.models import ImageRecord
+from container_inventory.streaming import iter_command_output, iter_json_lines
+
+# Seconds to wait for more events before re-listing a runtime
+DEFAULT_DEBOUNCE = 2.0
+
+# Longest the main loop blocks, so signals and the watchdog are handled promptly
+LOOP_INTERVAL = 1.0
+
+# Seconds before restarting an event stream that ended, doubled up to the maximum
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 60.0
+
+# Image events that change the inventory, by runtime
+IMAGE_EVENTS = {
+    "docker": ["pull", "tag", "untag", "delete"],
+    "podman": ["pull", "tag", "untag", "remove"],
+}
+
+EVENT_FORMATS = {"docker": "{{json .}}", "podman": "json"}
+
+
+def notify(state: str) -> bool:
+    """
+    Send a status notification to systemd, if running under a notify unit.
+
+    Args:
+        state: Newline-separated assignments, e.g. ``READY=1``
+
+    Returns:
+        True if the notification was sent
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # Abstract namespace socket
+
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(state.encode("utf-8"), address)
+        return True
+    except OSError:
+        return False
+
+
+def watchdog_interval() -> Optional[float]:
+    """Return how often to ping the systemd watchdog, or None if it is disabled."""
+    try:
+        usec = int(os.environ.get("WATCHDOG_USEC", ""))
+    except ValueError:
+        return None
+    pid = os.environ.get("WATCHDOG_PID")
+    if usec <= 0 or (pid and pid != str(os.getpid())):
+        return None
+    return usec / 1e6 / 2
+
+
+def describe_event(event: Dict) -> str:
+    """Summarize a docker or podman image event as 'action name'."""
+    action = event.get("Action") or event.get("status") or event.get("Status") or "event"
+    attributes = (event.get("Actor") or {}).get("Attributes") or {}
+    name = attributes.get("name") or event.get("Name") or event.get("id") or event.get("ID")
+    return f"{action} {name or ''}".strip()
+
+
+class InventoryDaemon:
+    """Keep the inventory store current by following runtime image events."""
+
+    def __init__(
+        self,
+        inventory: ContainerInventory,
+        output_file: str,
+        reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        rotation: Optional[RotationPolicy] = None,
+    ):
+        """
+        Initialize the daemon.
+
+        Args:
+            inventory: Inventory of the runtimes to follow
+            output_file: JSON Lines store the changes are appended to
+            reconcile_interval: Seconds between full reconciliation scans
+            debounce: Seconds to wait for more events before re-listing
+            snapshot_interval: Seconds between full snapshots in the store
+            rotation: When to seal and prune store segments
+        """
+        self.inventory = inventory
+        self.output_file = output_file
+        self.reconcile_interval = reconcile_interval
+        self.debounce = debounce
+        self.snapshot_interval = snapshot_interval
+        self.rotation = rotation
+        self.images: Dict[str, List[ImageRecord]] = {}
+        self.events: Queue = Queue()
+        self.stop = threading.Event()
+
+    def _event_command(self, runtime: str) -> List[str]:
+        """Build the command that streams a runtime's image events."""
+        args = ["events", "--filter", "type=image"]
+        for event in IMAGE_EVENTS[runtime]:
+            args += ["--filter", f"event={event}"]
+        args += ["--format", EVENT_FORMATS[runtime]]
+        return self.inventory._runtime_command(runtime, args)
+
+    def _watch(self, runtime: str) -> None:
+        """Feed a runtime's image events into the queue, restarting the stream if it ends."""
+        delay = RESTART_DELAY
+        while not self.stop.is_set():
+            started = time.monotonic()
+            try:
+                for event in iter_json_lines(iter_command_output(self._event_command(runtime))):
+                    self.events.put((runtime, event))
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                print(f"{Colors.YELLOW}Warning: {runtime} event stream failed: {e}{Colors.RESET}")
+            if self.stop.is_set():
+                return
+
+            # Events may have been missed while the stream was down
+            self.events.put((runtime, None))
+            if time.monotonic() - started > MAX_RESTART_DELAY:
+                delay = RESTART_DELAY
+            print(
+                f"{Colors.YELLOW}Warning: {runtime} event stream ended; "
+                f"restarting in {delay:g}s{Colors.RESET}"
+            )
+            self.stop.wait(delay)
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+
+    def refresh(self, runtimes: Iterable[str]) -> None:
+        """
+        Re-list some runtimes and append any changes to the store.
+
+        A runtime whose listing fails keeps its previous images, so a
+        transient error is not recorded as every image being removed.
+        """
+        runtimes = set(runtimes)
+        listed: Dict[str, List[ImageRecord]] = {runtime: [] for runtime in runtimes}
+        for image in self.inventory.iter_images(runtimes):
+            listed[image.source].append(image)
+
+        for runtime, images in listed.items():
+            if runtime in self.inventory.fetch_errors:
+                print(
+                    f"{Colors.YELLOW}Warning: keeping previous {runtime} images: "
+                    f"{self.inventory.fetch_errors[runtime]}{Colors.RESET}"
+                )
+                continue
+            self.images[runtime] = images
+
+        self.inventory.save_inventory(
+            [image for images in self.images.values() for image in images],
+            self.output_file,
+            append=True,
+            output_format="jsonl",
+            incremental=True,
+            snapshot_interval=self.snapshot_interval,
+            rotation=self.rotation,
+        )
+
+    def _collect(self, first: str) -> Set[str]:
+        """Gather the runtimes touched by a burst of events starting with ``first``."""
+        runtimes = {first}
+        deadline = time.monotonic() + self.debounce
+        while not self.stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                runtime, event = self.events.get(timeout=min(remaining, LOOP_INTERVAL))
+            except Empty:
+                continue
+            runtimes.add(runtime)
+            if event is not None:
+                print(f"{Colors.BLUE}{runtime}: {describe_event(event)}{Colors.RESET}")
+        return runtimes
+
+    def handle_signal(self, signum, frame) -> None:
+        """Stop the daemon on SIGTERM or SIGINT."""
+        self.stop.set()
+
+    def run(self) -> None:
+        """Scan, then follow image events until stopped."""
+        runtimes = self.inventory._selected_runtimes()
+        self.refresh(runtimes)
+        notify(f"READY=1\nSTATUS=Watching {', '.join(runtimes)} image events")
+
+        for runtime in runtimes:
+            threading.Thread(target=self._watch, args=(runtime,), daemon=True).start()
+
+        watchdog = watchdog_interval()
+        next_ping = time.monotonic()
+        next_reconcile = time.monotonic() + self.reconcile_interval
+
+        # The event streams run in this process group, so systemd (or Ctrl-C)
+        # stops them along with the daemon
+        while not self.stop.is_set():
+            now = time.monotonic()
+            if watchdog and now >= next_ping:
+                notify("WATCHDOG=1")
+                next_ping = now + watchdog
+            if now >= next_reconcile:
+                print(f"{Colors.BLUE}Reconciling inventory{Colors.RESET}")
+                self.refresh(runtimes)
+                next_reconcile = time.monotonic() + self.reconcile_interval
+                continue
+
+            try:
+                runtime, event = self.events.get(timeout=LOOP_INTERVAL)
+            except Empty:
+                continue
+            if event is not None:
+                print(f"{Colors.BLUE}{runtime}: {describe_event(event)}{Colors.RESET}")
+            self.refresh(self._collect(runtime))
+
+        notify("STOPPING=1")
+
+
+def run_daemon(inventory: ContainerInventory, output_file: str, **kwargs) -> None:
+    """Run an inventory daemon in the foreground until SIGTERM or SIGINT."""
+    daemon = InventoryDaemon(inventory, output_file, **kwargs)
+    signal.signal(signal.SIGTERM, daemon.handle_signal)
+    signal.signal(signal.SIGINT, daemon.handle_signal)
+    daemon.run()
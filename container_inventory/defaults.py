@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Option defaults of Container Image Inventory.
+
+The modules behind the daemon, exporter, fleet, plugin, scheduling and
+vulnerability scanning options take their defaults from here, so that the
+command line can show them without importing those modules on every start.
+"""
+
+# Seconds between full reconciliation scans of the daemon
+DEFAULT_RECONCILE_INTERVAL = 60 * 60
+
+# Seconds between exporter scans
+DEFAULT_EXPORTER_INTERVAL = 300.0
+
+DEFAULT_EXPORTER_ADDRESS = ":9469"
+
+# Fleet hosts scanned at the same time
+DEFAULT_WORKERS = 8
+
+# Extra attempts for a fleet host whose scan failed or timed out
+DEFAULT_RETRIES = 2
+
+# Analyzers run at the same time
+DEFAULT_ANALYZER_WORKERS = 4
+
+# Seconds an analyzer may run before its result is given up on
+DEFAULT_ANALYZER_TIMEOUT = 60.0
+
+# Shortest and longest time between scheduled scans (10 minutes and 2 hours)
+DEFAULT_MIN_INTERVAL = 10 * 60
+DEFAULT_MAX_INTERVAL = 2 * 60 * 60
+
+# 1-minute load average per CPU above which scheduled scans are deferred
+DEFAULT_MAX_LOAD = 1.0
+
+# Command lines of the vulnerability scanners known by name; {image} is
+# replaced by the image reference (or ID) and {runtime} by 'docker' or 'podman'
+SCANNERS = {
+    "trivy": "trivy image --quiet --format json --image-src {runtime} {image}",
+    "grype": "grype {runtime}:{image} --output json --quiet",
+    "syft": "syft {runtime}:{image} --output json --quiet",
+}
+
+DEFAULT_SCANNER = "trivy"
+
+# Scanner processes run at the same time
+DEFAULT_SCAN_WORKERS = 2
+
+# Seconds a scanner process may run for one image
+DEFAULT_SCAN_TIMEOUT = 300.0
+
+# Seconds of a run that may be spent rescanning images with stale results
+DEFAULT_SCAN_BUDGET = 600.0
+
+# Age after which a cached scan result is rescanned (7 days)
+DEFAULT_SCAN_MAX_AGE = 7 * 24 * 60 * 60
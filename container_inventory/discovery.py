@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Runtime API socket discovery for Container Image Inventory.
+
+Finding a runtime's socket only needs ``os.stat``; the HTTP client in
+``socket_api`` (and the ``http.client`` stack behind it) is imported only
+once a socket has actually been found.
+"""
+
+import os
+import stat
+from typing import Optional
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+PODMAN_SOCKET = "/run/podman/podman.sock"
+
+
+class RuntimeAPIError(Exception):
+    """Raised when a runtime API request fails."""
+
+
+def _is_socket(path: str) -> bool:
+    """Check whether a path exists and is a Unix socket."""
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _unix_path(url: Optional[str]) -> Optional[str]:
+    """Extract the socket path from a ``unix://`` URL."""
+    if url and url.startswith("unix://"):
+        return url[len("unix://") :]
+    return None
+
+
+def default_socket_path(runtime: str) -> Optional[str]:
+    """
+    Locate the API socket for a runtime.
+
+    Honours ``DOCKER_HOST`` and ``CONTAINER_HOST`` when they point at a Unix
+    socket. A non-Unix host (tcp://, ssh://) returns None so the CLI, which
+    knows how to reach it, is used instead.
+
+    Args:
+        runtime: 'docker' or 'podman'
+
+    Returns:
+        Path to a listening socket, or None if none was found
+    """
+    if runtime == "docker":
+        env = os.environ.get("DOCKER_HOST")
+        candidates = [_unix_path(env)] if env else [DOCKER_SOCKET]
+    elif runtime == "podman":
+        env = os.environ.get("CONTAINER_HOST")
+        if env:
+            candidates = [_unix_path(env)]
+        else:
+            candidates = [PODMAN_SOCKET]
+            runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+            if runtime_dir:
+                candidates.append(os.path.join(runtime_dir, "podman", "podman.sock"))
+    else:
+        return None
+
+    for path in candidates:
+        if path and _is_socket(path):
+            return path
+    return None
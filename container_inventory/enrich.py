@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Inspect enrichment for Container Image Inventory.
+
+``docker images`` does not list digests, architectures or labels. The
+enrichment stage inspects images in batches (see ``image_inspect``) and
+stores the details in a persistent cache keyed by runtime and image ID.
+Image IDs are content hashes, so an image's details never change and it is
+inspected once in its lifetime: on a host whose images have not changed, a
+run is made entirely of cache hits and starts no inspect process.
+
+Whether an image is dangling depends on its current tags, so it is taken
+from the listing on every run rather than cached.
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional
+
+from container_inventory.cache import JsonCache
+from container_inventory.image_inspect import INSPECT_BATCH_SIZE, iter_inspect, short_id
+from container_inventory.models import ImageRecord
+
+# Cache file of inspect details by image
+ENRICH_CACHE = "inspect.json"
+
+# Cache entries kept, counting images no longer present
+DEFAULT_CACHE_ENTRIES = 10000
+
+
+def image_details(details: Dict) -> Dict:
+    """
+    Extract the cached fields from a docker or podman inspect result.
+
+    Returns:
+        Dictionary with ``digest``, ``architecture``, ``os`` and ``labels``
+    """
+    config = details.get("Config") or {}
+    repo_digests = details.get("RepoDigests") or []
+    digest = details.get("Digest") or ""
+    if not digest and repo_digests:
+        digest = str(repo_digests[0]).rpartition("@")[2]
+    return {
+        "digest": digest,
+        "architecture": details.get("Architecture") or "",
+        "os": details.get("Os") or "",
+        "labels": config.get("Labels") or details.get("Labels") or {},
+    }
+
+
+class ImageEnricher:
+    """Add inspect details to image records, inspecting each image only once."""
+
+    def __init__(
+        self,
+        inventory,
+        cache: Optional[JsonCache] = None,
+        max_entries: int = DEFAULT_CACHE_ENTRIES,
+        batch_size: int = INSPECT_BATCH_SIZE,
+    ):
+        """
+        Initialize the enricher.
+
+        Args:
+            inventory: ContainerInventory the images were listed from
+            cache: Cache of inspect details (default: inspect.json in the
+                cache directory)
+            max_entries: Cache size limit; images no longer present are
+                evicted, least recently seen first, once it is reached
+            batch_size: Image IDs per inspect call
+        """
+        self.inventory = inventory
+        self.cache = cache or JsonCache(ENRICH_CACHE)
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def enrich(self, images: Iterable[ImageRecord]) -> List[ImageRecord]:
+        """
+        Fill in the inspect details of image records.
+
+        Images that cannot be inspected (e.g. removed since they were
+        listed) keep empty details.
+
+        Args:
+            images: Records to enrich; they are updated in place
+
+        Returns:
+            The records, in their original order
+        """
+        images = list(images)
+        entries = self.cache.load()
+        now = int(time.time())
+
+        missing: Dict[str, Dict[str, None]] = {}
+        for image in images:
+            key = f"{image.source}:{image.id}"
+            if key in entries:
+                entries[key]["seen"] = now
+            else:
+                missing.setdefault(image.source, {})[image.id] = None
+
+        for source, image_ids in missing.items():
+            for details in iter_inspect(self.inventory, source, image_ids, self.batch_size):
+                image_id = short_id(str(details.get("Id", "")))
+                if image_id in image_ids:
+                    entries[f"{source}:{image_id}"] = dict(image_details(details), seen=now)
+
+        present = set()
+        for image in images:
+            key = f"{image.source}:{image.id}"
+            present.add(key)
+            entry = entries.get(key) or {}
+            image.digest = entry.get("digest", "")
+            image.architecture = entry.get("architecture", "")
+            image.os = entry.get("os", "")
+            image.labels = entry.get("labels", {})
+            image.dangling = image.repository == "<none>" and image.tag == "<none>"
+
+        self.misses = sum(len(image_ids) for image_ids in missing.values())
+        self.hits = len(present) - self.misses
+        self.cache.save(self._evict(entries, present))
+        return images
+
+    def _evict(self, entries: Dict[str, Dict], present: set) -> Dict[str, Dict]:
+        """Drop entries of images no longer present, oldest first, down to the size limit."""
+        if len(entries) <= self.max_entries:
+            return entries
+        absent = [key for key in entries if key not in present]
+        absent.sort(key=lambda key: entries[key].get("seen", 0))
+        for key in absent[: len(entries) - self.max_entries]:
+            del entries[key]
+        return entries
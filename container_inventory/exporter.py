@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Prometheus exporter for Container Image Inventory.
+
+The exporter rescans the inventory on a fixed interval and serves the result
+at ``/metrics`` in the Prometheus text format. Each scan renders the whole
+metrics page once into a cached snapshot; a scrape only sends that snapshot,
+so it never triggers a scan and takes the same time however many images
+there are.
+"""
+
+import signal
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from container_inventory.colors import Colors
+from container_inventory.defaults import DEFAULT_EXPORTER_ADDRESS, DEFAULT_EXPORTER_INTERVAL
+from container_inventory.models import ImageRecord
+
+# Histogram buckets, in seconds, for whole scans and single runtime listings
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRIC_PREFIX = "container_inventory"
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    Parse a listen address such as ``:9469``, ``127.0.0.1:9469`` or ``9469``.
+
+    Raises:
+        ValueError: If the port is missing or not a number
+    """
+    host, _, port = address.rpartition(":")
+    return host.strip("[]"), int(port)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Sequence[Tuple[str, str]]) -> str:
+    """Format label pairs as ``{name="value",...}``."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _split_key(key: str) -> Tuple[str, str]:
+    """Split a fetch key (``runtime`` or fleet ``host/runtime``) into host and runtime."""
+    host, _, runtime = key.rpartition("/")
+    return host, runtime
+
+
+class Histogram:
+    """A cumulative Prometheus histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def samples(self, name: str, labels: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        """Return the sample lines of the histogram."""
+        lines = [
+            f"{name}_bucket{_labels(tuple(labels) + (('le', f'{bound:g}'),))} {count}"
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f"{name}_bucket{_labels(tuple(labels) + (('le', '+Inf'),))} {self.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum:g}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+class InventoryMetrics:
+    """Metrics about inventory scans, rendered into a snapshot after each scan."""
+
+    def __init__(self):
+        self.scans = 0
+        self.scan_failures = 0
+        self.last_scan: Optional[float] = None
+        self.scan_duration = Histogram()
+        self.fetch_duration: Dict[Tuple[str, str], Histogram] = {}
+        self.fetch_errors: Dict[Tuple[str, str], int] = {}
+        self.inventory_lines: List[str] = []
+        self._lock = threading.Lock()
+        self._snapshot = self.render()
+
+    @property
+    def snapshot(self) -> bytes:
+        """The metrics page as of the last scan."""
+        with self._lock:
+            return self._snapshot
+
+    def record_scan(
+        self,
+        images: Iterable[ImageRecord],
+        duration: float,
+        fetch_durations: Dict[str, float],
+        fetch_errors: Dict[str, str],
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Record a finished scan and render a new snapshot.
+
+        Args:
+            images: Images the scan found
+            duration: Seconds the scan took
+            fetch_durations: Seconds each runtime (or fleet host/runtime) took
+            fetch_errors: Errors of the runtimes that failed
+            now: Time the scan finished (default: now)
+        """
+        self.scans += 1
+        self.last_scan = time.time() if now is None else now
+        self.scan_duration.observe(duration)
+        for key, seconds in fetch_durations.items():
+            self.fetch_duration.setdefault(_split_key(key), Histogram()).observe(seconds)
+        for key in fetch_errors:
+            split = _split_key(key)
+            self.fetch_errors[split] = self.fetch_errors.get(split, 0) + 1
+        self.inventory_lines = self._inventory_lines(images)
+        self._publish()
+
+    def record_failure(self) -> None:
+        """Record a scan that failed outright, keeping the previous inventory."""
+        self.scans += 1
+        self.scan_failures += 1
+        self._publish()
+
+    def _publish(self) -> None:
+        """Render and swap in a new snapshot."""
+        snapshot = self.render()
+        with self._lock:
+            self._snapshot = snapshot
+
+    def _inventory_lines(self, images: Iterable[ImageRecord]) -> List[str]:
+        """Render the gauges describing the images found."""
+        # Per key: references seen, their listed bytes, and the size of each image ID
+        tags: Dict[tuple, int] = {}
+        listed: Dict[tuple, int] = {}
+        ids: Dict[tuple, Dict[str, int]] = {}
+        for image in images:
+            for key in (
+                ("source", image.host, image.source),
+                ("repository", image.host, image.source, image.repository),
+            ):
+                tags[key] = tags.get(key, 0) + 1
+                listed[key] = listed.get(key, 0) + image.size
+                ids.setdefault(key, {})[image.id] = image.size
+
+        values = {
+            "images": {key: len(sizes) for key, sizes in ids.items()},
+            "tags": tags,
+            "bytes": listed,
+            "unique_bytes": {key: sum(sizes.values()) for key, sizes in ids.items()},
+        }
+        descriptions = {
+            "images": "Distinct image IDs",
+            "tags": "Image references (repository:tag rows)",
+            "bytes": "Listed bytes, counting each reference",
+            "unique_bytes": "Bytes counting each image ID once",
+        }
+
+        lines = []
+        for scope, label_names in (
+            ("source", ("host", "source")),
+            ("repository", ("host", "source", "repository")),
+        ):
+            keys = sorted(key for key in tags if key[0] == scope)
+            for metric, description in descriptions.items():
+                name = f"{METRIC_PREFIX}_{scope}_{metric}"
+                lines.append(f"# HELP {name} {description}, per {scope}.")
+                lines.append(f"# TYPE {name} gauge")
+                for key in keys:
+                    labels = tuple(zip(label_names, key[1:]))
+                    lines.append(f"{name}{_labels(labels)} {values[metric][key]}")
+        return lines
+
+    def render(self) -> bytes:
+        """Render the metrics page."""
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_scans_total Inventory scans run.",
+            f"# TYPE {p}_scans_total counter",
+            f"{p}_scans_total {self.scans}",
+            f"# HELP {p}_scan_failures_total Inventory scans that failed outright.",
+            f"# TYPE {p}_scan_failures_total counter",
+            f"{p}_scan_failures_total {self.scan_failures}",
+        ]
+        if self.last_scan is not None:
+            lines += [
+                f"# HELP {p}_last_scan_timestamp_seconds When the last scan finished.",
+                f"# TYPE {p}_last_scan_timestamp_seconds gauge",
+                f"{p}_last_scan_timestamp_seconds {self.last_scan:.3f}",
+            ]
+
+        lines += [
+            f"# HELP {p}_scan_duration_seconds Time taken by inventory scans.",
+            f"# TYPE {p}_scan_duration_seconds histogram",
+        ]
+        lines += self.scan_duration.samples(f"{p}_scan_duration_seconds")
+
+        lines += [
+            f"# HELP {p}_fetch_duration_seconds Time taken to list each runtime's images.",
+            f"# TYPE {p}_fetch_duration_seconds histogram",
+        ]
+        for (host, runtime), histogram in sorted(self.fetch_duration.items()):
+            labels = (("host", host), ("runtime", runtime))
+            lines += histogram.samples(f"{p}_fetch_duration_seconds", labels)
+
+        lines += [
+            f"# HELP {p}_fetch_errors_total Runtime listings that failed or timed out.",
+            f"# TYPE {p}_fetch_errors_total counter",
+        ]
+        for (host, runtime), count in sorted(self.fetch_errors.items()):
+            labels = (("host", host), ("runtime", runtime))
+            lines.append(f"{p}_fetch_errors_total{_labels(labels)} {count}")
+
+        lines += self.inventory_lines
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def http_server(address: Tuple[str, int], handler):
+    """Create an HTTP server handling each request in its own thread."""
+    # http.server is only imported when a server is started
+    import http.server
+    import socketserver
+
+    class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    return ThreadingHTTPServer(address, handler)
+
+
+def _handler(metrics: InventoryMetrics):
+    """Build a request handler class serving a metrics snapshot."""
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.partition("?")[0] == "/metrics":
+                body, content_type, status = metrics.snapshot, CONTENT_TYPE, 200
+            elif self.path == "/":
+                body = b'<html><body><a href="/metrics">Metrics</a></body></html>\n'
+                content_type, status = "text/html", 200
+            else:
+                body, content_type, status = b"Not found\n", "text/plain", 404
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood the journal
+
+    return MetricsHandler
+
+
+class InventoryExporter:
+    """Rescan an inventory periodically and serve the metrics over HTTP."""
+
+    def __init__(
+        self,
+        inventory,
+        address: str = DEFAULT_EXPORTER_ADDRESS,
+        interval: float = DEFAULT_EXPORTER_INTERVAL,
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            inventory: ContainerInventory (or FleetInventory) to scan
+            address: Listen address, ``[HOST]:PORT``
+            interval: Seconds between scans
+        """
+        self.inventory = inventory
+        self.interval = interval
+        self.metrics = InventoryMetrics()
+        self.server = http_server(parse_address(address), _handler(self.metrics))
+        self.stop = threading.Event()
+
+    def scan(self) -> None:
+        """Scan the inventory once and update the metrics snapshot."""
+        start = time.monotonic()
+        try:
+            images = self.inventory.get_images()
+        except Exception as e:
+            print(f"{Colors.BOLD}{Colors.RED}Error scanning inventory:{Colors.RESET} {e}")
+            self.metrics.record_failure()
+            return
+        self.metrics.record_scan(
+            images,
+            time.monotonic() - start,
+            self.inventory.fetch_durations,
+            self.inventory.fetch_errors,
+        )
+
+    def handle_signal(self, signum, frame) -> None:
+        """Stop the exporter on SIGTERM or SIGINT."""
+        self.stop.set()
+
+    def run(self) -> None:
+        """Serve metrics and rescan until stopped."""
+        host, port = self.server.server_address[:2]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"{Colors.GREEN}Serving metrics on http://{host}:{port}/metrics{Colors.RESET}")
+        try:
+            while not self.stop.is_set():
+                self.scan()
+                self.stop.wait(self.interval)
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def run_exporter(inventory, address: str, interval: float) -> None:
+    """Run a metrics exporter in the foreground until SIGTERM or SIGINT."""
+    exporter = InventoryExporter(inventory, address, interval)
+    signal.signal(signal.SIGTERM, exporter.handle_signal)
+    signal.signal(signal.SIGINT, exporter.handle_signal)
+    exporter.run()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Fleet scanning for Container Image Inventory.
+
+A fleet inventory scans many targets (see ``container_inventory.targets``)
+with a fixed number of worker threads and merges their images into one
+inventory, each record tagged with the host it came from. Every target is
+bounded by the per-runtime timeout and retried with exponential backoff; a
+target that still fails contributes whatever its last attempt returned and
+is recorded in ``fetch_errors`` under ``host/runtime``. Finished hosts wait
+in a bounded queue, so workers stop picking up new targets while the
+consumer falls behind.
+"""
+
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from container_inventory.colors import Colors
+from container_inventory.core import DEFAULT_TIMEOUT, ContainerInventory
+from container_inventory.defaults import DEFAULT_RETRIES, DEFAULT_WORKERS
+from container_inventory.models import ImageRecord
+
+if TYPE_CHECKING:
+    from container_inventory.targets import Target
+
+# Seconds before the first retry; doubled for each further retry
+DEFAULT_BACKOFF = 1.0
+
+
+class FleetInventory(ContainerInventory):
+    """Inventory container images across a fleet of hosts."""
+
+    def __init__(
+        self,
+        targets: Iterable["Target"],
+        timeout: Union[float, Dict[str, float]] = DEFAULT_TIMEOUT,
+        workers: int = DEFAULT_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        """
+        Initialize the fleet inventory.
+
+        Args:
+            targets: Runtime endpoints to scan
+            timeout: Seconds to wait for each target, or a mapping of runtime
+                name to seconds
+            workers: Number of targets scanned at the same time
+            retries: Extra attempts for a target that fails
+            backoff: Seconds before the first retry, doubled on each retry
+        """
+        self.targets = list(targets)
+        self.workers = max(1, workers)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        # Attempts per ``host/runtime`` in the most recent scan
+        self.host_attempts: Dict[str, int] = {}
+        super().__init__("all", timeout=timeout)
+
+    def _runtime_available(self, runtime: str) -> bool:
+        """Runtimes are reached through the targets, not probed locally."""
+        return True
+
+    def _scan_target(
+        self, target: "Target", stop: threading.Event
+    ) -> Tuple[List[ImageRecord], Dict[str, str], int]:
+        """
+        Scan one target, retrying with exponential backoff on failure.
+
+        Returns:
+            The images of the last attempt, its runtime errors and the
+            number of attempts made
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            inventory = ContainerInventory(timeout=self.timeout, target=target)
+            images = inventory.get_images()
+            errors = inventory.fetch_errors
+            if not errors or attempt > self.retries:
+                return images, errors, attempt
+            delay = self.backoff * 2 ** (attempt - 1)
+            print(
+                f"{Colors.YELLOW}Warning: {target.name} failed ({'; '.join(errors.values())}); "
+                f"retrying in {delay:g}s{Colors.RESET}"
+            )
+            if stop.wait(delay):
+                return images, errors, attempt
+
+    def _worker(self, pending: Queue, results: Queue, stop: threading.Event) -> None:
+        """Scan targets from ``pending`` until it is empty, putting results on ``results``."""
+        while not stop.is_set():
+            try:
+                target = pending.get_nowait()
+            except Empty:
+                return
+
+            start = time.monotonic()
+            try:
+                images, errors, attempts = self._scan_target(target, stop)
+            except Exception as e:
+                images, errors, attempts = [], {target.runtime: str(e)}, 1
+            result = (target, images, errors, attempts, time.monotonic() - start)
+
+            # Block while the consumer catches up, but give up once it has gone
+            while not stop.is_set():
+                try:
+                    results.put(result, timeout=0.1)
+                    break
+                except Full:
+                    continue
+
+    def iter_images(self, runtimes: Optional[Iterable[str]] = None) -> Iterator[ImageRecord]:
+        """
+        Stream images from every target, one host at a time, as hosts finish.
+
+        Each record is tagged with its target's name in ``host``.
+
+        Args:
+            runtimes: Only scan targets of these runtimes (all if None)
+        """
+        self.host_attempts = {}
+        self.fetch_durations = {}
+        self.fetch_errors = {}
+        targets = [t for t in self.targets if runtimes is None or t.runtime in runtimes]
+        if not targets:
+            return
+
+        pending: Queue = Queue()
+        for target in targets:
+            pending.put(target)
+        results: Queue = Queue(maxsize=self.workers)
+        stop = threading.Event()
+
+        workers = min(self.workers, len(targets))
+        for _ in range(workers):
+            threading.Thread(
+                target=self._worker, args=(pending, results, stop), daemon=True
+            ).start()
+
+        try:
+            for _ in targets:
+                target, images, errors, attempts, duration = results.get()
+                key = f"{target.name}/{target.runtime}"
+                self.host_attempts[key] = attempts
+                self.fetch_durations[key] = duration
+                if errors:
+                    self.fetch_errors[key] = "; ".join(errors.values())
+                yield from images
+        finally:
+            stop.set()
+
+    def get_images(self) -> List[ImageRecord]:
+        """Get a list of images from every target, grouped by target in the given order."""
+        by_target: Dict[Tuple[str, str], List[ImageRecord]] = {
+            (target.name, target.runtime): [] for target in self.targets
+        }
+        for image in self.iter_images():
+            by_target[(image.host, image.source)].append(image)
+        return [image for images in by_target.values() for image in images]
+
+    def summary(self) -> Optional[str]:
+        """Describe the hosts that failed in the most recent scan, if any."""
+        if not self.fetch_errors:
+            return None
+        failed = ", ".join(sorted(self.fetch_errors))
+        return f"{len(self.fetch_errors)} of {len(self.targets)} targets failed: {failed}"
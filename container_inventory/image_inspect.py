@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Batched image inspection for Container Image Inventory.
+
+Image details beyond what ``docker images`` lists come from ``image
+inspect``. Over the runtime's API socket each image is one request on the
+pooled keep-alive connection; through the CLI many IDs are passed to a single
+``docker image inspect`` / ``podman image inspect`` call, so a scan forks one
+process per batch rather than one per image.
+"""
+
+import json
+import subprocess
+from typing import Dict, Iterable, Iterator, List
+
+from container_inventory.colors import Colors
+from container_inventory.discovery import RuntimeAPIError
+from container_inventory.models import parse_size
+from container_inventory.streaming import iter_command_output, iter_json_array, iter_json_lines
+
+# Image IDs passed to one 'image inspect' command
+INSPECT_BATCH_SIZE = 200
+
+HISTORY_FORMATS = {
+    "docker": ["--human=false", "--format", "{{json .}}"],
+    "podman": ["--format", "json"],
+}
+
+
+def short_id(image_id: str) -> str:
+    """Reduce an inspect ``Id`` to the 12 character form the listing uses."""
+    if image_id.startswith("sha256:"):
+        image_id = image_id[len("sha256:") :]
+    return image_id[:12]
+
+
+def _batches(items: List[str], size: int) -> Iterator[List[str]]:
+    """Split a list into consecutive batches."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def iter_inspect(
+    inventory, runtime: str, image_ids: Iterable[str], batch_size: int = INSPECT_BATCH_SIZE
+) -> Iterator[Dict]:
+    """
+    Inspect images of one runtime.
+
+    Images removed since they were listed are skipped with a warning.
+
+    Args:
+        inventory: ContainerInventory whose runtime is inspected
+        runtime: 'docker' or 'podman'
+        image_ids: IDs of the images to inspect
+        batch_size: IDs per CLI call
+
+    Yields:
+        Inspect results, as returned by the runtime
+    """
+    remaining = list(dict.fromkeys(image_ids))
+    client = inventory._api_client(runtime)
+    if client is not None:
+        try:
+            while remaining:
+                yield client.inspect_image(remaining[0])
+                remaining.pop(0)
+            return
+        except RuntimeAPIError as e:
+            print(f"{Colors.YELLOW}Warning: {e}; falling back to {runtime} CLI{Colors.RESET}")
+
+    for batch in _batches(remaining, batch_size):
+        argv = inventory._runtime_command(runtime, ["image", "inspect"] + batch)
+        try:
+            # Images found are printed even if others in the batch are gone
+            yield from iter_json_array(
+                iter_command_output(argv, timeout=inventory._runtime_timeout(runtime))
+            )
+        except subprocess.CalledProcessError as e:
+            print(
+                f"{Colors.YELLOW}Warning: {runtime} image inspect failed: "
+                f"{str(e.stderr).strip()}{Colors.RESET}"
+            )
+        except subprocess.TimeoutExpired as e:
+            print(
+                f"{Colors.YELLOW}Warning: {runtime} image inspect timed out after "
+                f"{e.timeout:g}s{Colors.RESET}"
+            )
+        except json.JSONDecodeError:
+            print(f"{Colors.YELLOW}Warning: could not parse {runtime} inspect output{Colors.RESET}")
+
+
+def image_history(inventory, runtime: str, image_id: str) -> List[Dict]:
+    """
+    Return an image's build steps, oldest first, each with an integer ``Size``.
+
+    Raises:
+        RuntimeAPIError, subprocess.SubprocessError, ValueError: If the
+            history could not be read
+    """
+    client = inventory._api_client(runtime)
+    steps = None
+    if client is not None:
+        try:
+            steps = client.image_history(image_id)
+        except RuntimeAPIError as e:
+            print(f"{Colors.YELLOW}Warning: {e}; falling back to {runtime} CLI{Colors.RESET}")
+
+    if steps is None:
+        argv = inventory._runtime_command(
+            runtime, ["history", "--no-trunc"] + HISTORY_FORMATS[runtime] + [image_id]
+        )
+        lines = iter_command_output(argv, timeout=inventory._runtime_timeout(runtime))
+        steps = list(iter_json_array(lines) if runtime == "podman" else iter_json_lines(lines))
+
+    history = []
+    for step in reversed(steps):
+        step = dict(step)
+        step["Size"] = parse_size(step.get("Size", step.get("size", 0)))
+        history.append(step)
+    return history
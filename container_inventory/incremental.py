@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Incremental scans for Container Image Inventory.
+
+A compact state index of the previous scan, keyed by image host, source and ID,
+is kept next to the output store. Each scan is compared against it and only
+the differences are written as delta records:
+
+- ``added``: every row of an image that was not in the previous scan
+- ``retagged``: every current row of an image whose tags changed
+- ``removed``: one row per tag of an image that is no longer present
+
+A full ``snapshot`` of every image is written periodically, so history can be
+rebuilt without replaying every delta since the first scan.
+"""
+
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds between full snapshots
+DEFAULT_SNAPSHOT_INTERVAL = 24 * 60 * 60
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_RETAGGED = "retagged"
+CHANGE_SNAPSHOT = "snapshot"
+
+
+def state_path(output_file: str) -> str:
+    """Return the path of the state index kept for an output file."""
+    return f"{output_file}.state"
+
+
+def image_key(image: Dict) -> str:
+    """Return the state index key for an image row (``[host@]source:ID``)."""
+    key = f"{image.get('source', '')}:{image.get('ID', '')}"
+    host = image.get("host")
+    return f"{host}@{key}" if host else key
+
+
+def split_key(key: str) -> Tuple[str, str, str]:
+    """Split a state index key into its host, source and image ID."""
+    rest, _, image_id = key.rpartition(":")
+    host, _, source = rest.rpartition("@")
+    return host, source, image_id
+
+
+def image_ref(image: Dict) -> str:
+    """Return the repository:tag reference of an image row."""
+    return f"{image.get('Repository', '<none>')}:{image.get('Tag', '<none>')}"
+
+
+def index_images(images: List[Dict]) -> Dict[str, List[str]]:
+    """Build the state index (key -> sorted references) for a scan."""
+    index: Dict[str, List[str]] = {}
+    for image in images:
+        index.setdefault(image_key(image), []).append(image_ref(image))
+    return {key: sorted(set(refs)) for key, refs in index.items()}
+
+
+def diff_images(
+    previous: Dict[str, List[str]],
+    images: List[Dict],
+    failed: Iterable[Tuple[str, str]] = (),
+) -> Tuple[List[Dict], Dict[str, List[str]]]:
+    """
+    Compare a scan against the previous state index.
+
+    A runtime whose listing failed may have reported only some of its
+    images, so its rows are ignored: it gets no delta records and keeps its
+    previous state index entries, rather than having every image recorded as
+    removed (and added again by the next good scan).
+
+    Args:
+        previous: State index of the previous scan
+        images: Image rows of the current scan
+        failed: (host, source) pairs of the runtimes whose listing failed;
+            the host is empty for local runtimes
+
+    Returns:
+        The delta records and the state index of the current scan
+    """
+    failed = set(failed)
+    if failed:
+        images = [i for i in images if (i.get("host", ""), i.get("source", "")) not in failed]
+    current = index_images(images)
+    deltas = []
+
+    for image in images:
+        key = image_key(image)
+        if key not in previous:
+            deltas.append(dict(image, change=CHANGE_ADDED))
+        elif previous[key] != current[key]:
+            deltas.append(dict(image, change=CHANGE_RETAGGED))
+
+    for key, refs in previous.items():
+        if key in current:
+            continue
+        host, source, image_id = split_key(key)
+        if (host, source) in failed:
+            current[key] = refs
+            continue
+        for ref in refs:
+            repository, _, tag = ref.rpartition(":")
+            delta = {"Repository": repository, "Tag": tag, "ID": image_id, "source": source}
+            if host:
+                delta["host"] = host
+            delta["change"] = CHANGE_REMOVED
+            deltas.append(delta)
+
+    return deltas, current
+
+
+class ScanState:
+    """State index of the previous scan, persisted as compact JSON."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the state.
+
+        Args:
+            path: Path to the state index file
+        """
+        self.path = path
+        self.images: Dict[str, List[str]] = {}
+        self.snapshot_at = 0.0
+        self.loaded = False
+
+    def load(self) -> bool:
+        """
+        Load the state index from disk.
+
+        Returns:
+            True if a usable state index was found
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.images = dict(data["images"])
+            self.snapshot_at = float(data["snapshot_at"])
+            self.loaded = True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.images = {}
+            self.snapshot_at = 0.0
+            self.loaded = False
+        return self.loaded
+
+    def save(self) -> None:
+        """Atomically write the state index to disk."""
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"snapshot_at": self.snapshot_at, "images": self.images},
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+
+    def snapshot_due(self, interval: float, now: Optional[float] = None) -> bool:
+        """Check whether a full snapshot should be written."""
+        if not self.loaded:
+            return True
+        now = time.time() if now is None else now
+        return now - self.snapshot_at >= interval
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+SQLite query index for Container Image Inventory history.
+
+Every record ``save_inventory`` writes to the JSON Lines store is also
+inserted into a SQLite database next to the output file (``<output>.db``),
+indexed by image ID, repository and tag, source, host and scan timestamp, so
+lookups and time range queries do not have to read the whole history. The
+database runs in WAL mode, so queries can run while a scan is being recorded.
+A new index starts with the history already in the store. 'json' array files
+are only indexed once ``query`` has built their index, which later saves then
+keep current.
+
+The index is derived data: a scan is committed to it only after the store
+write succeeded, indexing errors never fail a save, and the whole index can
+be rebuilt from the store at any time.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from container_inventory.colors import Colors
+from container_inventory.models import ImageRecord
+from container_inventory.store import LEGACY_SCAN_ID, InventoryStore, is_legacy_file, utc_timestamp
+
+# Rows inserted per executemany call while a scan streams through
+INSERT_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    records INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    scan_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    host TEXT NOT NULL,
+    source TEXT NOT NULL,
+    image_id TEXT NOT NULL,
+    repository TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    created INTEGER,
+    size INTEGER NOT NULL,
+    change TEXT
+);
+CREATE INDEX IF NOT EXISTS records_image_id ON records (image_id, timestamp);
+CREATE INDEX IF NOT EXISTS records_reference ON records (repository, tag, timestamp);
+CREATE INDEX IF NOT EXISTS records_timestamp ON records (timestamp);
+CREATE INDEX IF NOT EXISTS records_source ON records (source, timestamp);
+CREATE INDEX IF NOT EXISTS records_host ON records (host, timestamp);
+CREATE INDEX IF NOT EXISTS records_scan ON records (scan_id);
+"""
+
+RECORD_COLUMNS = (
+    "scan_id",
+    "timestamp",
+    "host",
+    "source",
+    "image_id",
+    "repository",
+    "tag",
+    "created",
+    "size",
+    "change",
+)
+
+INSERT_RECORD = (
+    f"INSERT INTO records ({', '.join(RECORD_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(RECORD_COLUMNS))})"
+)
+
+_RELATIVE_TIME = re.compile(r"^(\d+)([smhdw])$")
+_RELATIVE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_TIME_FORMATS = ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+def index_path(output_file: str) -> str:
+    """Return the path of the query index kept for an output file."""
+    return f"{output_file}.db"
+
+
+def parse_time(value: str, now: Optional[datetime.datetime] = None) -> str:
+    """
+    Parse an absolute or relative time into a store timestamp.
+
+    Args:
+        value: ISO 8601 date or time (UTC), or an age such as ``7d`` or ``12h``
+        now: Reference time for ages (default: now)
+
+    Returns:
+        The time as an ISO 8601 UTC timestamp
+
+    Raises:
+        ValueError: If the value is not understood
+    """
+    value = value.strip()
+    match = _RELATIVE_TIME.match(value)
+    if match:
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        seconds = int(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+        return utc_timestamp(now - datetime.timedelta(seconds=seconds))
+
+    for time_format in _TIME_FORMATS:
+        try:
+            return utc_timestamp(datetime.datetime.strptime(value, time_format))
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized time: {value!r}")
+
+
+def _image_id(value: str) -> str:
+    """Reduce an image ID or digest to the stored 12 character form."""
+    if value.startswith("sha256:"):
+        value = value[len("sha256:") :]
+    return value[:12]
+
+
+def _record_row(image, scan_id: str, timestamp: str) -> Tuple:
+    """Convert an image record or stored dictionary to an index row."""
+    record = image if isinstance(image, ImageRecord) else ImageRecord.from_dict(image)
+    change = None if isinstance(image, ImageRecord) else image.get("change")
+    return (
+        scan_id,
+        timestamp,
+        record.host,
+        record.source,
+        record.id,
+        record.repository,
+        record.tag,
+        record.created,
+        record.size,
+        change,
+    )
+
+
+def open_index(
+    output_file: str, create: bool = True, replace: bool = False
+) -> Optional["InventoryIndex"]:
+    """
+    Open the query index of an output file to record a scan appended to it.
+
+    A missing index is filled with the records already in the output file
+    first, so it holds the whole history and not just the scans saved since.
+    If that fails the half-built index is removed (``query`` rebuilds it
+    later) and nothing is recorded.
+
+    Args:
+        output_file: Inventory file the scan is written to
+        create: Create the index if it does not exist yet
+        replace: The scan replaces the file's contents (no history to add)
+
+    Returns:
+        The index, or None if the scan is not to be indexed
+    """
+    path = index_path(output_file)
+    if os.path.exists(path):
+        return InventoryIndex(path)
+    if not create:
+        return None
+
+    index = InventoryIndex(path)
+    if not replace and os.path.exists(output_file):
+        try:
+            index.rebuild(output_file)
+        except (sqlite3.Error, IOError, ValueError) as e:
+            print(f"{Colors.YELLOW}Warning: could not index {output_file}: {e}{Colors.RESET}")
+            index.close()
+            for leftover in (path, f"{path}-wal", f"{path}-shm"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(leftover)
+            return None
+    return index
+
+
+class ScanRecorder:
+    """
+    Insert the records of one scan as they stream past, in one transaction.
+
+    The scan becomes visible when ``commit`` is called after the store write
+    succeeded; ``rollback`` discards it. Indexing errors are reported and
+    leave the index without the scan, but are never raised. A recorder
+    without an index passes records through untouched.
+    """
+
+    def __init__(
+        self,
+        index: Optional["InventoryIndex"],
+        scan_id: str,
+        timestamp: str,
+        replace: bool = False,
+    ):
+        """
+        Initialize the recorder and open its transaction.
+
+        Args:
+            index: Index to record into (None to record nothing)
+            scan_id: Identifier the store stamps the scan with
+            timestamp: Timestamp the store stamps the scan with
+            replace: Drop everything already indexed (the store is rewritten)
+        """
+        self.index = index
+        self.scan_id = scan_id
+        self.timestamp = timestamp
+        self.count = 0
+        self.active = index is not None
+        self._batch: List[Tuple] = []
+        if index is None:
+            return
+        try:
+            conn = index.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            if replace:
+                conn.execute("DELETE FROM records")
+                conn.execute("DELETE FROM scans")
+        except sqlite3.Error as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception) -> None:
+        """Stop recording, abandoning the transaction."""
+        print(
+            f"{Colors.YELLOW}Warning: could not update index {self.index.path}: "
+            f"{error}{Colors.RESET}"
+        )
+        self.active = False
+        self._batch = []
+        self.index.close()
+
+    def _flush(self) -> None:
+        """Insert the buffered rows."""
+        if self._batch and self.active:
+            try:
+                self.index.connect().executemany(INSERT_RECORD, self._batch)
+            except sqlite3.Error as e:
+                self._fail(e)
+        self._batch = []
+
+    def observe(self, images: Iterable) -> Iterator:
+        """Record images as they pass through to the store."""
+        if not self.active:
+            yield from images
+            return
+        for image in images:
+            if self.active:
+                self._batch.append(_record_row(image, self.scan_id, self.timestamp))
+                self.count += 1
+                if len(self._batch) >= INSERT_BATCH_SIZE:
+                    self._flush()
+            yield image
+        self._flush()
+
+    def commit(self) -> None:
+        """Make the recorded scan visible and close the index."""
+        self._flush()
+        if not self.active:
+            return
+        try:
+            conn = self.index.connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO scans (scan_id, timestamp, records) VALUES (?, ?, ?)",
+                (self.scan_id, self.timestamp, self.count),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._fail(e)
+            return
+        self.active = False
+        self.index.close()
+
+    def rollback(self) -> None:
+        """Discard the recorded scan and close the index."""
+        if self.active:
+            with contextlib.suppress(sqlite3.Error):
+                self.index.connect().execute("ROLLBACK")
+            self.active = False
+            self.index.close()
+
+
+class InventoryIndex:
+    """SQLite index over the records of an inventory store."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the index.
+
+        Args:
+            path: Path to the SQLite database
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, creating the schema on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def begin_scan(self, scan_id: str, timestamp: str, replace: bool = False) -> ScanRecorder:
+        """Start recording a scan; see ScanRecorder."""
+        return ScanRecorder(self, scan_id, timestamp, replace)
+
+    def rebuild(self, store_path: str) -> int:
+        """
+        Rebuild the index from an inventory store.
+
+        Sealed segments are read along with the active file. A legacy JSON
+        array file is indexed as a single scan stamped with its modification
+        time.
+
+        Returns:
+            Number of records indexed
+        """
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM records")
+            conn.execute("DELETE FROM scans")
+            if is_legacy_file(store_path):
+                with open(store_path) as f:
+                    existing = json.load(f)
+                mtime = datetime.datetime.fromtimestamp(
+                    os.path.getmtime(store_path), datetime.timezone.utc
+                )
+                timestamp = utc_timestamp(mtime)
+                records = (
+                    dict(image, scan_id=LEGACY_SCAN_ID, timestamp=timestamp)
+                    for image in existing
+                    if isinstance(image, dict)
+                )
+            else:
+                records = InventoryStore(store_path).iter_records()
+
+            scans: Dict[str, List] = {}
+            batch = []
+            for record in records:
+                scan_id = record.get("scan_id", LEGACY_SCAN_ID)
+                timestamp = record.get("timestamp", "")
+                batch.append(_record_row(record, scan_id, timestamp))
+                scan = scans.setdefault(scan_id, [timestamp, 0])
+                scan[1] += 1
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    conn.executemany(INSERT_RECORD, batch)
+                    batch = []
+            if batch:
+                conn.executemany(INSERT_RECORD, batch)
+            conn.executemany(
+                "INSERT OR REPLACE INTO scans (scan_id, timestamp, records) VALUES (?, ?, ?)",
+                [(scan_id, ts, count) for scan_id, (ts, count) in scans.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return sum(count for _, count in scans.values())
+
+    def prune(self, before: str) -> int:
+        """
+        Drop records and scans older than a timestamp, e.g. after the store
+        segments holding them were deleted.
+
+        Returns:
+            Number of records dropped
+        """
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            dropped = conn.execute("DELETE FROM records WHERE timestamp < ?", (before,)).rowcount
+            conn.execute("DELETE FROM scans WHERE timestamp < ?", (before,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return dropped
+
+    def _where(
+        self,
+        image_id: Optional[str] = None,
+        repository: Optional[str] = None,
+        tag: Optional[str] = None,
+        source: Optional[str] = None,
+        host: Optional[str] = None,
+        scan_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Tuple[str, List]:
+        """Build a WHERE clause and its parameters from query filters."""
+        clauses = []
+        params: List = []
+        prefix = _image_id(image_id or "")
+        if prefix:
+            # Prefix match on the indexed column, as a range so the index is used
+            clauses.append("image_id >= ? AND image_id < ?")
+            params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        for column, value in (
+            ("repository", repository),
+            ("tag", tag),
+            ("source", source),
+            ("host", host),
+            ("scan_id", scan_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, limit: Optional[int] = None, **filters) -> Iterator[Dict]:
+        """
+        Find indexed records, oldest first.
+
+        Args:
+            limit: Return at most this many records
+            **filters: ``image_id`` (prefix), ``repository``, ``tag``,
+                ``source``, ``host``, ``scan_id``, and ``since``/``until``
+                timestamps
+
+        Yields:
+            Record dictionaries
+        """
+        where, params = self._where(**filters)
+        sql = f"SELECT {', '.join(RECORD_COLUMNS)} FROM records{where} ORDER BY timestamp"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for row in self.connect().execute(sql, params):
+            yield dict(row)
+
+    def first_seen(self, **filters) -> Iterator[Dict]:
+        """
+        Find when each matching image ID was first recorded.
+
+        Yields:
+            Dictionaries with ``image_id``, ``first_seen``, the number of
+            ``records``, and the ``repository``, ``tag``, ``source`` and
+            ``host`` of the earliest record
+        """
+        where, params = self._where(**filters)
+        # With a single MIN(), SQLite takes the bare columns from the earliest row
+        sql = (
+            "SELECT image_id, MIN(timestamp) AS first_seen, COUNT(*) AS records, "
+            f"repository, tag, source, host FROM records{where} "
+            "GROUP BY image_id ORDER BY first_seen"
+        )
+        for row in self.connect().execute(sql, params):
+            yield dict(row)
+
+    def hosts(self, **filters) -> Iterator[Dict]:
+        """
+        Summarize which hosts and runtimes had matching records.
+
+        Yields:
+            Dictionaries with ``host``, ``source``, ``first_seen``,
+            ``last_seen`` and ``records``
+        """
+        where, params = self._where(**filters)
+        sql = (
+            "SELECT host, source, MIN(timestamp) AS first_seen, MAX(timestamp) AS last_seen, "
+            f"COUNT(*) AS records FROM records{where} GROUP BY host, source ORDER BY host, source"
+        )
+        for row in self.connect().execute(sql, params):
+            yield dict(row)
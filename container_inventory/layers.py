@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Layer-level size accounting for Container Image Inventory.
+
+The ``Size`` listed for each image counts every layer of the image, so layers
+shared between images are counted once per image. The layer scan collects
+each image's layer digests with batched ``image inspect`` calls, builds a
+layer -> images index per runtime, and splits each image's (and each
+repository's) size into bytes no other image uses and bytes it shares.
+
+Inspect does not report layer sizes, so they are taken from the image
+history, whose non-empty steps line up with the layers. Layer digests are
+content hashes, so their sizes are cached by digest and the history is only
+read for images with layers not seen before.
+"""
+
+import subprocess
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from container_inventory.cache import JsonCache
+from container_inventory.colors import Colors
+from container_inventory.discovery import RuntimeAPIError
+from container_inventory.image_inspect import (
+    INSPECT_BATCH_SIZE,
+    image_history,
+    iter_inspect,
+    short_id,
+)
+from container_inventory.models import ImageRecord
+
+# Cache file of layer sizes by digest
+LAYER_CACHE = "layers.json"
+
+
+def layer_sizes(layers: List[str], history: List[Dict], image_size: int) -> Dict[str, int]:
+    """
+    Match an image's layers, base first, with its history steps, oldest first.
+
+    Steps that added no bytes are usually metadata-only (``ENV``, ``CMD``)
+    and have no layer. If the counts still disagree (a step produced an
+    empty layer), the newest steps are matched with the newest layers and
+    any older layers left over are taken as empty.
+
+    Args:
+        layers: Layer digests from ``RootFS.Layers``
+        history: Steps from ``image_history``
+        image_size: Listed image size, used when the history is unavailable
+
+    Returns:
+        Size in bytes of each layer
+    """
+    if not layers:
+        return {}
+    sizes = {layer: 0 for layer in layers}
+    if not history:
+        # Without a history, attribute the whole image to its top layer
+        sizes[layers[-1]] = image_size
+        return sizes
+    steps = [step["Size"] for step in history if step.get("Size")]
+    for layer, size in zip(reversed(layers), reversed(steps)):
+        sizes[layer] = size
+    return sizes
+
+
+class LayerIndex:
+    """Which images use which layers, per runtime, and what that costs."""
+
+    def __init__(self):
+        self.sizes: Dict[str, int] = {}
+        self.layers: Dict[Tuple[str, str], List[str]] = {}
+        self.users: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+
+    def add_image(self, source: str, image_id: str, layers: Dict[str, int]) -> None:
+        """
+        Record an image's layers.
+
+        Args:
+            source: Runtime whose storage holds the image
+            image_id: Short image ID
+            layers: Size of each layer, base first
+        """
+        self.layers[(source, image_id)] = list(layers)
+        for layer, size in layers.items():
+            self.sizes[layer] = size
+            self.users[(source, layer)].add(image_id)
+
+    def _usage(self, source: str, image_ids: Set[str]) -> Dict[str, int]:
+        """Split the bytes of a group of images into unique and shared."""
+        layers = {
+            layer for image_id in image_ids for layer in self.layers.get((source, image_id), [])
+        }
+        unique = shared = 0
+        for layer in layers:
+            if self.users[(source, layer)] <= image_ids:
+                unique += self.sizes[layer]
+            else:
+                shared += self.sizes[layer]
+        return {"size": unique + shared, "unique": unique, "shared": shared}
+
+    def image_usage(self, source: str, image_id: str) -> Dict[str, int]:
+        """
+        Return an image's ``size`` (sum of its layers), ``unique`` bytes used
+        by no other image, and ``shared`` bytes.
+        """
+        return self._usage(source, {image_id})
+
+    def repository_usage(self, images: Iterable[ImageRecord]) -> List[Dict]:
+        """
+        Summarize layer usage per repository and runtime.
+
+        A layer counts as unique to a repository if only images of that
+        repository use it.
+
+        Returns:
+            Dictionaries with ``repository``, ``source``, ``images``,
+            ``size``, ``unique`` and ``shared``, largest first
+        """
+        groups: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        for image in images:
+            if (image.source, image.id) in self.layers:
+                groups[(image.repository, image.source)].add(image.id)
+
+        rows = []
+        for (repository, source), image_ids in groups.items():
+            row = {"repository": repository, "source": source, "images": len(image_ids)}
+            row.update(self._usage(source, image_ids))
+            rows.append(row)
+        return sorted(rows, key=lambda row: (-row["size"], row["repository"]))
+
+    def totals(self) -> Dict[str, int]:
+        """
+        Return the ``listed`` bytes (each image's layers counted per image)
+        and the ``deduplicated`` bytes actually stored, over all runtimes.
+        """
+        listed = sum(self.sizes[layer] for layers in self.layers.values() for layer in layers)
+        deduplicated = sum(self.sizes[layer] for _, layer in self.users)
+        return {"listed": listed, "deduplicated": deduplicated}
+
+
+class LayerScanner:
+    """Collect the layers of scanned images into a LayerIndex."""
+
+    def __init__(
+        self,
+        inventory,
+        cache: Optional[JsonCache] = None,
+        batch_size: int = INSPECT_BATCH_SIZE,
+    ):
+        """
+        Initialize the scanner.
+
+        Args:
+            inventory: ContainerInventory the images were listed from
+            cache: Cache of layer sizes by digest (default: layers.json in
+                the cache directory)
+            batch_size: Image IDs per inspect call
+        """
+        self.inventory = inventory
+        self.cache = cache or JsonCache(LAYER_CACHE)
+        self.batch_size = batch_size
+        self.images: List[ImageRecord] = []
+
+    def observe(self, images: Iterable[ImageRecord]) -> Iterator[ImageRecord]:
+        """Remember images as they stream past, to scan once the listing is done."""
+        for image in images:
+            self.images.append(image)
+            yield image
+
+    def scan(self, images: Optional[Iterable[ImageRecord]] = None) -> LayerIndex:
+        """
+        Inspect each distinct image once and index its layers.
+
+        Args:
+            images: Images to scan (default: those seen by ``observe``)
+        """
+        if images is not None:
+            self.images = list(images)
+        listed: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for image in self.images:
+            listed[image.source][image.id] = image.size
+
+        known = self.cache.load()
+        index = LayerIndex()
+        for source, image_sizes in listed.items():
+            for details in iter_inspect(self.inventory, source, image_sizes, self.batch_size):
+                image_id = short_id(str(details.get("Id", "")))
+                if image_id not in image_sizes:
+                    continue
+                layers = list((details.get("RootFS") or {}).get("Layers") or [])
+                if all(layer in known for layer in layers):
+                    sizes = {layer: known[layer] for layer in layers}
+                else:
+                    history = self._history(source, image_id)
+                    sizes = layer_sizes(layers, history, image_sizes[image_id])
+                    if history:
+                        known.update(sizes)
+                index.add_image(source, image_id, sizes)
+
+        # Only sizes read from a history, of layers still on disk, are kept
+        self.cache.save({layer: known[layer] for layer in index.sizes if layer in known})
+        return index
+
+    def _history(self, source: str, image_id: str) -> List[Dict]:
+        """Read an image's history, or an empty list if it is unavailable."""
+        try:
+            return image_history(self.inventory, source, image_id)
+        except (RuntimeAPIError, subprocess.SubprocessError, OSError, ValueError) as e:
+            print(
+                f"{Colors.YELLOW}Warning: no {source} history for {image_id}: {e}{Colors.RESET}"
+            )
+            return []
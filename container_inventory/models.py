@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Image record model for Container Image Inventory.
+
+Images are held as compact ``__slots__`` objects with raw integer sizes,
+epoch timestamps and interned strings. They are converted to the legacy
+dictionary shape only when written out, and behave as a read-only mapping of
+that shape so existing ``image["Repository"]``/``image.get(...)`` callers keep
+working. Images from a fleet scan also carry the ``host`` they were found on,
+enriched images their inspect details (``DETAIL_KEYS``), annotated images
+their container counts (``USAGE_KEYS``) and images run through a vulnerability
+scanner a summary of its findings (``SECURITY_KEYS``).
+
+Runtime output fields that are not modelled (the docker CLI's
+``Containers``, ``CreatedSince``, ``Digest``, ...), and the ``CreatedAt``
+and ``Size`` text as the runtime printed it, are kept verbatim in ``extra``
+and written out unchanged, so saved records keep the runtime's format.
+"""
+
+import datetime
+import re
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional
+
+# Keys of the legacy dictionary shape, in output order
+LEGACY_KEYS = ("Repository", "Tag", "ID", "CreatedAt", "Size", "source")
+
+# Keys added for images found by a fleet scan
+HOST_KEYS = ("host",)
+
+# Keys added by inspect enrichment; None until an image has been enriched
+DETAIL_KEYS = ("digest", "architecture", "os", "labels", "dangling")
+
+# Keys added by container usage mapping; None until an image has been annotated
+USAGE_KEYS = ("containers", "running")
+
+# Keys added by vulnerability scanning; None until an image has been scanned
+SECURITY_KEYS = ("security",)
+
+# Keys that are part of the mapping only when set
+OPTIONAL_KEYS = DETAIL_KEYS + USAGE_KEYS + SECURITY_KEYS
+
+# Keys held in record attributes rather than ``extra``
+_MODELLED_KEYS = frozenset(("Repository", "Tag", "ID", "source", "host") + OPTIONAL_KEYS)
+
+# Multipliers for the decimal units used by the docker CLI
+_SIZE_UNITS = {
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "tb": 1000**4,
+    "pb": 1000**5,
+}
+_SIZE_PATTERN = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([a-zA-Z]*)\s*$")
+
+_CREATED_FORMAT = "%Y-%m-%d %H:%M:%S +0000 UTC"
+
+
+def format_size(size_bytes: int) -> str:
+    """Format bytes to human-readable size."""
+    size = float(size_bytes)  # Create a separate float variable
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size < 1024.0:
+            return f"{size:.2f}{unit}"
+        size /= 1024.0
+    return f"{size:.2f}PB"
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a size string as printed by the docker CLI (e.g. ``77.8MB``).
+
+    Plain integers are taken as bytes. Unparseable values yield 0.
+    """
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = _SIZE_PATTERN.match(str(text))
+    if not match:
+        return 0
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS.get(unit.lower() or "b", 1))
+
+
+def parse_created(value) -> Optional[int]:
+    """
+    Parse an image creation time to epoch seconds.
+
+    Accepts epoch numbers (Podman, Engine API) and the docker CLI format
+    ``2023-11-14 22:13:20 +0000 UTC``. Unparseable values yield None.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        # Drop the trailing zone abbreviation; the numeric offset is authoritative
+        when = datetime.datetime.strptime(text[:25], "%Y-%m-%d %H:%M:%S %z")
+    except ValueError:
+        return None
+    return int(when.timestamp())
+
+
+def format_created(created: Optional[int]) -> str:
+    """Format epoch seconds in the docker CLI's CreatedAt format (UTC)."""
+    if created is None:
+        return ""
+    return datetime.datetime.fromtimestamp(created, datetime.timezone.utc).strftime(
+        _CREATED_FORMAT
+    )
+
+
+def _intern(value) -> str:
+    """Intern a string field so repeated values share one object."""
+    return sys.intern(str(value))
+
+
+class ImageRecord(Mapping):
+    """A single image row: one repository:tag of one image in one runtime."""
+
+    __slots__ = ("id", "repository", "tag", "created", "size", "source", "host", "extra")
+    __slots__ += OPTIONAL_KEYS
+
+    def __init__(
+        self,
+        id: str,
+        repository: str = "<none>",
+        tag: str = "<none>",
+        created: Optional[int] = None,
+        size: int = 0,
+        source: str = "",
+        host: str = "",
+        digest: Optional[str] = None,
+        architecture: Optional[str] = None,
+        os: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+        dangling: Optional[bool] = None,
+        containers: Optional[int] = None,
+        running: Optional[int] = None,
+        security: Optional[Dict] = None,
+        extra: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Initialize the record.
+
+        Args:
+            id: Short (12 character) image ID
+            repository: Repository name, including any registry
+            tag: Tag name
+            created: Creation time in epoch seconds
+            size: Size in bytes
+            source: Runtime the image was found in ('docker' or 'podman')
+            host: Fleet host the image was found on (empty for local scans)
+            digest: Registry manifest digest
+            architecture: CPU architecture, e.g. 'amd64'
+            os: Operating system, e.g. 'linux'
+            labels: Image labels
+            dangling: Whether the image has no repository or tag
+            containers: Number of containers, running or stopped, using the image
+            running: Number of running containers using the image
+            security: Scanner name and finding counts, e.g. per severity
+            extra: Runtime output fields written out verbatim: ``CreatedAt``
+                and ``Size`` as printed, and fields not otherwise modelled
+        """
+        self.id = _intern(id)
+        self.repository = _intern(repository)
+        self.tag = _intern(tag)
+        self.created = created
+        self.size = int(size)
+        self.source = _intern(source)
+        self.host = _intern(host)
+        self.digest = digest
+        self.architecture = None if architecture is None else _intern(architecture)
+        self.os = None if os is None else _intern(os)
+        self.labels = labels
+        self.dangling = dangling
+        self.containers = containers
+        self.running = running
+        self.security = security
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Dict, source: str = "") -> "ImageRecord":
+        """
+        Build a record from a docker CLI row or a legacy dictionary.
+
+        Keys that are not modelled, and the ``CreatedAt`` and ``Size`` text,
+        are kept verbatim in ``extra``.
+        """
+        extra = {
+            _intern(key): _intern(value) if isinstance(value, str) else value
+            for key, value in data.items()
+            if key not in _MODELLED_KEYS
+        }
+        return cls(
+            id=data.get("ID", ""),
+            repository=data.get("Repository", "<none>"),
+            tag=data.get("Tag", "<none>"),
+            created=parse_created(data.get("CreatedAt")),
+            size=parse_size(data.get("Size", 0)),
+            source=data.get("source", source),
+            host=data.get("host", ""),
+            extra=extra or None,
+            **{key: data[key] for key in OPTIONAL_KEYS if data.get(key) is not None},
+        )
+
+    def to_dict(self) -> Dict:
+        """Serialize to the legacy dictionary shape, plus ``host`` and the optional keys set."""
+        data = {
+            "Repository": self.repository,
+            "Tag": self.tag,
+            "ID": self.id,
+            "CreatedAt": format_created(self.created),
+            "Size": format_size(self.size),
+            "source": self.source,
+        }
+        if self.extra:
+            data.update(self.extra)
+        if self.host:
+            data["host"] = self.host
+        for key in OPTIONAL_KEYS:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        return data
+
+    def __getitem__(self, key: str):
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        if key == "Repository":
+            return self.repository
+        if key == "Tag":
+            return self.tag
+        if key == "ID":
+            return self.id
+        if key == "CreatedAt":
+            return format_created(self.created)
+        if key == "Size":
+            return format_size(self.size)
+        if key == "source":
+            return self.source
+        if key == "host" and self.host:
+            return self.host
+        if key in OPTIONAL_KEYS and getattr(self, key) is not None:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def _keys(self) -> tuple:
+        """Return the mapping keys, in output order."""
+        keys = LEGACY_KEYS
+        if self.extra:
+            keys += tuple(key for key in self.extra if key not in LEGACY_KEYS)
+        if self.host:
+            keys += HOST_KEYS
+        return keys + tuple(key for key in OPTIONAL_KEYS if getattr(self, key) is not None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return (
+            f"ImageRecord(id={self.id!r}, repository={self.repository!r}, tag={self.tag!r}, "
+            f"size={self.size!r}, source={self.source!r}, host={self.host!r})"
+        )
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Analysis plugins for Container Image Inventory.
+
+An analyzer receives the image records of a scan and returns a
+JSON-serializable result. The scan runs once however many analyzers are
+selected: every analyzer gets the same tuple of records, and the analyzers
+run concurrently on a pool of worker threads, each one timed and bounded by
+a timeout.
+
+Analyzers are discovered from:
+
+- the built-in ``summary`` analyzer
+- modules in ``container_inventory/custom/`` (where ``make install-script``
+  installs scripts): their ``Analyzer`` subclasses and instances, and a
+  module-level ``analyze(images)`` function named after the module
+- ``container_inventory.analyzers`` entry points of installed distributions,
+  each naming an ``Analyzer`` subclass, instance or function
+
+A minimal plugin::
+
+    from container_inventory.plugins import Analyzer
+
+    class LargeImages(Analyzer):
+        name = "large-images"
+        description = "Images over 1 GB"
+
+        def analyze(self, images):
+            return [f"{i.repository}:{i.tag}" for i in images if i.size > 10**9]
+"""
+
+import threading
+import time
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from container_inventory.colors import Colors
+from container_inventory.defaults import DEFAULT_ANALYZER_TIMEOUT, DEFAULT_ANALYZER_WORKERS
+from container_inventory.models import ImageRecord
+from container_inventory.trace import TRACER
+
+# Entry point group third-party distributions register analyzers under
+ENTRY_POINT_GROUP = "container_inventory.analyzers"
+
+# Package scanned for custom analysis scripts
+CUSTOM_PACKAGE = "container_inventory.custom"
+
+
+class Analyzer:
+    """Base class of analysis plugins."""
+
+    # Name used to select the analyzer with --analyze
+    name = ""
+    description = ""
+
+    def analyze(self, images: Sequence[ImageRecord]) -> Any:
+        """
+        Analyze the images of a scan.
+
+        Args:
+            images: Image records shared with every other analyzer; they
+                must not be modified
+
+        Returns:
+            A JSON-serializable result
+        """
+        raise NotImplementedError
+
+
+class FunctionAnalyzer(Analyzer):
+    """An analyzer defined by a plain ``analyze(images)`` function."""
+
+    def __init__(self, func: Callable, name: str, description: Optional[str] = None):
+        self.func = func
+        self.name = name
+        self.description = description or (func.__doc__ or "").strip().split("\n")[0]
+
+    def analyze(self, images: Sequence[ImageRecord]) -> Any:
+        return self.func(images)
+
+
+class SummaryAnalyzer(Analyzer):
+    """Built-in analyzer: image counts and bytes per source."""
+
+    name = "summary"
+    description = "Images, total and average bytes, and largest image per source"
+
+    def analyze(self, images: Sequence[ImageRecord]) -> Any:
+        from container_inventory.columnar import ImageColumns, aggregate
+
+        return aggregate(ImageColumns.from_rows(images), ["source"])
+
+
+def as_analyzer(obj: Any, name: str) -> Analyzer:
+    """
+    Turn a discovered plugin object into an analyzer.
+
+    Args:
+        obj: Analyzer subclass, Analyzer instance or ``analyze(images)`` function
+        name: Name to use when the object does not define one
+
+    Raises:
+        TypeError: If the object is none of these
+    """
+    if isinstance(obj, type) and issubclass(obj, Analyzer):
+        obj = obj()
+    if isinstance(obj, Analyzer):
+        if not obj.name:
+            obj.name = name
+        return obj
+    if callable(obj):
+        return FunctionAnalyzer(obj, name)
+    raise TypeError(f"{obj!r} is not an analyzer")
+
+
+def _module_analyzers(module) -> List[Analyzer]:
+    """Return the analyzers a custom script module defines."""
+    default_name = module.__name__.rpartition(".")[2]
+    classes = [
+        value
+        for value in vars(module).values()
+        if isinstance(value, type)
+        and issubclass(value, Analyzer)
+        and value.__module__ == module.__name__
+    ]
+    found = [as_analyzer(cls, default_name) for cls in classes]
+    found += [
+        value
+        for value in vars(module).values()
+        if isinstance(value, Analyzer) and type(value) not in classes
+    ]
+    analyze = getattr(module, "analyze", None)
+    if callable(analyze) and not found:
+        found.append(FunctionAnalyzer(analyze, default_name))
+    return found
+
+
+def _entry_points() -> list:
+    """Return the entry points of ENTRY_POINT_GROUP, on any Python version."""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            return []
+    points = entry_points()
+    if hasattr(points, "select"):
+        return list(points.select(group=ENTRY_POINT_GROUP))
+    return list(points.get(ENTRY_POINT_GROUP, []))
+
+
+def discover_analyzers(package: str = CUSTOM_PACKAGE) -> Dict[str, Analyzer]:
+    """
+    Find every available analyzer.
+
+    A plugin that fails to load is reported and skipped; when two plugins
+    share a name, the first found (built-in, then custom scripts, then entry
+    points) is kept.
+
+    Args:
+        package: Package whose modules are custom analysis scripts
+
+    Returns:
+        Analyzers by name
+    """
+    import importlib
+    import pkgutil
+
+    found: Dict[str, Analyzer] = {}
+
+    def add(analyzer: Analyzer, origin: str) -> None:
+        if analyzer.name in found:
+            print(
+                f"{Colors.YELLOW}Warning: analyzer {analyzer.name!r} from {origin} "
+                f"ignored; the name is already taken{Colors.RESET}"
+            )
+            return
+        found[analyzer.name] = analyzer
+
+    add(SummaryAnalyzer(), "built-in")
+
+    try:
+        custom = importlib.import_module(package)
+    except ImportError:
+        custom = None
+    for info in pkgutil.iter_modules(getattr(custom, "__path__", [])):
+        name = f"{package}.{info.name}"
+        try:
+            module = importlib.import_module(name)
+        except Exception as e:
+            print(f"{Colors.YELLOW}Warning: could not load {name}: {e}{Colors.RESET}")
+            continue
+        for analyzer in _module_analyzers(module):
+            add(analyzer, name)
+
+    for point in _entry_points():
+        try:
+            add(as_analyzer(point.load(), point.name), f"entry point {point.value}")
+        except Exception as e:
+            print(f"{Colors.YELLOW}Warning: could not load {point.value}: {e}{Colors.RESET}")
+
+    return found
+
+
+def select_analyzers(available: Dict[str, Analyzer], names: Iterable[str]) -> List[Analyzer]:
+    """
+    Pick analyzers by name; ``all`` selects every one.
+
+    Raises:
+        ValueError: If a name is unknown
+    """
+    selected: Dict[str, Analyzer] = {}
+    for name in names:
+        if name == "all":
+            selected.update(available)
+        elif name in available:
+            selected[name] = available[name]
+        else:
+            known = ", ".join(sorted(available)) or "none"
+            raise ValueError(f"Unknown analyzer {name!r} (available: {known})")
+    return list(selected.values())
+
+
+def run_analyzers(
+    analyzers: Sequence[Analyzer],
+    images: Iterable[ImageRecord],
+    workers: int = DEFAULT_ANALYZER_WORKERS,
+    timeout: float = DEFAULT_ANALYZER_TIMEOUT,
+) -> Dict[str, Dict]:
+    """
+    Run analyzers concurrently over one shared set of image records.
+
+    Workers are daemon threads, so an analyzer that never returns is given up
+    on after ``timeout`` (and replaced by a new worker) without keeping the
+    process alive.
+
+    Args:
+        analyzers: Analyzers to run
+        images: Image records of the scan, read once
+        workers: Number of analyzers run at the same time
+        timeout: Seconds each analyzer may run
+
+    Returns:
+        Per analyzer name, in the order given, a dictionary with its
+        ``result``, the ``seconds`` it took and an ``error`` (None on success)
+    """
+    shared = tuple(images)
+    pending: Queue = Queue()
+    for analyzer in analyzers:
+        pending.put(analyzer)
+    done: Queue = Queue()
+    running: Dict[str, float] = {}
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            try:
+                analyzer = pending.get_nowait()
+            except Empty:
+                return
+            start = time.monotonic()
+            with lock:
+                running[analyzer.name] = start
+            try:
+                result, error = analyzer.analyze(shared), None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            done.put((analyzer.name, result, error, time.monotonic() - start))
+
+    def start_worker() -> None:
+        threading.Thread(target=worker, name="analyzer", daemon=True).start()
+
+    for _ in range(max(1, min(workers, len(analyzers)))):
+        start_worker()
+
+    results: Dict[str, Dict] = {}
+    while len(results) < len(analyzers):
+        try:
+            name, result, error, seconds = done.get(timeout=0.1)
+        except Empty:
+            now = time.monotonic()
+            with lock:
+                expired = [n for n, start in running.items() if now - start > timeout]
+            for name in expired:
+                with lock:
+                    seconds = now - running.pop(name)
+                results[name] = {
+                    "result": None,
+                    "seconds": seconds,
+                    "error": f"timed out after {timeout:g}s",
+                }
+                TRACER.add_phase(f"analyze.{name}", seconds)
+                # The stuck worker keeps its thread; start another for the rest
+                start_worker()
+            continue
+        with lock:
+            running.pop(name, None)
+        if name in results:
+            continue  # Finished after being given up on
+        results[name] = {"result": result, "seconds": seconds, "error": error}
+        TRACER.add_phase(f"analyze.{name}", seconds)
+
+    return {analyzer.name: results[analyzer.name] for analyzer in analyzers}
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Image reference parsing for Container Image Inventory.
+"""
+
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+NONE = "<none>"
+
+
+@lru_cache(maxsize=8192)
+def parse_reference(ref: str) -> Tuple[str, str]:
+    """
+    Split an image reference into repository and tag.
+
+    The tag is the part after the last ``:`` that follows the last ``/``, so a
+    registry port is kept in the repository (``registry:5000/app:1.2`` gives
+    ``registry:5000/app`` and ``1.2``). A digest (``@sha256:...``) is dropped,
+    and a reference without a tag gets the tag ``<none>``.
+
+    Args:
+        ref: Image reference such as ``docker.io/library/alpine:3.19``
+
+    Returns:
+        A (repository, tag) tuple
+    """
+    name = ref.partition("@")[0]
+    if not name:
+        return NONE, NONE
+
+    colon = name.rfind(":")
+    if colon > name.rfind("/"):
+        return name[:colon] or NONE, name[colon + 1 :] or NONE
+    return name, NONE
+
+
+def image_references(names: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Parse every name of an image, dropping duplicates.
+
+    Args:
+        names: The image's references (e.g. Podman ``Names`` or Docker ``RepoTags``)
+
+    Returns:
+        (repository, tag) tuples in first-seen order; a single
+        (``<none>``, ``<none>``) entry for an image without names
+    """
+    refs = list(dict.fromkeys(parse_reference(name) for name in names or () if name))
+    return refs or [(NONE, NONE)]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Table rendering for Container Image Inventory.
+
+Rows are reduced to their display strings as they arrive, column widths are
+tracked in the same pass, and the finished table is written to the terminal
+in a single call. A Host column is shown first when any row has a host, as
+in a fleet scan.
+"""
+
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from container_inventory.colors import Colors
+
+# (header, image key, header color, minimum width)
+COLUMNS = [
+    ("ID", "ID", Colors.CYAN, 12),
+    ("Repository", "Repository", Colors.GREEN, 10),
+    ("Tag", "Tag", Colors.BLUE, 3),
+    ("Created At", "CreatedAt", Colors.MAGENTA, 10),
+    ("Size", "Size", Colors.YELLOW, 4),
+    ("Source", "source", Colors.RED, 6),
+]
+
+# Optional leading column, kept as the last cell of each row
+HOST_COLUMN = ("Host", "host", Colors.BOLD, 4)
+ROW_COLUMNS = COLUMNS + [HOST_COLUMN]
+
+
+class TableRenderer:
+    """Accumulate image rows and render them as one buffered table."""
+
+    def __init__(self, max_rows: Optional[int] = None, page: int = 1):
+        """
+        Initialize the renderer.
+
+        Args:
+            max_rows: Keep at most this many rows per page (all if None)
+            page: 1-based page of ``max_rows`` rows to keep
+        """
+        self.max_rows = max_rows
+        self.first_row = (max(page, 1) - 1) * max_rows if max_rows else 0
+        self.rows: List[Tuple[str, ...]] = []
+        self.widths = [minimum for _, _, _, minimum in ROW_COLUMNS]
+        self.total = 0
+        self.show_host = False
+
+    def add(self, image: Dict) -> None:
+        """Add an image row, keeping only the display strings of shown rows."""
+        index = self.total
+        self.total += 1
+        if index < self.first_row:
+            return
+        if self.max_rows is not None and len(self.rows) >= self.max_rows:
+            return
+
+        row = tuple(str(image.get(key, "")) for _, key, _, _ in ROW_COLUMNS)
+        self.rows.append(row)
+        if row[-1]:
+            self.show_host = True
+        self.widths = [max(width, len(cell)) for width, cell in zip(self.widths, row)]
+
+    def extend(self, images: Iterable[Dict]) -> None:
+        """Add every image from an iterable."""
+        for image in images:
+            self.add(image)
+
+    def observe(self, images: Iterable[Dict]) -> Iterator[Dict]:
+        """Add images to the table as they pass through to another consumer."""
+        for image in images:
+            self.add(image)
+            yield image
+
+    def render(self) -> str:
+        """Render the table as a single string."""
+        if not self.total:
+            return "No images found.\n"
+
+        # Columns in display order, as indexes into each row
+        order = list(range(len(COLUMNS)))
+        if self.show_host:
+            order.insert(0, len(COLUMNS))
+        widths = [self.widths[i] for i in order]
+
+        lines = ["", Colors.BOLD + "Container Image Inventory" + Colors.RESET, ""]
+        lines.append(
+            " | ".join(
+                f"{ROW_COLUMNS[i][2]}{ROW_COLUMNS[i][0]:<{width}}{Colors.RESET}"
+                for i, width in zip(order, widths)
+            )
+        )
+        lines.append("-" * (sum(widths) + len(widths) * 3))
+        for row in self.rows:
+            lines.append(" | ".join(f"{row[i]:<{width}}" for i, width in zip(order, widths)))
+
+        hidden = self.total - len(self.rows)
+        if hidden:
+            start = self.first_row + 1
+            end = self.first_row + len(self.rows)
+            lines.append(
+                f"{Colors.YELLOW}Showing images {start}-{end} of {self.total}; "
+                f"use --page to see more{Colors.RESET}"
+                if self.rows
+                else f"{Colors.YELLOW}No images on this page; "
+                f"{self.total} images in total{Colors.RESET}"
+            )
+
+        lines.append("")  # Add empty line after table
+        return "\n".join(lines) + "\n"
+
+    def write(self, stream: Optional[TextIO] = None) -> None:
+        """Write the rendered table with a single write call."""
+        stream = stream or sys.stdout
+        stream.write(self.render())
+        stream.flush()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Resource-aware scheduling of periodic scans.
+
+The systemd timer starts the scan service every few minutes. With
+``--schedule`` each run first decides whether a scan is worth doing:
+
+- a run checks the host once the current interval has passed since the
+  previous check, and skips otherwise
+- a cheap fingerprint of the runtimes' image stores (the modification times
+  of their image metadata files, or a hash of the image IDs and tags when
+  those files cannot be read) tells whether any image changed; a host whose
+  images did not change is not rescanned
+- a scan is deferred to a later run while the load average per CPU is above
+  a threshold
+- once the last scan is older than the maximum interval, a scan is forced
+  whatever the fingerprint and load
+
+The interval follows the change rate: it is halved (down to the minimum)
+when a check finds changes and doubled (up to the maximum) when it finds
+none. Scans run at low CPU and I/O priority, which the runtime and scanner
+commands they start inherit. Every decision is printed with its reason, and
+optionally appended to a JSON Lines log for tuning the thresholds.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+from container_inventory.cache import JsonCache
+from container_inventory.colors import Colors
+from container_inventory.core import ContainerInventory
+from container_inventory.defaults import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MAX_LOAD,
+    DEFAULT_MIN_INTERVAL,
+)
+
+# Cache file of the scheduling state, per output file
+SCHEDULE_CACHE = "schedule.json"
+
+# Niceness scans run at
+DEFAULT_NICE = 10
+
+# Image metadata rewritten by each runtime whenever an image is pulled,
+# tagged, untagged or removed
+DOCKER_ROOT = "/var/lib/docker"
+PODMAN_ROOT = "/var/lib/containers/storage"
+
+SCAN = "scan"
+SKIP = "skip"
+DEFER = "defer"
+
+
+def format_interval(seconds: float) -> str:
+    """Format seconds as a short duration such as ``20m``."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.3g}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def load_per_cpu() -> Optional[float]:
+    """Return the 1-minute load average divided by the CPU count, or None if unknown."""
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return load / (os.cpu_count() or 1)
+
+
+def lower_priority(nice: int = DEFAULT_NICE) -> None:
+    """
+    Run this process, and the commands it starts, at low CPU and I/O priority.
+
+    The niceness is only raised (a unit's ``Nice=`` above it is kept), and
+    the idle I/O class is set with ``ionice`` where it is installed. Failures
+    are reported and the scan goes ahead at normal priority.
+    """
+    try:
+        if os.getpriority(os.PRIO_PROCESS, 0) < nice:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+    except (AttributeError, OSError) as e:
+        print(f"{Colors.YELLOW}Warning: could not lower CPU priority: {e}{Colors.RESET}")
+
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        return
+    try:
+        subprocess.run(
+            [ionice, "-c", "3", "-p", str(os.getpid())],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"{Colors.YELLOW}Warning: could not lower I/O priority: {e}{Colors.RESET}")
+
+
+def store_files(runtime: str) -> List[str]:
+    """
+    Return the local image metadata files and directories of a runtime.
+
+    Empty when the runtime is remote (``DOCKER_HOST`` or ``CONTAINER_HOST``
+    set) or its storage cannot be read.
+    """
+    if runtime == "docker":
+        if os.environ.get("DOCKER_HOST", "unix:///var/run/docker.sock") not in (
+            "unix:///var/run/docker.sock",
+            "unix:///run/docker.sock",
+        ):
+            return []
+        image_dir = os.path.join(DOCKER_ROOT, "image", "*")
+        patterns = [
+            os.path.join(image_dir, "repositories.json"),
+            os.path.join(image_dir, "imagedb", "content", "sha256"),
+        ]
+    else:
+        if os.environ.get("CONTAINER_HOST"):
+            return []
+        root = PODMAN_ROOT
+        if os.geteuid() != 0:
+            data = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+            root = os.path.join(data, "containers", "storage")
+        patterns = [
+            os.path.join(root, "*-images", "images.json"),
+            os.path.join(root, "*-images"),
+        ]
+    return sorted(path for pattern in patterns for path in glob.glob(pattern))
+
+
+def store_fingerprint(inventory: ContainerInventory) -> Optional[str]:
+    """
+    Fingerprint the images of the selected runtimes.
+
+    Stats the runtimes' image metadata; a runtime without readable metadata
+    is listed instead, and its image IDs and tags are hashed.
+
+    Returns:
+        A hex digest that changes when images change, or None if a runtime
+        could not be read
+    """
+    digest = hashlib.sha256()
+    listed = []
+    for runtime in inventory._selected_runtimes():
+        try:
+            stats = [(path, os.stat(path)) for path in store_files(runtime)]
+        except OSError:
+            stats = []
+        if not stats:
+            listed.append(runtime)
+            continue
+        for path, st in stats:
+            digest.update(f"{path} {st.st_mtime_ns} {st.st_size}\n".encode())
+
+    if listed:
+        lines = sorted(
+            f"{image.source} {image.id} {image.repository}:{image.tag}"
+            for image in inventory.iter_images(listed)
+        )
+        if any(runtime in inventory.fetch_errors for runtime in listed):
+            return None
+        digest.update("\n".join(lines).encode())
+    return digest.hexdigest()[:16]
+
+
+class Decision:
+    """Whether a run scans, and why."""
+
+    def __init__(
+        self,
+        action: str,
+        reason: str,
+        load: Optional[float],
+        interval: float,
+        fingerprint: Optional[str] = None,
+    ):
+        self.action = action
+        self.reason = reason
+        self.load = load
+        self.interval = interval
+        self.fingerprint = fingerprint
+
+    @property
+    def scan(self) -> bool:
+        """Whether the run goes ahead with a scan."""
+        return self.action == SCAN
+
+
+class ScanScheduler:
+    """Decide whether a periodic run scans, and remember the outcome."""
+
+    def __init__(
+        self,
+        output_file: Optional[str] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        max_load: float = DEFAULT_MAX_LOAD,
+        log_file: Optional[str] = None,
+        cache: Optional[JsonCache] = None,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            output_file: Output of the scans; runs with different outputs
+                are scheduled separately
+            min_interval: Shortest time between checks, in seconds
+            max_interval: Longest time between checks, and the age after
+                which a scan is forced
+            max_load: Load average per CPU above which scans are deferred
+            log_file: Also append each decision to this JSON Lines file
+            cache: Scheduling state (default: schedule.json in the cache directory)
+        """
+        self.key = os.path.abspath(output_file) if output_file else "-"
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.max_load = max_load
+        self.log_file = log_file
+        self.cache = cache or JsonCache(SCHEDULE_CACHE)
+        self.started = time.time()
+
+    def _load_state(self) -> Dict:
+        state = self.cache.load().get(self.key)
+        return state if isinstance(state, dict) else {}
+
+    def _save_state(self, state: Dict) -> None:
+        states = self.cache.load()
+        states[self.key] = state
+        self.cache.save(states)
+
+    def decide(self, inventory: ContainerInventory) -> Decision:
+        """
+        Decide whether to scan now, and log the decision.
+
+        A skip is remembered at once; a scan is only remembered by
+        ``record_scan``, so a scan that fails is retried on the next run.
+        """
+        now = self.started
+        state = self._load_state()
+        interval = state.get("interval", self.min_interval)
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        load = load_per_cpu()
+        scanned = state.get("scanned")
+
+        if scanned is None:
+            decision = Decision(SCAN, "no previous scan", load, interval)
+        elif now - scanned >= self.max_interval:
+            decision = Decision(
+                SCAN, f"last scan {format_interval(now - scanned)} ago", load, interval
+            )
+        elif now - state.get("checked", 0) < interval:
+            due = state.get("checked", 0) + interval - now
+            decision = Decision(SKIP, f"next check in {format_interval(due)}", load, interval)
+        else:
+            decision = None
+
+        if decision is None or decision.scan:
+            fingerprint = store_fingerprint(inventory)
+            unchanged = fingerprint is not None and fingerprint == state.get("fingerprint")
+            if decision is not None:
+                decision.fingerprint = fingerprint
+            elif unchanged:
+                interval = min(interval * 2, self.max_interval)
+                decision = Decision(SKIP, "no image changes", load, interval, fingerprint)
+            elif load is not None and load > self.max_load:
+                decision = Decision(
+                    DEFER,
+                    f"images changed, but load {load:.2f} per CPU is above {self.max_load:g}",
+                    load,
+                    interval,
+                    fingerprint,
+                )
+            else:
+                interval = max(interval / 2, self.min_interval)
+                decision = Decision(SCAN, "images changed", load, interval, fingerprint)
+            if decision.action == SKIP:
+                state.update(checked=now, interval=interval)
+                self._save_state(state)
+
+        self._log(decision, scanned)
+        return decision
+
+    def record_scan(self, decision: Decision) -> None:
+        """Remember a completed scan, so the next run compares against it."""
+        self._save_state(
+            {
+                "scanned": self.started,
+                "checked": self.started,
+                "interval": decision.interval,
+                "fingerprint": decision.fingerprint,
+            }
+        )
+
+    def _log(self, decision: Decision, scanned: Optional[float]) -> None:
+        """Print a decision and append it to the decision log."""
+        load = "unknown" if decision.load is None else f"{decision.load:.2f}"
+        print(
+            f"{Colors.BLUE}Schedule: {decision.action} ({decision.reason}; "
+            f"load {load} per CPU, interval {format_interval(decision.interval)}){Colors.RESET}"
+        )
+        if not self.log_file:
+            return
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "output": self.key,
+            "action": decision.action,
+            "reason": decision.reason,
+            "load": None if decision.load is None else round(decision.load, 3),
+            "interval": decision.interval,
+            "since_scan": None if scanned is None else round(self.started - scanned),
+        }
+        try:
+            with open(self.log_file, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"{Colors.YELLOW}Warning: could not write {self.log_file}: {e}{Colors.RESET}")
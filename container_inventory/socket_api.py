@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Native Docker Engine and Podman libpod API access over Unix sockets.
+
+Talking to the runtime's REST API directly avoids forking a CLI process (and,
+for Podman, re-initialising its storage) on every call. A single keep-alive
+HTTP connection is held per runtime and reused across requests.
+"""
+
+import http.client
+import json
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+# Socket discovery lives in a module without the HTTP stack; re-exported here
+from container_inventory.discovery import (
+    DOCKER_SOCKET,
+    PODMAN_SOCKET,
+    RuntimeAPIError,
+    default_socket_path,
+)
+from container_inventory.streaming import iter_json_array
+from container_inventory.trace import TRACER
+
+# Bytes read from the socket per chunk when streaming a response
+CHUNK_SIZE = 64 * 1024
+
+# Versioned libpod prefix; the v4 API is also served by Podman 5
+PODMAN_API_PREFIX = "/v4.0.0/libpod"
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        """Connect to the Unix socket instead of a TCP host."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class RuntimeAPIClient:
+    """Keep-alive client for a Docker or Podman REST API socket."""
+
+    def __init__(self, runtime: str, socket_path: str, timeout: Optional[float] = None):
+        """
+        Initialize the client.
+
+        Args:
+            runtime: 'docker' or 'podman'
+            socket_path: Path to the runtime's API socket
+            timeout: Socket timeout in seconds
+        """
+        self.runtime = runtime
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._conn: Optional[UnixHTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def _prefix(self) -> str:
+        """Return the URL prefix for runtime-specific endpoints."""
+        return PODMAN_API_PREFIX if self.runtime == "podman" else ""
+
+    def close(self) -> None:
+        """Close the pooled connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _open(self, path: str) -> http.client.HTTPResponse:
+        """
+        Send a GET request over the pooled connection and return the response.
+
+        A connection the server has closed since the last request is
+        re-opened once before giving up. Must be called with the lock held,
+        and the response must be fully read before the next request.
+        """
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+            try:
+                self._conn.request("GET", path)
+                response = self._conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # Stale keep-alive connection; retry on a fresh one
+                self.close()
+                if attempt:
+                    raise RuntimeAPIError(f"{self.runtime} API closed the connection")
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise RuntimeAPIError(f"{self.runtime} API request failed: {e}")
+
+            if response.status != 200:
+                response.read()
+                if response.will_close:
+                    self.close()
+                raise RuntimeAPIError(f"{self.runtime} API {path} returned HTTP {response.status}")
+            return response
+        raise RuntimeAPIError(f"{self.runtime} API request failed")
+
+    def request(self, path: str) -> bytes:
+        """
+        Issue a GET request over the pooled connection.
+
+        Args:
+            path: Request path, including any query string
+
+        Returns:
+            The response body
+        """
+        with self._lock:
+            start = time.monotonic()
+            response = self._open(path)
+            try:
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise RuntimeAPIError(f"{self.runtime} API request failed: {e}")
+            if response.will_close:
+                self.close()
+            TRACER.record_io("api", f"{self.runtime} {path}", time.monotonic() - start, len(body))
+            return body
+
+    def iter_json_array(self, path: str) -> Iterator[Any]:
+        """
+        Issue a GET request and yield the elements of the JSON array response
+        as they arrive, without buffering the whole body.
+        """
+        with self._lock:
+            start = time.monotonic()
+            response = self._open(path)
+            complete = False
+            bytes_read = 0
+
+            def read() -> bytes:
+                nonlocal bytes_read
+                chunk = response.read(CHUNK_SIZE)
+                bytes_read += len(chunk)
+                return chunk
+
+            try:
+                yield from iter_json_array(iter(read, b""))
+                # Drain trailing whitespace so the connection can be reused
+                response.read()
+                complete = True
+            except ValueError:
+                raise RuntimeAPIError(f"{self.runtime} API {path} returned invalid JSON")
+            except (OSError, http.client.HTTPException) as e:
+                raise RuntimeAPIError(f"{self.runtime} API request failed: {e}")
+            finally:
+                # A partially read response leaves the connection unusable
+                if not complete or response.will_close:
+                    self.close()
+                TRACER.record_io(
+                    "api",
+                    f"{self.runtime} {path}",
+                    time.monotonic() - start,
+                    bytes_read,
+                    None if complete else "incomplete",
+                )
+
+    def request_json(self, path: str) -> Any:
+        """Issue a GET request and decode the JSON response."""
+        body = self.request(path)
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise RuntimeAPIError(f"{self.runtime} API {path} returned invalid JSON")
+
+    def ping(self) -> bool:
+        """Check whether the API is answering."""
+        try:
+            self.request(f"{self._prefix()}/_ping")
+            return True
+        except RuntimeAPIError:
+            return False
+
+    def iter_images(self) -> Iterator[Dict]:
+        """
+        Stream images as returned by the runtime's API.
+
+        Docker returns Engine API image summaries; Podman returns libpod
+        summaries, which carry the same ``Names`` field as ``podman images``.
+        """
+        return self.iter_json_array(f"{self._prefix()}/images/json")
+
+    def list_images(self) -> List[Dict]:
+        """List images as returned by the runtime's API."""
+        return list(self.iter_images())
+
+    def iter_containers(self) -> Iterator[Dict]:
+        """Stream every container, running or stopped, as returned by the runtime's API."""
+        return self.iter_json_array(f"{self._prefix()}/containers/json?all=true")
+
+    def inspect_image(self, image_id: str) -> Dict:
+        """Return the runtime's detailed description of one image."""
+        return self.request_json(f"{self._prefix()}/images/{quote(image_id, safe='')}/json")
+
+    def image_history(self, image_id: str) -> List[Dict]:
+        """Return an image's build history, newest step first."""
+        return self.request_json(f"{self._prefix()}/images/{quote(image_id, safe='')}/history")
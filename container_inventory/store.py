@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Append-only JSON Lines storage for Container Image Inventory.
+
+Each line of the store is one image record stamped with the ``scan_id`` and
+``timestamp`` of the scan that produced it, so a new scan is a single append
+to the end of the file instead of a read-modify-rewrite of the whole history.
+
+With a rotation policy the active file is sealed into compressed segments
+(``<output>.<UTC time>.gz``) as it grows; readers stream the sealed segments,
+oldest first, and then the active file.
+"""
+
+import datetime
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from container_inventory.archive import COMPRESSIONS, RotationPolicy, compress_file, open_segment
+
+LEGACY_SCAN_ID = "legacy"
+
+# Sealed segments are named after the UTC time they were sealed
+SEGMENT_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
+# Encoded records are written in chunks of about this many bytes
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+def new_scan_id() -> str:
+    """Return a short random identifier for a scan."""
+    return os.urandom(6).hex()
+
+
+def utc_timestamp(when: Optional[datetime.datetime] = None) -> str:
+    """Format a datetime (default: now) as an ISO 8601 UTC timestamp."""
+    if when is None:
+        when = datetime.datetime.now(datetime.timezone.utc)
+    elif when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return when.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def is_legacy_file(path: str) -> bool:
+    """Check whether a file holds a legacy pretty-printed JSON array."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(4096)
+                if not chunk:
+                    return False
+                stripped = chunk.lstrip()
+                if stripped:
+                    return stripped[:1] == b"["
+    except FileNotFoundError:
+        return False
+
+
+def _parse_stamp(stamp: str) -> datetime.datetime:
+    """Convert a segment time stamp to a UTC datetime."""
+    parsed = datetime.datetime.strptime(stamp, SEGMENT_TIME_FORMAT)
+    return parsed.replace(tzinfo=datetime.timezone.utc)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write a buffer to a file descriptor, retrying short writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+class InventoryStore:
+    """Append-only JSON Lines inventory history."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path to the JSON Lines file
+        """
+        self.path = path
+        self._segment_name = re.compile(
+            re.escape(os.path.basename(path))
+            + r"\.(\d{8}T\d{6}Z)(?:-(\d+))?("
+            + "|".join(re.escape(suffix) for suffix in COMPRESSIONS.values() if suffix)
+            + r")?$"
+        )
+
+    def _sealed(self) -> List[tuple]:
+        """List sealed segments as (sort key, stamp, path, compressed), oldest first."""
+        directory = os.path.dirname(self.path) or "."
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        found = []
+        for name in names:
+            match = self._segment_name.match(name)
+            if match:
+                stamp, serial, suffix = match.groups()
+                key = (stamp, int(serial or 0))
+                found.append((key, stamp, os.path.join(directory, name), bool(suffix)))
+        return sorted(found)
+
+    def segments(self) -> List[str]:
+        """
+        List the sealed segments, oldest first.
+
+        If sealing was interrupted after the compressed copy was complete
+        but before the plain file was removed, only the compressed copy is
+        listed, so no record is read twice.
+        """
+        sealed = self._sealed()
+        compressed = {key for key, _, _, is_compressed in sealed if is_compressed}
+        return [
+            path
+            for key, _, path, is_compressed in sealed
+            if is_compressed or key not in compressed
+        ]
+
+    def _active_since(self) -> Optional[float]:
+        """Return the time of the first record in the active file, if any."""
+        try:
+            with open(self.path) as f:
+                first = json.loads(f.readline())
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            parsed = datetime.datetime.strptime(first.get("timestamp", ""), "%Y-%m-%dT%H:%M:%SZ")
+        except (AttributeError, ValueError):
+            return None
+        return parsed.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    def rotation_due(self, policy: RotationPolicy, now: Optional[float] = None) -> bool:
+        """Check whether the active file has outgrown a rotation policy."""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return False
+        if size == 0 or is_legacy_file(self.path):
+            return False
+        if policy.max_bytes is not None and size >= policy.max_bytes:
+            return True
+        if policy.max_age is not None:
+            since = self._active_since()
+            now = time.time() if now is None else now
+            return since is not None and now - since >= policy.max_age
+        return False
+
+    def rotate(self, policy: RotationPolicy, now: Optional[float] = None) -> Optional[str]:
+        """
+        Seal the active file if the policy says it is due.
+
+        The active file is renamed to ``<output>.<UTC time>`` in one step, so
+        the next append starts a new active file, and then compressed. Plain
+        segments left by an interrupted compression are compressed too.
+
+        Returns:
+            Path of the newly sealed segment, or None if nothing was sealed
+        """
+        now = time.time() if now is None else now
+        sealed = None
+        if self.rotation_due(policy, now):
+            stamp = time.strftime(SEGMENT_TIME_FORMAT, time.gmtime(now))
+            sealed = f"{self.path}.{stamp}"
+            serial = 0
+            while any(os.path.exists(sealed + suffix) for suffix in COMPRESSIONS.values()):
+                serial += 1
+                sealed = f"{self.path}.{stamp}-{serial}"
+            os.rename(self.path, sealed)
+
+        if policy.compression != "none":
+            for path in self.segments():
+                if self._segment_name.match(os.path.basename(path)).group(3) is None:
+                    compressed = compress_file(path, policy.compression)
+                    if path == sealed:
+                        sealed = compressed
+        return sealed
+
+    def prune(self, policy: RotationPolicy, now: Optional[float] = None) -> Optional[str]:
+        """
+        Delete sealed segments beyond the policy's count and age limits.
+
+        Returns:
+            Store timestamp of the newest deleted segment's sealing time
+            (every deleted record is older), or None if nothing was deleted
+        """
+        now = time.time() if now is None else now
+        sealed = [(key, stamp, path) for key, stamp, path, _ in self._sealed()]
+        doomed = []
+        if policy.keep is not None:
+            keys = sorted({key for key, _, _ in sealed})
+            kept = set(keys[len(keys) - policy.keep :]) if policy.keep < len(keys) else set(keys)
+            doomed += [item for item in sealed if item[0] not in kept]
+        if policy.retention is not None:
+            cutoff = now - policy.retention
+            doomed += [item for item in sealed if _parse_stamp(item[1]).timestamp() < cutoff]
+        if not doomed:
+            return None
+
+        for _, _, path in set(doomed):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        newest = max(stamp for _, stamp, _ in doomed)
+        return utc_timestamp(_parse_stamp(newest))
+
+    def _encode(self, images: Iterable[Dict], scan_id: str, timestamp: str) -> Iterator[bytes]:
+        """Encode a scan as newline-delimited compact JSON, in chunks."""
+        lines = []
+        size = 0
+        for image in images:
+            record = {"scan_id": scan_id, "timestamp": timestamp}
+            record.update(image)
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            lines.append(line)
+            size += len(line)
+            if size >= WRITE_CHUNK_SIZE:
+                yield "".join(lines).encode("utf-8")
+                lines = []
+                size = 0
+        if lines:
+            yield "".join(lines).encode("utf-8")
+
+    def append_scan(
+        self,
+        images: Iterable[Dict],
+        scan_id: Optional[str] = None,
+        timestamp: Optional[str] = None,
+    ) -> str:
+        """
+        Append one scan to the store and fsync it.
+
+        The scan is encoded as it is read from ``images``; scans smaller than
+        the write chunk size go to disk in a single append.
+
+        Args:
+            images: Image data dictionaries for this scan
+            scan_id: Identifier for the scan (generated if omitted)
+            timestamp: ISO 8601 scan time (now if omitted)
+
+        Returns:
+            The scan id the records were stamped with
+        """
+        scan_id = scan_id or new_scan_id()
+        timestamp = timestamp or utc_timestamp()
+
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # End a line torn by a crash, so the first record is not joined onto it
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                _write_all(fd, b"\n")
+            for chunk in self._encode(images, scan_id, timestamp):
+                _write_all(fd, chunk)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return scan_id
+
+    def write_scan(
+        self,
+        images: Iterable[Dict],
+        scan_id: Optional[str] = None,
+        timestamp: Optional[str] = None,
+    ) -> str:
+        """Replace the store contents with a single scan."""
+        scan_id = scan_id or new_scan_id()
+        timestamp = timestamp or utc_timestamp()
+        self._atomic_write(self._encode(images, scan_id, timestamp))
+        return scan_id
+
+    def _atomic_write(self, chunks: Iterable[bytes]) -> None:
+        """Write a new file next to the store and rename it into place."""
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            for chunk in chunks:
+                _write_all(fd, chunk)
+            os.fsync(fd)
+        except BaseException:
+            os.close(fd)
+            os.unlink(tmp_path)
+            raise
+        os.close(fd)
+        os.replace(tmp_path, self.path)
+
+    def migrate_legacy(self) -> int:
+        """
+        Convert a legacy JSON array file into JSON Lines in place.
+
+        Legacy records are stamped with the ``legacy`` scan id and the file's
+        modification time. This is a one-shot operation: once migrated, the
+        file is no longer recognized as legacy.
+
+        Returns:
+            Number of records migrated (0 if the file was not legacy)
+        """
+        if not is_legacy_file(self.path):
+            return 0
+
+        with open(self.path) as f:
+            existing = json.load(f)
+        if not isinstance(existing, list):
+            raise ValueError(f"{self.path} is not a JSON array")
+
+        mtime = datetime.datetime.fromtimestamp(
+            os.path.getmtime(self.path), datetime.timezone.utc
+        )
+        records = [image for image in existing if isinstance(image, dict)]
+        self._atomic_write(self._encode(records, LEGACY_SCAN_ID, utc_timestamp(mtime)))
+        return len(records)
+
+    def iter_records(
+        self,
+        scan_id: Optional[str] = None,
+        since: Optional[Union[str, datetime.datetime]] = None,
+        until: Optional[Union[str, datetime.datetime]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Stream records from the store one line at a time.
+
+        Sealed segments are read first, oldest first and decompressed on the
+        fly; segments sealed before ``since`` are skipped without being
+        opened.
+
+        Args:
+            scan_id: Only yield records from this scan
+            since: Only yield records at or after this time
+            until: Only yield records at or before this time
+
+        Yields:
+            Stored record dictionaries
+        """
+        if isinstance(since, datetime.datetime):
+            since = utc_timestamp(since)
+        if isinstance(until, datetime.datetime):
+            until = utc_timestamp(until)
+
+        paths = []
+        for path in self.segments():
+            stamp = self._segment_name.match(os.path.basename(path)).group(1)
+            if since is None or utc_timestamp(_parse_stamp(stamp)) >= since:
+                paths.append(path)
+        paths.append(self.path)
+
+        for path in paths:
+            try:
+                f = open_segment(path)
+            except FileNotFoundError:
+                # Pruned or sealed by another writer since it was listed
+                continue
+
+            with f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from an interrupted write is skipped
+                        continue
+                    if scan_id is not None and record.get("scan_id") != scan_id:
+                        continue
+                    timestamp = record.get("timestamp", "")
+                    if since is not None and timestamp < since:
+                        continue
+                    if until is not None and timestamp > until:
+                        continue
+                    yield record
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Streaming helpers for Container Image Inventory.
+
+Runtime output is consumed incrementally: subprocess stdout is read line by
+line as the process writes it, and JSON arrays are decoded one element at a
+time, so memory use does not grow with the size of the output.
+"""
+
+import codecs
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+from container_inventory.trace import TRACER
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_command_output(argv: List[str], timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Run a command and yield its stdout line by line as it is produced.
+
+    Stderr is spooled to a temporary file so a chatty process cannot block on
+    a full pipe.
+
+    Args:
+        argv: Command and arguments
+        timeout: Seconds after which the process is killed
+
+    Raises:
+        subprocess.TimeoutExpired: If the process was killed for running too long
+        subprocess.CalledProcessError: If the process exited non-zero
+    """
+    start = time.monotonic()
+    bytes_read = 0
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        timed_out = threading.Event()
+        timer = None
+        if timeout is not None:
+
+            def kill():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, kill)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            for line in process.stdout:
+                if TRACER.enabled:
+                    bytes_read += len(line.encode("utf-8"))
+                yield line
+            process.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            if TRACER.enabled:
+                error = f"exit status {process.returncode}" if process.returncode else None
+                TRACER.record_io(
+                    "command",
+                    " ".join(argv),
+                    time.monotonic() - start,
+                    bytes_read,
+                    "timed out" if timed_out.is_set() else error,
+                )
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(argv, timeout)
+        if process.returncode:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(
+                process.returncode, argv, stderr=stderr.read().decode("utf-8", "replace")
+            )
+
+
+def iter_json_lines(lines: Iterable[str]) -> Iterator[Any]:
+    """Decode newline-delimited JSON, skipping blank lines."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_array(chunks: Iterable[Union[str, bytes]]) -> Iterator[Any]:
+    """
+    Incrementally decode the elements of a top-level JSON array.
+
+    Args:
+        chunks: Pieces of the JSON document, as text or UTF-8 bytes (e.g.
+            lines of process output or fixed-size reads of a response)
+
+    Yields:
+        Each array element as soon as it has been fully read
+
+    Raises:
+        json.JSONDecodeError: If the input is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+
+        if pos < len(buffer):
+            char = buffer[pos]
+            if not started:
+                if char != "[":
+                    raise json.JSONDecodeError("Expected a JSON array", buffer, pos)
+                started = True
+                pos += 1
+                continue
+            if char == ",":
+                pos += 1
+                continue
+            if char == "]":
+                return
+
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Only a number ending exactly at the end of the buffer may be incomplete
+                if end < len(buffer) or eof or isinstance(element, (dict, list, str)):
+                    pos = end
+                    yield element
+                    continue
+        elif eof:
+            if not started:
+                return  # No output at all is treated as an empty array
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+
+        # Read more input and drop what has already been consumed
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            chunk = utf8.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buffer = buffer[pos:] + chunk
+        pos = 0
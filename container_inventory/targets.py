@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Scan targets for Container Image Inventory.
+
+A target names one container runtime on one host. Targets are written as::
+
+    [NAME=][RUNTIME+]ENDPOINT
+
+where RUNTIME is 'docker' (the default) or 'podman' and ENDPOINT is one of:
+
+- ``unix:///path/to/api.sock``: the runtime's API socket
+- ``tcp://host:port`` or ``ssh://[user@]host``: a ``DOCKER_HOST``-style
+  endpoint, passed to ``docker -H`` or ``podman --url``
+- ``connection:NAME``: a named docker context or podman system connection
+- ``ssh:[user@]host``: run the runtime CLI on the host over ssh
+
+NAME tags the target's images in a fleet inventory and defaults to the
+endpoint's host name. It is made of letters, digits, '.', '_' and '-'; a
+target whose text before the first '=' is not such a name (an ssh option or
+a URL query, say) is read whole as the endpoint.
+"""
+
+import re
+import shlex
+from typing import List, Optional
+from urllib.parse import urlparse
+
+TARGET_RUNTIMES = ("docker", "podman")
+URL_SCHEMES = ("unix", "tcp", "ssh")
+
+# Options that keep a batch ssh session from prompting for anything
+SSH_OPTIONS = ["-o", "BatchMode=yes"]
+
+TARGET_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+class Target:
+    """One container runtime endpoint to scan."""
+
+    def __init__(self, name: str, runtime: str, kind: str, endpoint: str):
+        """
+        Initialize the target.
+
+        Args:
+            name: Host name the target's images are tagged with
+            runtime: 'docker' or 'podman'
+            kind: 'url', 'connection' or 'ssh'
+            endpoint: URL, connection name or ssh destination
+        """
+        self.name = name
+        self.runtime = runtime
+        self.kind = kind
+        self.endpoint = endpoint
+
+    def socket_path(self) -> Optional[str]:
+        """Return the API socket path of a ``unix://`` target."""
+        if self.kind == "url" and self.endpoint.startswith("unix://"):
+            return self.endpoint[len("unix://") :]
+        return None
+
+    def command(self, args: List[str]) -> List[str]:
+        """
+        Build the command line that runs the runtime CLI against this target.
+
+        Args:
+            args: Runtime subcommand and arguments, e.g. ``["images", ...]``
+
+        Returns:
+            The full argv
+        """
+        if self.kind == "ssh":
+            remote = " ".join(shlex.quote(arg) for arg in [self.runtime] + args)
+            return ["ssh"] + SSH_OPTIONS + [self.endpoint, remote]
+        if self.kind == "connection":
+            option = "--context" if self.runtime == "docker" else "--connection"
+        else:
+            option = "-H" if self.runtime == "docker" else "--url"
+        return [self.runtime, option, self.endpoint] + args
+
+    def __repr__(self) -> str:
+        return f"Target({self.name!r}, {self.runtime}+{self.kind}:{self.endpoint})"
+
+
+def parse_target(spec: str) -> Target:
+    """
+    Parse a target specification.
+
+    Args:
+        spec: Target in ``[NAME=][RUNTIME+]ENDPOINT`` form
+
+    Returns:
+        The parsed target
+
+    Raises:
+        ValueError: If the specification is not understood
+    """
+    spec = spec.strip()
+    name, equals, rest = spec.partition("=")
+    if not (equals and TARGET_NAME.fullmatch(name)):
+        name, rest = "", spec
+    runtime = "docker"
+    prefix, plus, endpoint = rest.partition("+")
+    if plus and prefix in TARGET_RUNTIMES:
+        runtime = prefix
+    else:
+        endpoint = rest
+
+    if endpoint.startswith("connection:"):
+        kind, endpoint = "connection", endpoint[len("connection:") :]
+        default_name = endpoint
+    elif endpoint.startswith("ssh:") and not endpoint.startswith("ssh://"):
+        kind, endpoint = "ssh", endpoint[len("ssh:") :]
+        default_name = endpoint.rpartition("@")[2]
+    else:
+        url = urlparse(endpoint)
+        if url.scheme not in URL_SCHEMES:
+            raise ValueError(f"Unsupported target: {spec!r}")
+        kind = "url"
+        default_name = url.hostname or "localhost"
+
+    if not endpoint:
+        raise ValueError(f"Target has no endpoint: {spec!r}")
+    return Target(name or default_name, runtime, kind, endpoint)
+
+
+def load_targets(path: str) -> List[Target]:
+    """Read target specifications from a file, one per line; '#' starts a comment."""
+    targets = []
+    with open(path) as f:
+        for line in f:
+            line = line.partition("#")[0].strip()
+            if line:
+                targets.append(parse_target(line))
+    return targets
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Scan instrumentation for Container Image Inventory.
+
+``TRACER`` collects how long each phase of a run took (runtime probing,
+fetching each runtime, enrichment, saving, table rendering...), the wall
+time and output size of every runtime command and API request, counters
+such as records parsed per runtime, and the peak RSS of the process and its
+children. It is disabled by default, so instrumented code costs one
+attribute check; ``--trace`` enables it and writes the result as a JSON
+document or as structured journald fields.
+
+``profiled`` wraps a run in cProfile and tracemalloc for ``--profile``.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Destination of --trace that sends the trace to the systemd journal
+JOURNAL = "journal"
+
+JOURNAL_SOCKET = "/run/systemd/journal/socket"
+
+# I/O events kept in a trace; later ones are only counted in the totals
+MAX_IO_EVENTS = 1000
+
+# Lines of each section of the --profile report
+PROFILE_TOP = 30
+
+
+def peak_rss() -> Dict[str, int]:
+    """Return the peak RSS of this process and of its waited-for children, in bytes."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return {}
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+class Tracer:
+    """Per-phase timers, I/O records and counters for one run."""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard everything recorded so far and restart the clock."""
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.io: List[Dict] = []
+        self.io_totals: Dict[str, Dict[str, float]] = {}
+
+    def enable(self) -> None:
+        """Start recording, from now on."""
+        self.reset()
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a phase of the run.
+
+        A phase entered several times (or from several threads) accumulates
+        its time and number of calls.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - start)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        """Record one call of a phase timed by the caller."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += seconds
+            entry["calls"] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_io(
+        self,
+        kind: str,
+        target: str,
+        seconds: float,
+        bytes_read: int,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Record a finished runtime command or API request.
+
+        Args:
+            kind: 'command' or 'api'
+            target: Command line or request path
+            seconds: Wall time from start to the end of its output
+            bytes_read: Bytes of output read
+            error: Why it failed, if it did
+        """
+        if not self.enabled:
+            return
+        event = {
+            "kind": kind,
+            "target": target,
+            "offset": round(time.monotonic() - self._start - seconds, 6),
+            "seconds": round(seconds, 6),
+            "bytes": bytes_read,
+        }
+        if error:
+            event["error"] = error
+        with self._lock:
+            totals = self.io_totals.setdefault(kind, {"count": 0, "seconds": 0.0, "bytes": 0})
+            totals["count"] += 1
+            totals["seconds"] += seconds
+            totals["bytes"] += bytes_read
+            if len(self.io) < MAX_IO_EVENTS:
+                self.io.append(event)
+
+    def report(self) -> Dict:
+        """Return the trace as a JSON-serializable dictionary."""
+        with self._lock:
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+                "duration": round(time.monotonic() - self._start, 6),
+                "pid": os.getpid(),
+                "phases": {
+                    name: {"seconds": round(entry["seconds"], 6), "calls": entry["calls"]}
+                    for name, entry in sorted(self.phases.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "io_totals": {
+                    kind: dict(totals, seconds=round(totals["seconds"], 6))
+                    for kind, totals in sorted(self.io_totals.items())
+                },
+                "io": list(self.io),
+                "peak_rss": peak_rss(),
+            }
+
+    def write(self, destination: str) -> None:
+        """
+        Write the trace.
+
+        Args:
+            destination: A file path, ``-`` for stderr, or ``journal`` for
+                structured fields in the systemd journal
+
+        Raises:
+            OSError: If the trace could not be written
+        """
+        report = self.report()
+        if destination == JOURNAL:
+            if not journal_send(journal_fields(report)):
+                raise OSError(f"could not write to the journal socket {JOURNAL_SOCKET}")
+        elif destination == "-":
+            json.dump(report, sys.stderr, indent=2)
+            sys.stderr.write("\n")
+        else:
+            with open(destination, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+
+
+def _field_name(name: str) -> str:
+    """Turn a phase or counter name into a journal field name."""
+    return "".join(char if char.isalnum() else "_" for char in name.upper())
+
+
+def journal_fields(report: Dict) -> Dict[str, str]:
+    """
+    Flatten a trace into journal fields.
+
+    Totals get a field each (``PHASE_FETCH_DOCKER_SECONDS``,
+    ``COUNTER_RECORDS_PODMAN``, ``PEAK_RSS_SELF_BYTES``...) so they can be
+    filtered on with ``journalctl``; the full trace is in ``TRACE``.
+    """
+    fields = {
+        "MESSAGE": f"container-inventory run took {report['duration']:.3f}s",
+        "SYSLOG_IDENTIFIER": "container-inventory",
+        "PRIORITY": "6",
+        "DURATION_SECONDS": f"{report['duration']:.6f}",
+    }
+    for name, entry in report["phases"].items():
+        fields[f"PHASE_{_field_name(name)}_SECONDS"] = f"{entry['seconds']:.6f}"
+    for name, value in report["counters"].items():
+        fields[f"COUNTER_{_field_name(name)}"] = str(value)
+    for kind, totals in report["io_totals"].items():
+        fields[f"{_field_name(kind)}_COUNT"] = str(totals["count"])
+        fields[f"{_field_name(kind)}_SECONDS"] = f"{totals['seconds']:.6f}"
+        fields[f"{_field_name(kind)}_BYTES"] = str(totals["bytes"])
+    for name, value in report["peak_rss"].items():
+        fields[f"PEAK_RSS_{_field_name(name)}_BYTES"] = str(value)
+    fields["TRACE"] = json.dumps(report, separators=(",", ":"))
+    return fields
+
+
+def journal_send(fields: Dict[str, str], address: str = JOURNAL_SOCKET) -> bool:
+    """
+    Send one entry to the systemd journal over its native protocol.
+
+    Returns:
+        True if the entry was sent
+    """
+    import socket
+
+    message = bytearray()
+    for name, value in fields.items():
+        data = str(value).encode("utf-8")
+        if b"\n" in data:
+            # Multi-line values are sent as the name, a newline, a 64-bit length and the data
+            message += name.encode() + b"\n" + len(data).to_bytes(8, "little") + data + b"\n"
+        else:
+            message += name.encode() + b"=" + data + b"\n"
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(bytes(message), address)
+        return True
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def profiled(path: str) -> Iterator[None]:
+    """
+    Run a block under cProfile and tracemalloc.
+
+    The profile is written to ``path`` (readable with ``pstats`` or
+    snakeviz), and a text report of the slowest functions and the largest
+    allocation sites to ``path + '.txt'``.
+    """
+    # Only needed with --profile, so kept off the start-up path
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        report.write(f"Traced memory: {current} bytes at exit, {peak} bytes at peak\n\n")
+        report.write(f"Top {PROFILE_TOP} allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+            report.write(f"{stat}\n")
+        with open(path + ".txt", "w") as f:
+            f.write(report.getvalue())
+
+
+# Tracer shared by all modules of a run
+TRACER = Tracer()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Image-to-container usage mapping for Container Image Inventory.
+
+All containers of a runtime, running or stopped, are listed with a single
+``ps -a`` call (or one API request) and indexed by image ID; ``docker ps``
+does not print image IDs, so the docker CLI reads them for all containers
+with one batched ``container inspect``. Image records
+are annotated with how many containers use them as they stream past, and
+the images no container uses, with the bytes removing them would free, are
+reported without any per-image or per-container call.
+"""
+
+import json
+import subprocess
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from container_inventory.colors import Colors
+from container_inventory.discovery import RuntimeAPIError
+from container_inventory.image_inspect import INSPECT_BATCH_SIZE, short_id
+from container_inventory.models import ImageRecord
+from container_inventory.streaming import iter_command_output, iter_json_array, iter_json_lines
+
+PS_FORMATS = {
+    "docker": ["--no-trunc", "--format", "{{json .}}"],
+    "podman": ["--format", "json"],
+}
+
+# docker ps has no image ID field, so it is read for all containers at once
+DOCKER_IMAGE_IDS = ["container", "inspect", "--format", "{{.Id}} {{.Image}}"]
+
+
+class ContainerUsage:
+    """Containers of each runtime, indexed by the ID of the image they run."""
+
+    def __init__(self, inventory):
+        """
+        Initialize the usage index.
+
+        Args:
+            inventory: ContainerInventory whose runtimes are listed
+        """
+        self.inventory = inventory
+        self.containers: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+        self.images: Dict[Tuple[str, str], ImageRecord] = {}
+        # Errors of the runtimes whose containers could not be listed
+        self.failed: Dict[str, str] = {}
+
+    def _list_raw(self, runtime: str) -> List[Dict]:
+        """List every container of a runtime, as the runtime reports it."""
+        client = self.inventory._api_client(runtime)
+        if client is not None:
+            try:
+                # Read in full, so a listing that fails part way through is not
+                # counted twice with the CLI's
+                return list(client.iter_containers())
+            except RuntimeAPIError as e:
+                print(f"{Colors.YELLOW}Warning: {e}; falling back to {runtime} CLI{Colors.RESET}")
+
+        argv = self.inventory._runtime_command(runtime, ["ps", "-a"] + PS_FORMATS[runtime])
+        lines = iter_command_output(argv, timeout=self.inventory._runtime_timeout(runtime))
+        if runtime == "podman":
+            return list(iter_json_array(lines))
+
+        containers = list(iter_json_lines(lines))
+        image_ids = {}
+        for start in range(0, len(containers), INSPECT_BATCH_SIZE):
+            ids = [str(raw.get("ID", "")) for raw in containers[start : start + INSPECT_BATCH_SIZE]]
+            for line in self._inspect_image_ids(runtime, ids):
+                container_id, _, image_id = line.strip().partition(" ")
+                image_ids[short_id(container_id)] = image_id
+        return [
+            dict(raw, ImageID=image_ids.get(short_id(str(raw.get("ID", ""))), ""))
+            for raw in containers
+        ]
+
+    def _inspect_image_ids(self, runtime: str, ids: List[str]) -> List[str]:
+        """
+        Read the image IDs of a batch of docker containers.
+
+        Containers removed since they were listed are left out; docker still
+        prints the others and only then fails with "No such container".
+        """
+        argv = self.inventory._runtime_command(runtime, DOCKER_IMAGE_IDS + ids)
+        timeout = self.inventory._runtime_timeout(runtime)
+        lines: List[str] = []
+        try:
+            for line in iter_command_output(argv, timeout=timeout):
+                lines.append(line)
+        except subprocess.CalledProcessError as e:
+            errors = [line for line in str(e.stderr or "").splitlines() if line.strip()]
+            if not errors or not all("no such container" in line.lower() for line in errors):
+                raise
+        return lines
+
+    def load(self, runtimes: Optional[Iterable[str]] = None) -> int:
+        """
+        List the containers of each runtime once and index them by image.
+
+        Args:
+            runtimes: Runtimes to list (default: those selected for the inventory)
+
+        Returns:
+            Number of containers found
+        """
+        count = 0
+        for runtime in runtimes or self.inventory._selected_runtimes():
+            try:
+                containers = self._list_raw(runtime)
+            except subprocess.CalledProcessError as e:
+                self.failed[runtime] = str(e.stderr).strip()
+            except (subprocess.TimeoutExpired, json.JSONDecodeError, OSError) as e:
+                self.failed[runtime] = str(e)
+            else:
+                for raw in containers:
+                    self._add(runtime, raw)
+                count += len(containers)
+                continue
+            print(
+                f"{Colors.YELLOW}Warning: could not list {runtime} containers: "
+                f"{self.failed[runtime]}{Colors.RESET}"
+            )
+        return count
+
+    def _add(self, runtime: str, raw: Dict) -> None:
+        """Index one container by the ID of its image."""
+        names = raw.get("Names") or []
+        if isinstance(names, str):
+            names = names.split(",")
+        image_id = short_id(str(raw.get("ImageID") or raw.get("ImageId") or ""))
+        if not image_id:
+            return
+        self.containers[(runtime, image_id)].append(
+            {
+                "id": short_id(str(raw.get("Id") or raw.get("ID") or "")),
+                "name": ",".join(str(name).lstrip("/") for name in names),
+                "state": str(raw.get("State") or "").lower(),
+            }
+        )
+
+    def annotate(self, images: Iterable[ImageRecord]) -> Iterator[ImageRecord]:
+        """
+        Set ``containers`` and ``running`` on image records as they stream past.
+
+        The records are remembered for ``unused``. Images of a runtime whose
+        containers could not be listed are left with unknown (None) counts.
+        """
+        for image in images:
+            if image.source in self.failed:
+                yield image
+                continue
+            containers = self.containers.get((image.source, image.id), [])
+            image.containers = len(containers)
+            image.running = sum(1 for container in containers if container["state"] == "running")
+            self.images.setdefault((image.source, image.id), image)
+            yield image
+
+    def unused(self) -> Tuple[List[ImageRecord], int]:
+        """
+        Find the annotated images that no container uses.
+
+        Images of runtimes whose containers could not be listed are never
+        reported, as whether they are used is not known.
+
+        Returns:
+            One record per unused image, largest first, and the bytes their
+            removal would free. Sizes are as listed, so layers an unused
+            image shares with a used one are counted too.
+        """
+        unused = [image for key, image in self.images.items() if not self.containers.get(key)]
+        unused.sort(key=lambda image: (-image.size, image.repository))
+        return unused, sum(image.size for image in unused)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Vulnerability and SBOM scanning for Container Image Inventory.
+
+An optional stage runs a local scanner command (trivy, grype, syft or any
+command printing JSON) over the listed images and adds a summary of its
+findings to each record as ``security``: the scanner name and counts per
+severity (or the number of packages for an SBOM).
+
+Scanning is expensive, so:
+
+- results are cached by scanner and image digest (or runtime and image ID
+  when the digest is not known). Both are content addresses, so an image
+  is scanned once, whatever tags it gets, until its result is older than
+  the maximum age (the scanner's database has moved on).
+- each image is scanned once per run, however many tags it has.
+- a bounded pool of workers runs at most ``workers`` scanner processes at
+  a time, each killed after ``timeout`` seconds.
+- a priority queue hands out images never scanned before first; stale
+  results are rescanned oldest first, and only while the run's time budget
+  lasts. Images left over keep their cached result and are rescanned on a
+  later run.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from container_inventory.cache import JsonCache
+from container_inventory.colors import Colors
+from container_inventory.defaults import (
+    DEFAULT_SCAN_BUDGET,
+    DEFAULT_SCAN_MAX_AGE,
+    DEFAULT_SCAN_TIMEOUT,
+    DEFAULT_SCAN_WORKERS,
+    DEFAULT_SCANNER,
+    SCANNERS,
+)
+from container_inventory.models import ImageRecord
+from container_inventory.trace import TRACER
+
+# Cache file of scan summaries by scanner and image
+SCAN_CACHE = "vulnerabilities.json"
+
+# Cache entries kept, counting images no longer present
+DEFAULT_CACHE_ENTRIES = 10000
+
+# Queue priorities: images never scanned before go first
+PRIORITY_NEW = 0
+PRIORITY_STALE = 1
+
+SEVERITIES = ("critical", "high", "medium", "low", "negligible", "unknown")
+
+
+def scanner_command(scanner: str) -> Tuple[str, str]:
+    """
+    Resolve a scanner name or command template.
+
+    Args:
+        scanner: A name from ``SCANNERS``, or a command line containing
+            ``{image}`` (and optionally ``{runtime}`` and ``{id}``)
+
+    Returns:
+        A (name, command template) tuple; a custom command is named after
+        its program
+
+    Raises:
+        ValueError: If a custom command has no ``{image}`` or ``{id}`` placeholder
+    """
+    if scanner in SCANNERS:
+        return scanner, SCANNERS[scanner]
+    if "{image}" not in scanner and "{id}" not in scanner:
+        known = ", ".join(SCANNERS)
+        raise ValueError(
+            f"Unknown scanner {scanner!r}: use one of {known} or a command with {{image}}"
+        )
+    import shlex
+
+    return os.path.basename(shlex.split(scanner)[0]), scanner
+
+
+def summarize(report: Dict) -> Dict:
+    """
+    Reduce a scanner's JSON report to counts.
+
+    Understands trivy (``Results``), grype (``matches``) and syft
+    (``artifacts``) reports.
+
+    Returns:
+        ``total`` and counts per lower-case severity for vulnerability
+        reports, or ``packages`` for an SBOM
+    """
+    severities: List[str] = []
+    if isinstance(report.get("Results"), list):
+        for result in report["Results"]:
+            for vulnerability in (result or {}).get("Vulnerabilities") or []:
+                severities.append(str(vulnerability.get("Severity") or "unknown"))
+    elif isinstance(report.get("matches"), list):
+        for match in report["matches"]:
+            severities.append(str((match.get("vulnerability") or {}).get("severity") or "unknown"))
+    elif isinstance(report.get("artifacts"), list):
+        return {"packages": len(report["artifacts"])}
+    else:
+        raise ValueError("unrecognized scanner report")
+
+    summary = {"total": len(severities)}
+    for severity in severities:
+        key = severity.lower()
+        summary[key] = summary.get(key, 0) + 1
+    return summary
+
+
+def image_reference(image: ImageRecord) -> str:
+    """Return the name to scan an image by: its repository:tag, or its ID if untagged."""
+    if image.repository != "<none>" and image.tag != "<none>":
+        return f"{image.repository}:{image.tag}"
+    return image.id
+
+
+class VulnerabilityScanner:
+    """Run a scanner command over images, scanning each image only when needed."""
+
+    def __init__(
+        self,
+        scanner: str = DEFAULT_SCANNER,
+        workers: int = DEFAULT_SCAN_WORKERS,
+        timeout: float = DEFAULT_SCAN_TIMEOUT,
+        budget: float = DEFAULT_SCAN_BUDGET,
+        max_age: float = DEFAULT_SCAN_MAX_AGE,
+        cache: Optional[JsonCache] = None,
+        max_entries: int = DEFAULT_CACHE_ENTRIES,
+        reports_dir: Optional[str] = None,
+    ):
+        """
+        Initialize the scanner.
+
+        Args:
+            scanner: Scanner name or command template (see ``scanner_command``)
+            workers: Scanner processes run at the same time
+            timeout: Seconds each scanner process may run
+            budget: Seconds from the start of a scan after which no more
+                stale results are rescanned (new images are still scanned)
+            max_age: Seconds after which a cached result is stale
+            cache: Cache of scan summaries (default: vulnerabilities.json
+                in the cache directory)
+            max_entries: Cache size limit; images no longer present are
+                evicted, least recently seen first, once it is reached
+            reports_dir: Also keep each scanner's full JSON report here
+        """
+        self.name, self.command = scanner_command(scanner)
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.budget = budget
+        self.max_age = max_age
+        self.cache = cache or JsonCache(SCAN_CACHE)
+        self.max_entries = max_entries
+        self.reports_dir = reports_dir
+        # Outcome of the most recent scan
+        self.scanned = 0
+        self.cached = 0
+        self.deferred = 0
+        self.errors: Dict[str, str] = {}
+
+    def cache_key(self, image: ImageRecord) -> str:
+        """Return the content address an image's result is cached under."""
+        if image.digest:
+            return f"{self.name}:{image.digest}"
+        return f"{self.name}:{image.source}:{image.id}"
+
+    def argv(self, image: ImageRecord) -> List[str]:
+        """Build the scanner command line for an image."""
+        import shlex
+
+        fields = {"image": image_reference(image), "runtime": image.source, "id": image.id}
+        return [arg.format(**fields) for arg in shlex.split(self.command)]
+
+    def run(self, image: ImageRecord) -> Dict:
+        """
+        Scan one image.
+
+        Returns:
+            The summary of the scanner's report
+
+        Raises:
+            OSError, ValueError, subprocess.SubprocessError: If the scanner
+                could not run, failed or printed no usable report
+        """
+        argv = self.argv(image)
+        start = time.monotonic()
+        error = None
+        output = b""
+        try:
+            result = subprocess.run(
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=self.timeout,
+                check=False,
+            )
+            output = result.stdout
+            if result.returncode != 0:
+                stderr = result.stderr.decode(errors="replace").strip().splitlines()
+                error = f"exit status {result.returncode}"
+                raise ValueError(f"{error}: {stderr[-1] if stderr else ''}".rstrip(": "))
+            report = json.loads(output)
+        except subprocess.TimeoutExpired:
+            error = "timed out"
+            raise ValueError(f"timed out after {self.timeout:g}s")
+        finally:
+            seconds = time.monotonic() - start
+            TRACER.record_io("command", " ".join(argv), seconds, len(output), error)
+
+        if self.reports_dir:
+            os.makedirs(self.reports_dir, exist_ok=True)
+            name = self.cache_key(image).replace("/", "_").replace(":", "_")
+            with open(os.path.join(self.reports_dir, f"{name}.json"), "wb") as f:
+                f.write(output)
+        return summarize(report if isinstance(report, dict) else {})
+
+    def scan(self, images: Iterable[ImageRecord]) -> List[ImageRecord]:
+        """
+        Add scan summaries to image records.
+
+        Args:
+            images: Records to annotate; they are updated in place
+
+        Returns:
+            The records, in their original order
+        """
+        images = list(images)
+        entries = self.cache.load()
+        now = time.time()
+        start = time.monotonic()
+
+        # One queue entry per image, whatever the number of its tags
+        queue: List[Tuple[int, float, int, str, ImageRecord]] = []
+        queued = set()
+        order = itertools.count()
+        for image in images:
+            key = self.cache_key(image)
+            entry = entries.get(key)
+            if entry is not None:
+                entry["seen"] = now
+            if key in queued:
+                continue
+            if entry is None:
+                queued.add(key)
+                queue.append((PRIORITY_NEW, 0.0, next(order), key, image))
+            elif now - entry.get("scanned", 0) > self.max_age:
+                queued.add(key)
+                queue.append((PRIORITY_STALE, entry.get("scanned", 0), next(order), key, image))
+        heapq.heapify(queue)
+
+        self.scanned = 0
+        self.deferred = 0
+        self.errors = {}
+        lock = threading.Lock()
+
+        def worker() -> None:
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    priority, _, _, key, image = heapq.heappop(queue)
+                    if priority != PRIORITY_NEW and time.monotonic() - start > self.budget:
+                        # Out of time for rescans; the stale result stays
+                        self.deferred += 1
+                        continue
+                try:
+                    summary = self.run(image)
+                except (OSError, ValueError, subprocess.SubprocessError) as e:
+                    with lock:
+                        self.errors[image_reference(image)] = str(e)
+                    continue
+                with lock:
+                    entries[key] = {
+                        "security": dict(summary, scanner=self.name),
+                        "scanned": time.time(),
+                        "seen": now,
+                    }
+                    self.scanned += 1
+
+        threads = [
+            threading.Thread(target=worker, name="vulnscan", daemon=True)
+            for _ in range(min(self.workers, len(queue)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        TRACER.count("vulnscan.scanned", self.scanned)
+
+        present = set()
+        for image in images:
+            key = self.cache_key(image)
+            present.add(key)
+            entry = entries.get(key)
+            image.security = entry["security"] if entry else None
+        self.cached = len(present) - self.scanned - len(self.errors)
+        self.cache.save(self._evict(entries, present))
+        return images
+
+    def summary(self) -> str:
+        """Describe the outcome of the most recent scan."""
+        text = f"{self.scanned} images scanned with {self.name}, {self.cached} from cache"
+        if self.deferred:
+            text += f", {self.deferred} stale results kept (scan budget exhausted)"
+        return text
+
+    def _evict(self, entries: Dict[str, Dict], present: set) -> Dict[str, Dict]:
+        """Drop entries of images no longer present, oldest first, down to the size limit."""
+        if len(entries) <= self.max_entries:
+            return entries
+        absent = [key for key in entries if key not in present]
+        absent.sort(key=lambda key: entries[key].get("seen", 0))
+        for key in absent[: len(entries) - self.max_entries]:
+            del entries[key]
+        return entries
+
+
+def print_security_report(
+    images: Iterable[ImageRecord], scanner: VulnerabilityScanner, detail: bool = True
+) -> None:
+    """
+    Print the findings per image, most critical first.
+
+    Args:
+        images: Records annotated by ``scanner``
+        scanner: Scanner of the most recent scan
+        detail: List every image, not just the outcome and any errors
+    """
+    rows: Dict[str, Dict] = {}
+    for image in images:
+        if image.security is None:
+            continue  # Reported with the errors below
+        row = rows.get(scanner.cache_key(image))
+        if row is None:
+            counts = SEVERITIES + ("total", "packages")
+            row = rows[scanner.cache_key(image)] = {k: image.security.get(k, 0) for k in counts}
+            row["images"] = []
+        row["images"].append(image_reference(image))
+
+    ranked = sorted(
+        rows.values(),
+        key=lambda row: tuple(-row[k] for k in SEVERITIES[:4]) + (-row["packages"],),
+    )
+    print(f"\n{Colors.BOLD}Security scan{Colors.RESET} ({scanner.summary()})")
+    for row in ranked if detail else []:
+        if row["packages"] and not row["total"]:
+            counts = f"{row['packages']} packages"
+        else:
+            counts = ", ".join(f"{row[k]} {k}" for k in SEVERITIES if row[k]) or "no findings"
+        print(f"  {', '.join(row['images'])}: {counts}")
+    for reference, error in sorted(scanner.errors.items()):
+        print(f"{Colors.YELLOW}Warning: could not scan {reference}: {error}{Colors.RESET}")
@@ -19,6 +19,7 @@ tar -czf ${BUILD_DIR}/SOURCES/${PACKAGE_NAME}-${VERSION}.tar.gz -C /tmp/build-so
 cp ${SPEC_FILE} ${BUILD_DIR}/SPECS/
 cp /source/packaging/container-inventory.service ${BUILD_DIR}/SOURCES/
 cp /source/packaging/container-inventory.timer ${BUILD_DIR}/SOURCES/
+cp /source/packaging/container-inventory-daemon.service ${BUILD_DIR}/SOURCES/
 
 # Build RPM
 echo "Building RPM..."
@@ -0,0 +1,32 @@
+#!/bin/bash
+# Script to build a single-file zipapp of container-inventory
+#
+# The bundle holds the package with byte code compiled by the python3 that
+# builds it, so nothing is compiled at start-up. Build it with the same
+# python3 version as the hosts it will run on.
+
+set -e
+
+# Configuration
+SOURCE_DIR=$(cd "$(dirname "$0")/../.." && pwd)
+OUTPUT=${1:-${SOURCE_DIR}/packaging/packages/container-inventory.pyz}
+PYTHON=${PYTHON:-python3}
+BUILD_DIR=$(mktemp -d)
+trap 'rm -rf "${BUILD_DIR}"' EXIT
+
+echo "Building zipapp ${OUTPUT}"
+
+# Copy the package without stale byte code
+cp -r "${SOURCE_DIR}/container_inventory" "${BUILD_DIR}/"
+find "${BUILD_DIR}" -name __pycache__ -prune -exec rm -rf {} +
+
+# zipimport only reads .pyc files stored next to their sources (-b)
+"${PYTHON}" -m compileall -q -b "${BUILD_DIR}/container_inventory"
+
+mkdir -p "$(dirname "${OUTPUT}")"
+"${PYTHON}" -m zipapp "${BUILD_DIR}" \
+    --main "container_inventory.cli:main" \
+    --python "/usr/bin/env python3" \
+    --output "${OUTPUT}"
+
+echo "Zipapp built: ${OUTPUT}"
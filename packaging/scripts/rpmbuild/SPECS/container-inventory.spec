@@ -12,6 +12,7 @@ URL:            https://github.com/yourusername/container-inventory
 Source0:        %{srcname}-%{version}.tar.gz
 Source1:        container-inventory.service
 Source2:        container-inventory.timer
+Source3:        container-inventory-daemon.service
 
 BuildArch:      noarch
 BuildRequires:  python3
@@ -44,9 +45,10 @@ cp -r container_inventory %{buildroot}/usr/lib/container-inventory/
 # Install main executable
 install -D -m 0755 container-inventory %{buildroot}%{_bindir}/container-inventory
 
-# Install systemd service and timer
+# Install systemd service and timer, and the event-driven daemon unit
 install -D -m 0644 %{SOURCE1} %{buildroot}%{_unitdir}/container-inventory.service
 install -D -m 0644 %{SOURCE2} %{buildroot}%{_unitdir}/container-inventory.timer
+install -D -m 0644 %{SOURCE3} %{buildroot}%{_unitdir}/container-inventory-daemon.service
 
 %check
 # Only run tests if pytest is available, and don't fail the build if tests fail
@@ -63,6 +65,7 @@ fi
 %{_bindir}/container-inventory
 %{_unitdir}/container-inventory.service
 %{_unitdir}/container-inventory.timer
+%{_unitdir}/container-inventory-daemon.service
 
 %post
 %systemd_post container-inventory.service container-inventory.timer
@@ -70,10 +73,10 @@ fi
 mkdir -p /var/lib/container-inventory
 
 %preun
-%systemd_preun container-inventory.service container-inventory.timer
+%systemd_preun container-inventory.service container-inventory.timer container-inventory-daemon.service
 
 %postun
-%systemd_postun_with_restart container-inventory.service container-inventory.timer
+%systemd_postun_with_restart container-inventory.service container-inventory.timer container-inventory-daemon.service
 
 %changelog
 * Tue May 20 2025 Your Name <your.email@example.com> - 0.1.0-1
@@ -0,0 +1,154 @@
+"""
+Tests for the archive module of Container Inventory.
+"""
+
+import calendar
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from container_inventory.archive import RotationPolicy, compress_file, parse_duration
+from container_inventory.core import ContainerInventory
+from container_inventory.models import ImageRecord
+from container_inventory.store import InventoryStore
+
+
+def epoch(timestamp):
+    """Convert a store timestamp to seconds since the epoch."""
+    return calendar.timegm(time.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ"))
+
+
+class TestStoreRotation(unittest.TestCase):
+    """Tests for sealing, reading and pruning store segments."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "inventory.json")
+        self.store = InventoryStore(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def append(self, image_id, timestamp):
+        """Append a one-record scan."""
+        self.store.append_scan([{"ID": image_id}], image_id, timestamp)
+
+    def test_rotate_by_size(self):
+        """Test that a full store is sealed, compressed and still read in order."""
+        policy = RotationPolicy(max_bytes=1)
+        self.append("1", "2025-01-01T00:00:00Z")
+        sealed = self.store.rotate(policy, epoch("2025-01-01T00:00:01Z"))
+        self.assertEqual(sealed, f"{self.path}.20250101T000001Z.gz")
+        self.assertFalse(os.path.exists(self.path))
+
+        self.append("2", "2025-01-02T00:00:00Z")
+        self.store.rotate(policy, epoch("2025-01-02T00:00:01Z"))
+        self.append("3", "2025-01-03T00:00:00Z")
+
+        self.assertEqual(len(self.store.segments()), 2)
+        records = list(self.store.iter_records())
+        self.assertEqual([record["ID"] for record in records], ["1", "2", "3"])
+        since = list(self.store.iter_records(since="2025-01-02T00:00:00Z"))
+        self.assertEqual([record["ID"] for record in since], ["2", "3"])
+
+    def test_rotate_by_age(self):
+        """Test that a store is sealed once its first record is old enough."""
+        policy = RotationPolicy(max_age=parse_duration("7d"), compression="none")
+        self.append("1", "2025-01-01T00:00:00Z")
+        self.assertIsNone(self.store.rotate(policy, epoch("2025-01-07T00:00:00Z")))
+        sealed = self.store.rotate(policy, epoch("2025-01-08T00:00:00Z"))
+        self.assertEqual(sealed, f"{self.path}.20250108T000000Z")
+
+    def test_interrupted_compression(self):
+        """Test that a segment left both plain and compressed is read once."""
+        self.append("1", "2025-01-01T00:00:00Z")
+        sealed = f"{self.path}.20250101T000001Z"
+        os.rename(self.path, sealed)
+        shutil.copy(sealed, sealed + ".tmp")
+        compress_file(sealed + ".tmp", "gzip")
+        os.rename(sealed + ".tmp.gz", sealed + ".gz")
+
+        self.assertEqual(self.store.segments(), [sealed + ".gz"])
+        self.assertEqual(len(list(self.store.iter_records())), 1)
+
+        # Leftover plain segments are compressed on the next rotation
+        os.unlink(sealed + ".gz")
+        self.store.rotate(RotationPolicy(max_bytes=1))
+        self.assertEqual(self.store.segments(), [sealed + ".gz"])
+        with gzip.open(sealed + ".gz", "rt") as f:
+            self.assertEqual(json.loads(f.readline())["ID"], "1")
+
+    def test_prune(self):
+        """Test deleting segments beyond the count and age limits."""
+        policy = RotationPolicy(max_bytes=1)
+        for day in range(1, 5):
+            self.append(str(day), f"2025-01-0{day}T00:00:00Z")
+            self.store.rotate(policy, epoch(f"2025-01-0{day}T12:00:00Z"))
+
+        pruned = self.store.prune(RotationPolicy(keep=3))
+        self.assertEqual(pruned, "2025-01-01T12:00:00Z")
+        retention = RotationPolicy(retention=parse_duration("1d"))
+        self.store.prune(retention, epoch("2025-01-04T00:00:00Z"))
+        self.assertEqual([record["ID"] for record in self.store.iter_records()], ["3", "4"])
+        self.assertIsNone(self.store.prune(retention, epoch("2025-01-04T00:00:00Z")))
+
+    def test_parse_duration(self):
+        """Test parsing durations."""
+        self.assertEqual(parse_duration("90"), 90)
+        self.assertEqual(parse_duration("12h"), 12 * 3600)
+        with self.assertRaises(ValueError):
+            parse_duration("a week")
+
+
+class TestSaveInventoryRotation(unittest.TestCase):
+    """Tests for rotation as save_inventory writes."""
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_incremental_rotation(self, mock_check):
+        """Test that a new segment starts with a snapshot."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+        images = [ImageRecord(id="0123456789ab", repository="alpine", tag="latest")]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "inventory.json")
+            store = InventoryStore(output)
+            inventory.save_inventory(images, output, incremental=True)
+            inventory.save_inventory(
+                images, output, incremental=True, rotation=RotationPolicy(max_bytes=1)
+            )
+
+            self.assertEqual(len(store.segments()), 1)
+            records = list(store.iter_records())
+            self.assertEqual([record["change"] for record in records], ["snapshot", "snapshot"])
+
+            inventory.save_inventory(
+                images, output, incremental=True, rotation=RotationPolicy(keep=0)
+            )
+            self.assertEqual(store.segments(), [])
+            self.assertEqual(len(list(store.iter_records())), 1)
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_compact_json(self, mock_check):
+        """Test writing and appending to a JSON array without indentation."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+        images = [ImageRecord(id="123", repository="alpine", tag="latest")]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "inventory.json")
+            inventory.save_inventory(images, output, compact=True, index=False)
+            inventory.save_inventory(images, output, append=True, compact=True, index=False)
+            with open(output) as f:
+                content = f.read()
+            self.assertNotIn("\n", content)
+            self.assertEqual(len(json.loads(content)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,12 @@
 Tests for the CLI module of Container Inventory.
 """
 
+import subprocess
+import sys
 import unittest
 from unittest.mock import patch, MagicMock
 
-from container_inventory.cli import setup_cli, main
+from container_inventory.cli import DEFERRED_MODULES, setup_cli, main
 
 
 class TestCLI(unittest.TestCase):
@@ -32,6 +34,17 @@ class TestCLI(unittest.TestCase):
             self.assertTrue(args.append)
 
 
+    def test_max_rows_below_one(self):
+        """Test that table paging options below 1 are refused."""
+        for argv in (["--max-rows", "0"], ["--max-rows", "-5"], ["--page", "0"]):
+            with patch("sys.argv", ["container_inventory"] + argv), patch("sys.stderr"):
+                with self.assertRaises(SystemExit):
+                    setup_cli()
+
+        with patch("sys.argv", ["container_inventory", "--max-rows", "20", "--page", "2"]):
+            args = setup_cli()
+            self.assertEqual((args.max_rows, args.page), (20, 2))
+
     @patch("container_inventory.cli.ContainerInventory")
     @patch("container_inventory.cli.setup_cli")
     def test_main(self, mock_setup_cli, mock_inventory_class):
@@ -41,27 +54,70 @@ class TestCLI(unittest.TestCase):
         mock_args.type = "all"
         mock_args.output = None
         mock_args.append = False
+        mock_args.timeout = 120.0
+        mock_args.no_table = False
+        mock_args.targets = None
+        mock_args.targets_file = None
+        mock_args.daemon = False
+        mock_args.rotate_size = None
+        mock_args.rotate_age = None
+        mock_args.keep_segments = None
+        mock_args.retention = None
+        mock_args.compress = "gzip"
+        mock_args.layers = None
+        mock_args.enrich = False
+        mock_args.usage = False
+        mock_args.unused = False
+        mock_args.exporter = None
+        mock_args.trace = None
+        mock_args.profile = None
+        mock_args.push = None
+        mock_args.analyze = None
+        mock_args.list_analyzers = False
+        mock_args.vuln_scan = None
+        mock_args.schedule = False
 
         mock_setup_cli.return_value = mock_args
 
         mock_inventory = MagicMock()
-        mock_inventory.get_images.return_value = [
-            {"ID": "123", "Repository": "test", "Tag": "latest", "source": "docker"}
-        ]
+        mock_inventory.iter_images.return_value = iter(
+            [{"ID": "123", "Repository": "test", "Tag": "latest", "source": "docker"}]
+        )
         mock_inventory_class.return_value = mock_inventory
 
         # Test basic inventory display
         main()
 
         # Verify inventory was created with the correct type
-        mock_inventory_class.assert_called_with("all")
+        mock_inventory_class.assert_called_with("all", timeout=120.0)
 
         # Verify images were retrieved
-        mock_inventory.get_images.assert_called_once()
+        mock_inventory.iter_images.assert_called_once()
 
         # Verify inventory was displayed
         mock_inventory.display_inventory.assert_called_once()
 
+    @patch("container_inventory.fleet.FleetInventory")
+    def test_local_options_with_targets(self, mock_fleet):
+        """Test that options needing the local runtimes are refused before any host is scanned."""
+        for option in ("--enrich", "--vuln-scan", "--usage", "--unused", "--layers", "--daemon"):
+            argv = ["container_inventory", "--target", "ssh://web1", option]
+            with patch("sys.argv", argv), patch("builtins.print") as mock_print:
+                with self.assertRaises(SystemExit):
+                    main()
+            self.assertIn("cannot be used with targets", str(mock_print.call_args_list[-1]))
+        mock_fleet.assert_not_called()
+
+    def test_deferred_imports(self):
+        """Test that starting the CLI does not import modules only some options need."""
+        code = (
+            "import sys, container_inventory.cli; "
+            f"print(','.join(m for m in {list(DEFERRED_MODULES)!r} if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip(), "")
 
 
 if __name__ == "__main__":
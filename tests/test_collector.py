@@ -0,0 +1,204 @@
+"""
+Tests for the collector module of Container Inventory.
+"""
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from container_inventory.collector import (
+    FleetStore,
+    _ingest_handler,
+    iter_json_records,
+    push_inventory,
+)
+from container_inventory.exporter import http_server
+from container_inventory.models import ImageRecord
+
+
+def scan_records(scan_id, timestamp, images, change=None):
+    """Stored records of one scan."""
+    records = []
+    for image_id, repository, tag in images:
+        record = {
+            "ID": image_id,
+            "Repository": repository,
+            "Tag": tag,
+            "Size": "100B",
+            "source": "docker",
+            "scan_id": scan_id,
+            "timestamp": timestamp,
+        }
+        if change:
+            record["change"] = change
+        records.append(record)
+    return records
+
+
+class TestFleetStore(unittest.TestCase):
+    """Tests for the FleetStore class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = FleetStore(os.path.join(self.temp_dir, "fleet.db"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def hosts(self, **filters):
+        return sorted(row["host"] for row in self.store.hosts_with(**filters))
+
+    def test_ingest_dedupes_scans(self):
+        """Test that a scan is applied once and older scans are skipped."""
+        first = scan_records("s1", "2025-01-02T00:00:00Z", [("aaaaaaaaaaaa", "alpine", "3.19")])
+        self.assertEqual(self.store.ingest(first, "web1")["scans"], 1)
+        self.assertEqual(self.store.ingest(first, "web1"), {"records": 0, "scans": 0, "skipped": 1})
+
+        older = scan_records("s0", "2025-01-01T00:00:00Z", [("bbbbbbbbbbbb", "nginx", "1.25")])
+        self.assertEqual(self.store.ingest(older, "web1")["skipped"], 1)
+        self.assertEqual(self.hosts(repository="nginx"), [])
+        self.assertEqual(self.store.ingest(older, "web2")["scans"], 1)
+
+        self.assertEqual(self.hosts(repository="alpine", tag="3.19"), ["web1"])
+        self.assertEqual(self.hosts(image_id="sha256:bbbbbbbbbbbbcccc"), ["web2"])
+        self.assertEqual(
+            self.store.summary(), {"hosts": 2, "images": 2, "references": 2, "scans": 2}
+        )
+
+    def test_snapshot_replaces_host_images(self):
+        """Test that a full scan replaces the host's images and deltas are applied."""
+        self.store.ingest(
+            scan_records(
+                "s1",
+                "2025-01-01T00:00:00Z",
+                [("aaaaaaaaaaaa", "alpine", "3.19"), ("bbbbbbbbbbbb", "nginx", "1.25")],
+            ),
+            "web1",
+        )
+        self.store.ingest(
+            scan_records("s2", "2025-01-02T00:00:00Z", [("aaaaaaaaaaaa", "alpine", "3.19")]),
+            "web1",
+        )
+        self.assertEqual(self.hosts(repository="nginx"), [])
+
+        self.store.ingest(
+            scan_records(
+                "s3", "2025-01-03T00:00:00Z", [("aaaaaaaaaaaa", "alpine", "latest")], "retagged"
+            )
+            + scan_records("s3", "2025-01-03T00:00:00Z", [("cccccccccccc", "redis", "7")], "added"),
+            "web1",
+        )
+        tags = sorted(row["tag"] for row in self.store.hosts_with(repository="alpine"))
+        self.assertEqual(tags, ["latest"])
+        self.assertEqual(self.hosts(repository="redis"), ["web1"])
+
+        self.store.ingest(
+            scan_records("s4", "2025-01-04T00:00:00Z", [("cccccccccccc", "redis", "7")], "removed"),
+            "web1",
+        )
+        self.assertEqual(self.hosts(repository="redis"), [])
+
+    def test_image_bytes(self):
+        """Test that image bytes are multiplied by the hosts holding the image."""
+        for host in ("web1", "web2"):
+            self.store.ingest(
+                scan_records("s1", "2025-01-01T00:00:00Z", [("aaaaaaaaaaaa", "alpine", "3.19")]),
+                host,
+            )
+        rows = list(self.store.image_bytes())
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["hosts"], rows[0]["bytes"]), (2, 200))
+
+    def test_pull(self):
+        """Test pulling a directory tree, naming hosts after their directories."""
+        root = os.path.join(self.temp_dir, "hosts")
+        for host, repository in (("web1", "alpine"), ("web2", "nginx")):
+            os.makedirs(os.path.join(root, host))
+            records = scan_records(
+                "s1", "2025-01-01T00:00:00Z", [("aaaaaaaaaaaa", repository, "latest")]
+            )
+            with open(os.path.join(root, host, "inventory.json"), "w") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+        with open(os.path.join(root, "web2", "legacy.json"), "w") as f:
+            json.dump([{"ID": "bbbbbbbbbbbb", "Repository": "redis", "Tag": "7"}], f, indent=2)
+
+        totals = self.store.pull(root, "*.json")
+        self.assertEqual((totals["files"], totals["scans"]), (3, 3))
+        self.assertEqual(self.hosts(repository="alpine"), ["web1"])
+        self.assertEqual(self.hosts(repository="redis"), ["web2"])
+
+        # Unchanged files are not read again
+        self.assertEqual(self.store.pull(root, "*.json")["records"], 0)
+
+
+class TestCollectorServer(unittest.TestCase):
+    """Tests for pushing inventories to the collector."""
+
+    def test_push(self):
+        """Test a chunked push through the HTTP ingest endpoint."""
+        temp_dir = tempfile.mkdtemp()
+        store = FleetStore(os.path.join(temp_dir, "fleet.db"))
+        server = http_server(("127.0.0.1", 0), _ingest_handler(store))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/ingest"
+            images = [ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", size=100)]
+            counts = push_inventory(images, url, host="web1")
+            self.assertEqual(counts, {"records": 1, "scans": 1, "skipped": 0})
+            hosts = [row["host"] for row in store.hosts_with(repository="alpine")]
+            self.assertEqual(hosts, ["web1"])
+
+            request = urllib.request.Request(url, data=b"{not json", method="POST")
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                urllib.request.urlopen(request)
+            self.assertEqual(raised.exception.code, 400)
+        finally:
+            server.shutdown()
+            server.server_close()
+            store.close()
+            shutil.rmtree(temp_dir)
+
+    def test_stalled_push(self):
+        """Test that a client stalling mid-body neither blocks other pushes nor its thread."""
+        temp_dir = tempfile.mkdtemp()
+        store = FleetStore(os.path.join(temp_dir, "fleet.db"))
+        server = http_server(("127.0.0.1", 0), _ingest_handler(store, request_timeout=1))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stalled = socket.create_connection(server.server_address[:2])
+        try:
+            stalled.sendall(
+                b"POST /ingest?host=slow HTTP/1.1\r\nContent-Length: 1000\r\n\r\n"
+                b'{"ID": "bbbbbbbbbbbb", "Repository": "nginx"'
+            )
+            url = f"http://127.0.0.1:{server.server_address[1]}/ingest"
+            images = [ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", size=100)]
+            counts = push_inventory(images, url, host="web1", timeout=5)
+            self.assertEqual(counts["records"], 1)
+
+            stalled.settimeout(5)
+            self.assertIn(b" 408 ", stalled.recv(4096))
+            self.assertEqual(store.summary()["hosts"], 1)
+        finally:
+            stalled.close()
+            server.shutdown()
+            server.server_close()
+            store.close()
+            shutil.rmtree(temp_dir)
+
+    def test_iter_json_records(self):
+        """Test decoding JSON arrays and JSON Lines split across chunks."""
+        array = [b"  [{\"ID\": \"a\"}", b", {\"ID\": \"b\"}]"]
+        lines = [b"{\"ID\": \"a\"}\n{\"I", b"D\": \"b\"}\n"]
+        for chunks in (array, lines):
+            self.assertEqual([r["ID"] for r in iter_json_records(chunks)], ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for the columnar module of Container Inventory.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from container_inventory import columnar
+from container_inventory.columnar import (
+    ImageColumns,
+    aggregate,
+    export_row,
+    iter_history_rows,
+    write_rows,
+)
+from container_inventory.models import ImageRecord
+from container_inventory.store import InventoryStore
+
+
+def scanned_images():
+    """Two tags of one docker image, one larger docker image and one podman image."""
+    return [
+        ImageRecord(
+            id="aaaaaaaaaaaa",
+            repository="alpine",
+            tag="3.19",
+            size=100,
+            source="docker",
+            created=1700000000,
+            labels={"team": "a"},
+        ),
+        ImageRecord(
+            id="aaaaaaaaaaaa", repository="alpine", tag="latest", size=100, source="docker"
+        ),
+        ImageRecord(id="cccccccccccc", repository="alpine", tag="edge", size=400, source="docker"),
+        ImageRecord(id="bbbbbbbbbbbb", repository="nginx", size=50, source="podman", host="web1"),
+    ]
+
+
+class TestColumnar(unittest.TestCase):
+    """Tests for columnar exports and aggregation."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_export_row(self):
+        """Test that rows carry integer sizes, UTC times and the scan."""
+        row = export_row(scanned_images()[0], "s1", "2025-01-01T00:00:00Z")
+        self.assertEqual(row["size"], 100)
+        self.assertEqual(row["created"], "2023-11-14T22:13:20Z")
+        self.assertEqual((row["scan_id"], row["timestamp"]), ("s1", "2025-01-01T00:00:00Z"))
+        self.assertEqual(list(row), list(columnar.COLUMNS))
+
+        stored = {"ID": "a", "Size": "1.5KB", "scan_id": "s2", "change": "added"}
+        row = export_row(stored, "ignored")
+        self.assertEqual((row["size"], row["scan_id"], row["change"]), (1500, "s2", "added"))
+
+    def test_round_trip(self):
+        """Test that CSV and NDJSON exports read back with their types."""
+        rows = [export_row(image, "s1", "2025-01-01T00:00:00Z") for image in scanned_images()]
+        for output_format in ("csv", "ndjson"):
+            path = os.path.join(self.temp_dir, f"scan.{output_format}")
+            self.assertEqual(write_rows(iter(rows[:2]), path, output_format), 2)
+            self.assertEqual(write_rows(iter(rows[2:]), path, output_format, append=True), 2)
+
+            table = ImageColumns.read(path)
+            self.assertEqual(list(table.size), [100, 100, 400, 50])
+            self.assertEqual(table.column("labels")[0], {"team": "a"})
+            self.assertEqual(table.column("host")[3], "web1")
+
+        with open(os.path.join(self.temp_dir, "scan.csv")) as f:
+            self.assertEqual(sum(1 for line in f if line.startswith("scan_id,")), 1)
+
+    def test_aggregate(self):
+        """Test per-group counts, totals, averages and largest images."""
+        table = ImageColumns.from_rows(scanned_images())
+        groups = aggregate(table, ["repository"])
+        self.assertEqual([group["repository"] for group in groups], ["alpine", "nginx"])
+        self.assertEqual(
+            {key: groups[0][key] for key in ("images", "bytes", "average", "largest")},
+            {"images": 3, "bytes": 600, "average": 200, "largest": 400},
+        )
+        self.assertEqual(groups[0]["largest_image"], "alpine:edge")
+
+        groups = aggregate(table, ["source", "host"], limit=1)
+        self.assertEqual(len(groups), 1)
+        self.assertEqual((groups[0]["source"], groups[0]["host"]), ("docker", ""))
+
+        with self.assertRaises(ValueError):
+            aggregate(table, ["size"])
+        self.assertEqual(aggregate(ImageColumns(), ["repository"]), [])
+
+    def test_history_rows(self):
+        """Test exporting a JSON Lines store and a legacy JSON array."""
+        path = os.path.join(self.temp_dir, "inventory.json")
+        store = InventoryStore(path)
+        store.write_scan(scanned_images()[:2], "s1", "2025-01-01T00:00:00Z")
+        store.append_scan(scanned_images()[2:], "s2", "2025-01-02T00:00:00Z")
+        rows = list(iter_history_rows(path, since="2025-01-02T00:00:00Z"))
+        self.assertEqual([row["scan_id"] for row in rows], ["s2", "s2"])
+
+        legacy = os.path.join(self.temp_dir, "legacy.json")
+        with open(legacy, "w") as f:
+            json.dump([dict(image) for image in scanned_images()], f, indent=2)
+        rows = list(iter_history_rows(legacy))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["scan_id"], "legacy")
+
+    @unittest.skipUnless(columnar.pyarrow is not None, "pyarrow is not installed")
+    def test_parquet(self):
+        """Test that Parquet exports keep integer sizes and timestamp columns."""
+        path = os.path.join(self.temp_dir, "scan.parquet")
+        rows = [export_row(image, "s1", "2025-01-01T00:00:00Z") for image in scanned_images()]
+        self.assertEqual(write_rows(iter(rows), path, "parquet"), 4)
+
+        schema = columnar.pyarrow.parquet.read_schema(path)
+        self.assertEqual(str(schema.field("size").type), "int64")
+        self.assertTrue(str(schema.field("timestamp").type).startswith("timestamp"))
+        table = ImageColumns.read(path)
+        self.assertEqual(table.column("timestamp")[0], "2025-01-01T00:00:00Z")
+        self.assertEqual(list(table.size), [100, 100, 400, 50])
+
+
+if __name__ == "__main__":
+    unittest.main()
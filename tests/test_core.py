@@ -2,26 +2,60 @@
 Tests for the core module of Container Inventory.
 """
 
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 
 from container_inventory.core import ContainerInventory
+from container_inventory.models import ImageRecord
 
 
 class TestContainerInventory(unittest.TestCase):
     """Tests for the ContainerInventory class."""
 
+    @patch("container_inventory.core.default_socket_path", return_value=None)
+    @patch("container_inventory.core.shutil.which")
     @patch("container_inventory.core.subprocess.run")
-    def test_check_tool_availability(self, mock_run):
+    def test_check_tool_availability(self, mock_run, mock_which, mock_socket):
         """Test checking if a tool is available."""
-        # Tool is available
-        mock_run.return_value = MagicMock()
-        inventory = ContainerInventory()
-        self.assertTrue(inventory._check_tool_availability("docker"))
+        with tempfile.TemporaryDirectory() as tmpdir, patch.dict(
+            os.environ, {"CONTAINER_INVENTORY_CACHE_DIR": tmpdir}
+        ):
+            binary = os.path.join(tmpdir, "docker")
+            open(binary, "w").close()
+            os.utime(binary, ns=(1, 1))
+
+            mock_run.return_value = MagicMock(stdout="Docker version 24.0.7\n")
+            mock_which.side_effect = lambda tool: binary if tool == "docker" else None
+            inventory = ContainerInventory("docker")
+
+            # Tool is available; the binary is run once and the result cached
+            self.assertTrue(inventory._check_tool_availability("docker"))
+            self.assertTrue(inventory._check_tool_availability("docker"))
+            self.assertEqual(mock_run.call_count, 1)
+
+            # An upgraded binary is probed again
+            os.utime(binary, ns=(2, 2))
+            self.assertTrue(inventory._check_tool_availability("docker"))
+            self.assertEqual(mock_run.call_count, 2)
+
+            # Tool is not available
+            self.assertFalse(inventory._check_tool_availability("nonexistent-tool"))
+            self.assertEqual(mock_run.call_count, 2)
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_lazy_detection(self, mock_check):
+        """Test that only the requested runtime is probed."""
+        mock_check.return_value = True
+        inventory = ContainerInventory("docker")
+        mock_check.assert_called_once_with("docker")
 
-        # Tool is not available
-        mock_run.side_effect = FileNotFoundError()
-        self.assertFalse(inventory._check_tool_availability("nonexistent-tool"))
+        self.assertTrue(inventory.docker_available)
+        mock_check.assert_called_once_with("docker")
 
     @patch("container_inventory.core.subprocess.run")
     def test_init(self, mock_run):
@@ -49,19 +83,19 @@ class TestContainerInventory(unittest.TestCase):
             self.assertTrue(inventory.podman_available)
 
     @patch("container_inventory.core.ContainerInventory._check_tool_availability")
-    @patch("container_inventory.core.ContainerInventory._get_docker_images")
-    @patch("container_inventory.core.ContainerInventory._get_podman_images")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    @patch("container_inventory.core.ContainerInventory._iter_podman_images")
     def test_get_images(self, mock_podman, mock_docker, mock_check):
         """Test getting container images."""
         # Set up mocks
         mock_check.return_value = True
 
         # Create dummy data
-        docker_images = [{"ID": "123", "Repository": "docker-image", "Tag": "latest"}]
-        podman_images = [{"ID": "456", "Repository": "podman-image", "Tag": "latest"}]
+        docker_images = [ImageRecord(id="123", repository="docker-image", tag="latest")]
+        podman_images = [ImageRecord(id="456", repository="podman-image", tag="latest")]
 
-        mock_docker.return_value = docker_images
-        mock_podman.return_value = podman_images
+        mock_docker.side_effect = lambda: iter(docker_images)
+        mock_podman.side_effect = lambda: iter(podman_images)
 
         # Test when both Docker and Podman are available
         inventory = ContainerInventory("all")
@@ -90,6 +124,82 @@ class TestContainerInventory(unittest.TestCase):
         self.assertEqual(len(images), 1)
         self.assertEqual(images[0]["source"], "podman")
 
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    @patch("container_inventory.core.ContainerInventory._iter_podman_images")
+    def test_get_images_concurrent(self, mock_podman, mock_docker, mock_check):
+        """Test that runtimes are queried concurrently."""
+        mock_check.return_value = True
+        barrier = threading.Barrier(2, timeout=5)
+
+        def docker_images():
+            barrier.wait()
+            return [ImageRecord(id="123")]
+
+        def podman_images():
+            barrier.wait()
+            return [ImageRecord(id="456")]
+
+        mock_docker.side_effect = docker_images
+        mock_podman.side_effect = podman_images
+
+        # Each fetch only returns once both have started
+        images = ContainerInventory("all").get_images()
+        self.assertEqual([img["ID"] for img in images], ["123", "456"])
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    @patch("container_inventory.core.ContainerInventory._iter_podman_images")
+    def test_get_images_timeout(self, mock_podman, mock_docker, mock_check):
+        """Test that a hung runtime does not block the other one."""
+        mock_check.return_value = True
+        release = threading.Event()
+
+        def hung_docker():
+            release.wait(5)
+            return [ImageRecord(id="123")]
+
+        mock_docker.side_effect = hung_docker
+        mock_podman.side_effect = lambda: iter([ImageRecord(id="456")])
+
+        inventory = ContainerInventory("all", timeout={"docker": 0.1, "podman": 5})
+        start = time.monotonic()
+        images = inventory.get_images()
+        release.set()
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual([img["source"] for img in images], ["podman"])
+        self.assertIn("docker", inventory.fetch_errors)
+        self.assertNotIn("podman", inventory.fetch_errors)
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    def test_abandoned_runtime_keeps_to_its_scan(self, mock_docker, mock_check):
+        """Test that a runtime abandoned after its deadline does not report into the next scan."""
+        mock_check.return_value = True
+        release = threading.Event()
+        calls = []
+
+        def docker_images():
+            calls.append(None)
+            if len(calls) == 1:
+                release.wait(5)
+                raise RuntimeError("stale failure")
+            release.set()
+            time.sleep(0.2)  # The abandoned reader fails meanwhile
+            return [ImageRecord(id="123")]
+
+        mock_docker.side_effect = docker_images
+        inventory = ContainerInventory("docker", timeout=0.1)
+        self.assertEqual(inventory.get_images(), [])
+        self.assertEqual(inventory.fetch_errors, {"docker": "timed out after 0.1s"})
+
+        inventory.timeout = 5
+        images = inventory.get_images()
+        self.assertEqual([img["ID"] for img in images], ["123"])
+        self.assertEqual(inventory.fetch_errors, {})
+        self.assertGreaterEqual(inventory.fetch_durations["docker"], 0.2)
+
     def test_format_size(self):
         """Test formatting bytes to human-readable sizes."""
         # Use patch to avoid sys.exit when Docker/Podman aren't available
@@ -109,6 +219,21 @@ class TestContainerInventory(unittest.TestCase):
             # Test large number that would be in PB
             self.assertEqual(inventory._format_size(1125899906842624), "1.00PB")
 
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_save_inventory_append_json(self, mock_check):
+        """Test that appending to a JSON array file extends the array."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "inventory.json")
+            inventory.save_inventory([ImageRecord(id="123", source="docker")], output)
+            inventory.save_inventory([ImageRecord(id="456", source="podman")], output, append=True)
+
+            with open(output) as f:
+                saved = json.load(f)
+            self.assertEqual([image["ID"] for image in saved], ["123", "456"])
+
 
 if __name__ == "__main__":
     unittest.main()
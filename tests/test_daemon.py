@@ -0,0 +1,113 @@
+"""
+Tests for the daemon module of Container Inventory.
+"""
+
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.daemon import InventoryDaemon, describe_event, notify
+from container_inventory.models import ImageRecord
+from container_inventory.store import InventoryStore
+
+
+def wait_for(condition, timeout=5):
+    """Poll until a condition holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestInventoryDaemon(unittest.TestCase):
+    """Tests for the InventoryDaemon class."""
+
+    def test_notify(self):
+        """Test sending a notification to the systemd notify socket."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "notify.sock")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.bind(path)
+                with patch.dict(os.environ, {"NOTIFY_SOCKET": path}):
+                    self.assertTrue(notify("READY=1"))
+                self.assertEqual(sock.recv(64), b"READY=1")
+
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(notify("READY=1"))
+
+    def test_describe_event(self):
+        """Test summarizing docker and podman image events."""
+        docker_event = {"Action": "pull", "Actor": {"Attributes": {"name": "alpine:3.19"}}}
+        podman_event = {"Status": "remove", "Name": "quay.io/podman/hello:latest"}
+        self.assertEqual(describe_event(docker_event), "pull alpine:3.19")
+        self.assertEqual(describe_event(podman_event), "remove quay.io/podman/hello:latest")
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    @patch("container_inventory.daemon.iter_command_output")
+    def test_follow_events(self, mock_events, mock_docker, mock_check):
+        """Test that an image event appends only the change to the store."""
+        mock_check.return_value = True
+        images = [ImageRecord(id="123", repository="alpine", tag="3.19")]
+        mock_docker.side_effect = lambda: iter(list(images))
+
+        events: queue.Queue = queue.Queue()
+        mock_events.side_effect = lambda argv: iter(events.get, None)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "inventory.jsonl")
+            store = InventoryStore(output)
+            daemon = InventoryDaemon(ContainerInventory("docker"), output, debounce=0.05)
+            thread = threading.Thread(target=daemon.run, daemon=True)
+            thread.start()
+
+            try:
+                self.assertTrue(wait_for(lambda: len(list(store.iter_records())) == 1))
+
+                # Only the event's runtime is watched, for image changes
+                argv = mock_events.call_args[0][0]
+                self.assertEqual(argv[:4], ["docker", "events", "--filter", "type=image"])
+
+                images.append(ImageRecord(id="456", repository="nginx", tag="latest"))
+                events.put(json.dumps({"Action": "pull", "id": "nginx:latest"}) + "\n")
+                self.assertTrue(wait_for(lambda: len(list(store.iter_records())) == 2))
+
+                records = list(store.iter_records())
+                self.assertEqual(records[0]["change"], "snapshot")
+                self.assertEqual((records[1]["ID"], records[1]["change"]), ("456", "added"))
+            finally:
+                daemon.stop.set()
+                events.put(None)
+                thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    def test_failed_refresh_keeps_images(self, mock_docker, mock_check):
+        """Test that a failed listing is not recorded as every image being removed."""
+        mock_check.return_value = True
+        mock_docker.side_effect = lambda: iter([ImageRecord(id="123")])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "inventory.jsonl")
+            daemon = InventoryDaemon(ContainerInventory("docker"), output)
+            daemon.refresh(["docker"])
+
+            mock_docker.side_effect = OSError("daemon not running")
+            daemon.refresh(["docker"])
+
+            self.assertEqual([image.id for image in daemon.images["docker"]], ["123"])
+            self.assertEqual(len(list(InventoryStore(output).iter_records())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests for the enrich module of Container Inventory.
+"""
+
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from container_inventory.cache import JsonCache
+from container_inventory.core import ContainerInventory
+from container_inventory.enrich import ImageEnricher, image_details
+from container_inventory.models import ImageRecord
+
+INSPECT = [
+    {
+        "Id": "sha256:aaaaaaaaaaaa0000",
+        "RepoDigests": ["alpine@sha256:feed"],
+        "Architecture": "amd64",
+        "Os": "linux",
+        "Config": {"Labels": {"maintainer": "ops"}},
+    },
+    {"Id": "sha256:bbbbbbbbbbbb0000", "Architecture": "arm64", "Os": "linux"},
+]
+
+
+def fake_inspect(argv, timeout=None):
+    """Answer docker image inspect for the requested IDs."""
+    return iter([json.dumps([details for details in INSPECT if details["Id"][7:19] in argv])])
+
+
+class TestImageEnricher(unittest.TestCase):
+    """Tests for the ImageEnricher class."""
+
+    def test_image_details(self):
+        """Test extracting details from docker and podman inspect results."""
+        self.assertEqual(
+            image_details(INSPECT[0]),
+            {
+                "digest": "sha256:feed",
+                "architecture": "amd64",
+                "os": "linux",
+                "labels": {"maintainer": "ops"},
+            },
+        )
+        podman = {"Digest": "sha256:beef", "Labels": {"a": "b"}}
+        self.assertEqual(image_details(podman)["digest"], "sha256:beef")
+        self.assertEqual(image_details(podman)["labels"], {"a": "b"})
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._api_client")
+    @patch("container_inventory.image_inspect.iter_command_output")
+    def test_enrich_cached(self, mock_output, mock_client, mock_check):
+        """Test one batched inspect, then pure cache hits, then eviction."""
+        mock_check.return_value = True
+        mock_client.return_value = None
+        mock_output.side_effect = fake_inspect
+        images = [
+            ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", source="docker"),
+            ImageRecord(id="bbbbbbbbbbbb", source="docker"),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = JsonCache("inspect.json", tmpdir)
+            enricher = ImageEnricher(ContainerInventory("docker"), cache)
+            enriched = enricher.enrich(images)
+
+            mock_output.assert_called_once()
+            self.assertEqual(
+                mock_output.call_args[0][0],
+                ["docker", "image", "inspect", "aaaaaaaaaaaa", "bbbbbbbbbbbb"],
+            )
+            self.assertEqual(enriched[0]["digest"], "sha256:feed")
+            self.assertEqual((enriched[0].dangling, enriched[1].dangling), (False, True))
+            self.assertEqual(enriched[1].architecture, "arm64")
+
+            mock_output.reset_mock()
+            enricher = ImageEnricher(ContainerInventory("docker"), cache, max_entries=1)
+            enricher.enrich(images[:1])
+            mock_output.assert_not_called()
+            self.assertEqual((enricher.hits, enricher.misses), (1, 0))
+            # Over the limit, the image no longer present is evicted
+            self.assertEqual(list(cache.load()), ["docker:aaaaaaaaaaaa"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the exporter module of Container Inventory.
+"""
+
+import threading
+import unittest
+import urllib.request
+from unittest.mock import MagicMock
+
+from container_inventory.exporter import InventoryExporter, InventoryMetrics, parse_address
+from container_inventory.models import ImageRecord
+
+
+def scanned_images():
+    """Two references of one docker image and one podman image."""
+    return [
+        ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", size=100, source="docker"),
+        ImageRecord(
+            id="aaaaaaaaaaaa", repository="alpine", tag="latest", size=100, source="docker"
+        ),
+        ImageRecord(id="bbbbbbbbbbbb", repository="nginx", size=50, source="podman", host="web1"),
+    ]
+
+
+class TestInventoryMetrics(unittest.TestCase):
+    """Tests for the InventoryMetrics class."""
+
+    def test_render(self):
+        """Test gauges, histograms and error counters in the snapshot."""
+        metrics = InventoryMetrics()
+        metrics.record_scan(
+            scanned_images(), 0.3, {"docker": 0.2, "web1/podman": 0.4}, {"web1/podman": "boom"}
+        )
+        text = metrics.snapshot.decode()
+
+        self.assertIn('container_inventory_source_bytes{host="",source="docker"} 200', text)
+        self.assertIn('container_inventory_source_unique_bytes{host="",source="docker"} 100', text)
+        self.assertIn(
+            'container_inventory_repository_tags{host="",source="docker",repository="alpine"} 2',
+            text,
+        )
+        self.assertIn('container_inventory_scan_duration_seconds_bucket{le="0.5"} 1', text)
+        self.assertIn('container_inventory_scan_duration_seconds_bucket{le="0.25"} 0', text)
+        self.assertIn(
+            'container_inventory_fetch_errors_total{host="web1",runtime="podman"} 1', text
+        )
+        self.assertIn("container_inventory_scans_total 1", text)
+
+    def test_parse_address(self):
+        """Test parsing listen addresses."""
+        self.assertEqual(parse_address(":9469"), ("", 9469))
+        self.assertEqual(parse_address("127.0.0.1:8080"), ("127.0.0.1", 8080))
+        self.assertEqual(parse_address("[::1]:8080"), ("::1", 8080))
+
+
+class TestInventoryExporter(unittest.TestCase):
+    """Tests for the InventoryExporter class."""
+
+    def test_scrape_uses_snapshot(self):
+        """Test that scrapes are served from the last scan without rescanning."""
+        inventory = MagicMock()
+        inventory.get_images.return_value = scanned_images()
+        inventory.fetch_durations = {"docker": 0.1}
+        inventory.fetch_errors = {}
+
+        exporter = InventoryExporter(inventory, "127.0.0.1:0", interval=3600)
+        thread = threading.Thread(target=exporter.run, daemon=True)
+        thread.start()
+        try:
+            port = exporter.server.server_address[1]
+            for _ in range(3):
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as r:
+                    body = r.read().decode()
+            self.assertIn("container_inventory_scans_total 1", body)
+            self.assertEqual(inventory.get_images.call_count, 1)
+        finally:
+            exporter.stop.set()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests for the fleet and targets modules of Container Inventory.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from container_inventory.fleet import FleetInventory
+from container_inventory.incremental import diff_images
+from container_inventory.targets import parse_target
+from tests.test_socket_api import FakeRuntimeServer
+
+
+class TestTargets(unittest.TestCase):
+    """Tests for parsing target specifications."""
+
+    def test_parse_target(self):
+        """Test each endpoint form and the command it runs."""
+        target = parse_target("tcp://build1.example.com:2376")
+        self.assertEqual((target.name, target.runtime), ("build1.example.com", "docker"))
+        self.assertEqual(
+            target.command(["images"]), ["docker", "-H", "tcp://build1.example.com:2376", "images"]
+        )
+        self.assertIsNone(target.socket_path())
+
+        target = parse_target("web1=podman+ssh://core@web1:22/run/podman/podman.sock")
+        self.assertEqual((target.name, target.runtime), ("web1", "podman"))
+        self.assertEqual(target.command(["images"])[:2], ["podman", "--url"])
+
+        target = parse_target("podman+connection:staging")
+        self.assertEqual(target.name, "staging")
+        self.assertEqual(
+            target.command(["images"]), ["podman", "--connection", "staging", "images"]
+        )
+
+        target = parse_target("ssh:admin@db1")
+        self.assertEqual(target.name, "db1")
+        self.assertEqual(
+            target.command(["images", "--format", "{{json .}}"]),
+            ["ssh", "-o", "BatchMode=yes", "admin@db1", "docker images --format '{{json .}}'"],
+        )
+
+        target = parse_target("unix:///run/docker.sock")
+        self.assertEqual(target.socket_path(), "/run/docker.sock")
+
+        with self.assertRaises(ValueError):
+            parse_target("http://example.com")
+
+    def test_parse_target_with_equals(self):
+        """Test that an '=' in the endpoint is only taken for a name when a name comes before it."""
+        target = parse_target("tcp://build1:2376/?tls=1")
+        self.assertEqual((target.name, target.endpoint), ("build1", "tcp://build1:2376/?tls=1"))
+
+        target = parse_target("podman+ssh://core@web1/run/podman/podman.sock?identity=key")
+        self.assertEqual((target.name, target.runtime), ("web1", "podman"))
+        self.assertEqual(target.endpoint, "ssh://core@web1/run/podman/podman.sock?identity=key")
+
+        target = parse_target("edge=ssh://core@web1/?identity=key")
+        self.assertEqual((target.name, target.endpoint), ("edge", "ssh://core@web1/?identity=key"))
+
+
+class TestFleetInventory(unittest.TestCase):
+    """Tests for the FleetInventory class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.servers = []
+        self.sockets = []
+        for index in range(3):
+            path = os.path.join(self.tmpdir.name, f"host{index}.sock")
+            server = FakeRuntimeServer(path)
+            threading.Thread(
+                target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+            ).start()
+            self.servers.append(server)
+            self.sockets.append(path)
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_scan_fleet(self):
+        """Test that hosts are scanned and their images tagged and merged in order."""
+        targets = [parse_target(f"host{i}=unix://{path}") for i, path in enumerate(self.sockets)]
+        targets.append(parse_target(f"host0=podman+unix://{self.sockets[0]}"))
+
+        fleet = FleetInventory(targets, timeout=5, workers=2)
+        images = fleet.get_images()
+
+        self.assertEqual(
+            [(image["host"], image["source"]) for image in images],
+            [("host0", "docker")] * 3
+            + [("host1", "docker")] * 3
+            + [("host2", "docker")] * 3
+            + [("host0", "podman")],
+        )
+        self.assertEqual(fleet.fetch_errors, {})
+        self.assertEqual(set(fleet.host_attempts.values()), {1})
+
+        # The same image on two hosts is tracked separately
+        deltas, current = diff_images({}, images)
+        self.assertEqual(len(current), 2 * 3 + 1)
+
+    @patch("container_inventory.streaming.subprocess.Popen", side_effect=FileNotFoundError)
+    def test_retries(self, mock_popen):
+        """Test that an unreachable host is retried and reported without failing the fleet."""
+        targets = [
+            parse_target(f"good=unix://{self.sockets[0]}"),
+            parse_target(f"bad=unix://{self.tmpdir.name}/missing.sock"),
+        ]
+        fleet = FleetInventory(targets, timeout=5, retries=2, backoff=0)
+        images = fleet.get_images()
+
+        self.assertEqual({image["host"] for image in images}, {"good"})
+        self.assertEqual(list(fleet.fetch_errors), ["bad/docker"])
+        self.assertEqual(fleet.host_attempts, {"good/docker": 1, "bad/docker": 3})
+        self.assertIn("1 of 2 targets failed", fleet.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
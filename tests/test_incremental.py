@@ -0,0 +1,130 @@
+"""
+Tests for the incremental module of Container Inventory.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.incremental import ScanState, diff_images, index_images, state_path
+from container_inventory.store import InventoryStore
+
+
+def image(image_id, repository, tag, source="docker"):
+    """Build an image row."""
+    return {"ID": image_id, "Repository": repository, "Tag": tag, "source": source}
+
+
+class TestDiffImages(unittest.TestCase):
+    """Tests for diff_images."""
+
+    def test_diff_images(self):
+        """Test detecting added, removed and retagged images."""
+        previous = index_images(
+            [
+                image("aaa", "alpine", "3.19"),
+                image("bbb", "nginx", "1.25"),
+                image("ccc", "redis", "7"),
+            ]
+        )
+        current = [
+            image("aaa", "alpine", "3.19"),
+            image("bbb", "nginx", "1.25"),
+            image("bbb", "nginx", "latest"),
+            image("ddd", "registry:5000/app", "1.2"),
+        ]
+
+        deltas, index = diff_images(previous, current)
+        changes = sorted((d["change"], d["ID"], d["Repository"], d["Tag"]) for d in deltas)
+        self.assertEqual(
+            changes,
+            [
+                ("added", "ddd", "registry:5000/app", "1.2"),
+                ("removed", "ccc", "redis", "7"),
+                ("retagged", "bbb", "nginx", "1.25"),
+                ("retagged", "bbb", "nginx", "latest"),
+            ],
+        )
+        self.assertEqual(index["docker:bbb"], ["nginx:1.25", "nginx:latest"])
+
+        # The same image ID from another source is a different image
+        deltas, _ = diff_images(index, current + [image("aaa", "alpine", "3.19", "podman")])
+        self.assertEqual([(d["change"], d["source"]) for d in deltas], [("added", "podman")])
+
+
+class TestIncrementalSave(unittest.TestCase):
+    """Tests for incremental save_inventory."""
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_save_incremental(self, mock_check):
+        """Test that only changes are appended between snapshots."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "inventory.json")
+            scan = [image("aaa", "alpine", "3.19"), image("bbb", "nginx", "1.25")]
+
+            # First scan is a full snapshot
+            inventory.save_inventory(scan, path, incremental=True)
+            self.assertTrue(os.path.exists(state_path(path)))
+            records = list(InventoryStore(path).iter_records())
+            self.assertEqual([r["change"] for r in records], ["snapshot", "snapshot"])
+
+            # An unchanged scan writes nothing
+            size = os.path.getsize(path)
+            inventory.save_inventory(scan, path, incremental=True)
+            self.assertEqual(os.path.getsize(path), size)
+
+            # A change is appended as a delta
+            inventory.save_inventory(scan[:1], path, incremental=True)
+            records = list(InventoryStore(path).iter_records())
+            self.assertEqual(len(records), 3)
+            self.assertEqual((records[-1]["change"], records[-1]["ID"]), ("removed", "bbb"))
+
+            # A snapshot is written once the interval has elapsed
+            inventory.save_inventory(scan, path, incremental=True, snapshot_interval=0)
+            records = list(InventoryStore(path).iter_records())
+            self.assertEqual([r["change"] for r in records[3:]], ["snapshot", "snapshot"])
+
+            state = ScanState(state_path(path))
+            self.assertTrue(state.load())
+            self.assertEqual(sorted(state.images), ["docker:aaa", "docker:bbb"])
+
+    @patch("builtins.print")
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_failed_runtime_keeps_images(self, mock_check, mock_print):
+        """Test that a runtime whose listing failed is not recorded as removed."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "inventory.json")
+            scan = [image("aaa", "alpine", "3.19"), image("bbb", "nginx", "1.25", "podman")]
+            inventory.save_inventory(scan, path, incremental=True)
+
+            # Podman times out, and a snapshot is due: only docker changes are written
+            inventory.fetch_errors = {"podman": "timed out after 120s"}
+            inventory.save_inventory(
+                [image("aaa", "alpine", "3.19"), image("ccc", "redis", "7")],
+                path,
+                incremental=True,
+                snapshot_interval=0,
+            )
+            records = list(InventoryStore(path).iter_records())
+            self.assertEqual([(r["change"], r["ID"]) for r in records[2:]], [("added", "ccc")])
+
+            # The next good scan finds podman unchanged, and writes the postponed snapshot
+            inventory.fetch_errors = {}
+            inventory.save_inventory(scan, path, incremental=True)
+            records = list(InventoryStore(path).iter_records())
+            self.assertEqual(
+                sorted((r["change"], r["ID"]) for r in records[3:]),
+                [("snapshot", "aaa"), ("snapshot", "bbb")],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Tests for the index module of Container Inventory.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.index import InventoryIndex, ScanRecorder, index_path, parse_time
+from container_inventory.models import ImageRecord
+from container_inventory.store import InventoryStore
+
+
+def record(image_id, repository="alpine", tag="latest", source="docker", host=""):
+    """Build an image record."""
+    return ImageRecord(
+        id=image_id, repository=repository, tag=tag, size=1024, source=source, host=host
+    )
+
+
+class TestInventoryIndex(unittest.TestCase):
+    """Tests for the InventoryIndex class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = InventoryIndex(os.path.join(self.tmpdir.name, "inventory.json.db"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def record_scan(self, images, scan_id, timestamp):
+        """Record a scan and commit it."""
+        recorder = self.index.begin_scan(scan_id, timestamp)
+        passed = list(recorder.observe(images))
+        recorder.commit()
+        return passed
+
+    def test_query(self):
+        """Test lookups by ID, reference, host and time range."""
+        self.record_scan(
+            [record("0123456789ab", host="web1"), record("fedcba987654", "nginx", host="web2")],
+            "scan1",
+            "2025-01-01T00:00:00Z",
+        )
+        self.record_scan(
+            [record("0123456789ab", tag="3.19", host="web2")], "scan2", "2025-01-08T00:00:00Z"
+        )
+
+        by_id = list(self.index.query(image_id="sha256:0123456789abcdef"))
+        self.assertEqual([row["scan_id"] for row in by_id], ["scan1", "scan2"])
+        self.assertEqual(len(list(self.index.query(image_id="0123"))), 2)
+
+        week = list(self.index.query(repository="alpine", since="2025-01-05T00:00:00Z"))
+        self.assertEqual([(row["host"], row["tag"]) for row in week], [("web2", "3.19")])
+
+        hosts = list(self.index.hosts(repository="alpine"))
+        self.assertEqual([row["host"] for row in hosts], ["web1", "web2"])
+
+        first = list(self.index.first_seen())
+        self.assertEqual(
+            [(row["image_id"], row["first_seen"], row["records"]) for row in first],
+            [
+                ("0123456789ab", "2025-01-01T00:00:00Z", 2),
+                ("fedcba987654", "2025-01-01T00:00:00Z", 1),
+            ],
+        )
+
+    def test_rollback(self):
+        """Test that a scan whose store write failed is not indexed."""
+        recorder = self.index.begin_scan("scan1", "2025-01-01T00:00:00Z")
+        list(recorder.observe([record("0123456789ab")]))
+        recorder.rollback()
+        self.assertEqual(list(self.index.query()), [])
+
+    def test_disabled(self):
+        """Test that a recorder without an index passes records through."""
+        recorder = ScanRecorder(None, "scan1", "2025-01-01T00:00:00Z")
+        images = [record("0123456789ab")]
+        self.assertEqual(list(recorder.observe(images)), images)
+        recorder.commit()
+
+    def test_rebuild(self):
+        """Test rebuilding the index from a JSON Lines store."""
+        store = InventoryStore(os.path.join(self.tmpdir.name, "inventory.json"))
+        store.append_scan([dict(record("0123456789ab"))], "scan1", "2025-01-01T00:00:00Z")
+        store.append_scan(
+            [dict(record("0123456789ab"), change="removed")], "scan2", "2025-01-02T00:00:00Z"
+        )
+
+        self.assertEqual(self.index.rebuild(store.path), 2)
+        rows = list(self.index.query())
+        self.assertEqual([row["change"] for row in rows], [None, "removed"])
+        self.assertEqual(rows[0]["size"], 1000)  # Parsed back from "1.00KB"
+
+    def test_prune(self):
+        """Test dropping records older than deleted store segments."""
+        self.record_scan([record("0123456789ab")], "scan1", "2025-01-01T00:00:00Z")
+        self.record_scan([record("fedcba987654")], "scan2", "2025-01-08T00:00:00Z")
+        self.assertEqual(self.index.prune("2025-01-02T00:00:00Z"), 1)
+        self.assertEqual([row["scan_id"] for row in self.index.query()], ["scan2"])
+
+    def test_parse_time(self):
+        """Test parsing absolute and relative times."""
+        now = datetime.datetime(2025, 1, 8, tzinfo=datetime.timezone.utc)
+        self.assertEqual(parse_time("7d", now), "2025-01-01T00:00:00Z")
+        self.assertEqual(parse_time("2025-01-01"), "2025-01-01T00:00:00Z")
+        self.assertEqual(parse_time("2025-01-01T12:30:00Z"), "2025-01-01T12:30:00Z")
+        with self.assertRaises(ValueError):
+            parse_time("last week")
+
+
+class TestSaveInventoryIndex(unittest.TestCase):
+    """Tests for indexing as save_inventory writes."""
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_save_fills_index(self, mock_check):
+        """Test that each saved scan is indexed, and only changes in incremental mode."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "inventory.json")
+            images = [record("0123456789ab"), record("fedcba987654", "nginx")]
+            inventory.save_inventory(images, output, incremental=True)
+            inventory.save_inventory(images[:1], output, incremental=True)
+            inventory.save_inventory(images[:1], output, incremental=True)
+
+            index = InventoryIndex(index_path(output))
+            rows = list(index.query())
+            index.close()
+            self.assertEqual(
+                [(row["image_id"], row["change"]) for row in rows],
+                [
+                    ("0123456789ab", "snapshot"),
+                    ("fedcba987654", "snapshot"),
+                    ("fedcba987654", "removed"),
+                ],
+            )
+
+            # Saving without the index leaves no database behind
+            unindexed = os.path.join(tmpdir, "unindexed.json")
+            inventory.save_inventory(images, unindexed, output_format="jsonl", index=False)
+            self.assertFalse(os.path.exists(index_path(unindexed)))
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_new_index_holds_history(self, mock_check):
+        """Test that an index created by a save starts with the earlier scans."""
+        mock_check.return_value = True
+        inventory = ContainerInventory()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "inventory.json")
+            inventory.save_inventory([record("aaaaaaaaaaaa")], output)
+            # A JSON array file is not indexed until 'query' asks for it
+            self.assertFalse(os.path.exists(index_path(output)))
+
+            inventory.save_inventory(
+                [record("bbbbbbbbbbbb")], output, append=True, output_format="jsonl"
+            )
+            index = InventoryIndex(index_path(output))
+            rows = list(index.query())
+            index.close()
+            scans = {row["image_id"]: row["scan_id"] for row in rows}
+            self.assertEqual(sorted(scans), ["aaaaaaaaaaaa", "bbbbbbbbbbbb"])
+            self.assertEqual(scans["aaaaaaaaaaaa"], "legacy")
+            self.assertNotEqual(scans["bbbbbbbbbbbb"], "legacy")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests for the layers module of Container Inventory.
+"""
+
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from container_inventory.cache import JsonCache
+from container_inventory.core import ContainerInventory
+from container_inventory.layers import LayerIndex, LayerScanner, layer_sizes
+from container_inventory.models import ImageRecord
+
+INSPECT = {
+    f"sha256:{image_id}0000": {"Id": f"sha256:{image_id}0000", "RootFS": {"Layers": layers}}
+    for image_id, layers in (("aaaaaaaaaaaa", ["l1", "l2"]), ("bbbbbbbbbbbb", ["l1", "l3"]))
+}
+
+# Newest step first, as docker history prints it
+HISTORY = {
+    "aaaaaaaaaaaa": [{"Size": "20"}, {"Size": "0"}, {"Size": "100"}],
+    "bbbbbbbbbbbb": [{"Size": "30"}, {"Size": "100"}],
+}
+
+
+def fake_runtime(argv, timeout=None):
+    """Answer docker image inspect and docker history from the fixtures."""
+    if argv[1:3] == ["image", "inspect"]:
+        found = [details for key, details in INSPECT.items() if key[7:19] in argv[3:]]
+        return iter([json.dumps(found)])
+    return iter(json.dumps(step) + "\n" for step in HISTORY[argv[-1]])
+
+
+class TestLayerIndex(unittest.TestCase):
+    """Tests for the LayerIndex class."""
+
+    def test_usage(self):
+        """Test splitting image and repository sizes into unique and shared bytes."""
+        index = LayerIndex()
+        index.add_image("docker", "a", {"base": 100, "app": 20})
+        index.add_image("docker", "b", {"base": 100, "other": 30})
+        index.add_image("podman", "c", {"base": 100})
+
+        self.assertEqual(
+            index.image_usage("docker", "a"), {"size": 120, "unique": 20, "shared": 100}
+        )
+        self.assertEqual(index.image_usage("podman", "c")["unique"], 100)
+
+        images = [
+            ImageRecord(id="a", repository="app", source="docker"),
+            ImageRecord(id="b", repository="app", tag="old", source="docker"),
+            ImageRecord(id="c", repository="base", source="podman"),
+        ]
+        rows = index.repository_usage(images)
+        self.assertEqual(
+            [(row["repository"], row["images"], row["unique"], row["shared"]) for row in rows],
+            [("app", 2, 150, 0), ("base", 1, 100, 0)],
+        )
+        self.assertEqual(index.totals(), {"listed": 350, "deduplicated": 250})
+
+    def test_layer_sizes(self):
+        """Test matching history steps with layers."""
+        history = [{"Size": 100}, {"Size": 0}, {"Size": 20}]
+        self.assertEqual(layer_sizes(["l1", "l2"], history, 0), {"l1": 100, "l2": 20})
+        # An empty layer leaves the oldest layer without a step
+        self.assertEqual(layer_sizes(["l0", "l1", "l2"], history, 0)["l0"], 0)
+        # Without a history the image size goes to the top layer
+        self.assertEqual(layer_sizes(["l1", "l2"], [], 120), {"l1": 0, "l2": 120})
+
+
+class TestLayerScanner(unittest.TestCase):
+    """Tests for the LayerScanner class."""
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._api_client")
+    @patch("container_inventory.image_inspect.iter_command_output")
+    def test_scan(self, mock_output, mock_client, mock_check):
+        """Test one batched inspect per runtime and cached layer sizes."""
+        mock_check.return_value = True
+        mock_client.return_value = None
+        mock_output.side_effect = fake_runtime
+        images = [
+            ImageRecord(id="aaaaaaaaaaaa", repository="app", size=120, source="docker"),
+            ImageRecord(id="aaaaaaaaaaaa", repository="app", tag="v1", size=120, source="docker"),
+            ImageRecord(id="bbbbbbbbbbbb", repository="tool", size=130, source="docker"),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = JsonCache("layers.json", tmpdir)
+            scanner = LayerScanner(ContainerInventory("docker"), cache)
+            index = scanner.scan(images)
+
+            inspects = [c[0][0] for c in mock_output.call_args_list if c[0][0][1] == "image"]
+            self.assertEqual(
+                inspects, [["docker", "image", "inspect", "aaaaaaaaaaaa", "bbbbbbbbbbbb"]]
+            )
+            self.assertEqual(
+                index.image_usage("docker", "aaaaaaaaaaaa"),
+                {"size": 120, "unique": 20, "shared": 100},
+            )
+            self.assertEqual(cache.load(), {"l1": 100, "l2": 20, "l3": 30})
+
+            # Every layer is cached, so the next scan reads no history
+            mock_output.reset_mock()
+            LayerScanner(ContainerInventory("docker"), cache).scan(images)
+            self.assertEqual(mock_output.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
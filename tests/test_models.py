@@ -0,0 +1,118 @@
+"""
+Tests for the models module of Container Inventory.
+"""
+
+import json
+import unittest
+
+from container_inventory.models import ImageRecord, parse_created, parse_size
+
+
+class TestImageRecord(unittest.TestCase):
+    """Tests for the ImageRecord class."""
+
+    def test_parse_size(self):
+        """Test parsing docker CLI size strings."""
+        self.assertEqual(parse_size("77.8MB"), 77800000)
+        self.assertEqual(parse_size("1.2GB"), 1200000000)
+        self.assertEqual(parse_size("512kB"), 512000)
+        self.assertEqual(parse_size("0B"), 0)
+        self.assertEqual(parse_size(2048), 2048)
+        self.assertEqual(parse_size("N/A"), 0)
+
+    def test_parse_created(self):
+        """Test parsing creation times to epoch seconds."""
+        self.assertEqual(parse_created(1700000000), 1700000000)
+        self.assertEqual(parse_created("1700000000"), 1700000000)
+        self.assertEqual(parse_created("2023-11-14 22:13:20 +0000 UTC"), 1700000000)
+        self.assertEqual(parse_created("2023-11-14 17:13:20 -0500 EST"), 1700000000)
+        self.assertIsNone(parse_created(""))
+        self.assertIsNone(parse_created("yesterday"))
+
+    def test_from_docker_row(self):
+        """Test building a record from a docker CLI row."""
+        record = ImageRecord.from_dict(
+            {
+                "ID": "0123456789ab",
+                "Repository": "alpine",
+                "Tag": "3.19",
+                "CreatedAt": "2023-11-14 22:13:20 +0000 UTC",
+                "Size": "7.34MB",
+            },
+            "docker",
+        )
+        self.assertEqual(record.size, 7340000)
+        self.assertEqual(record.created, 1700000000)
+        self.assertEqual(record.source, "docker")
+        self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_docker_row_kept_verbatim(self):
+        """Test that a docker CLI row is written out with every field as printed."""
+        row = {
+            "Containers": "N/A",
+            "CreatedAt": "2023-11-14 17:13:20 -0500 EST",
+            "CreatedSince": "11 months ago",
+            "Digest": "<none>",
+            "ID": "0123456789ab",
+            "Repository": "alpine",
+            "SharedSize": "N/A",
+            "Size": "77.8MB",
+            "Tag": "3.19",
+            "UniqueSize": "N/A",
+            "VirtualSize": "77.8MB",
+        }
+        record = ImageRecord.from_dict(row, "docker")
+        self.assertEqual(record.to_dict(), dict(row, source="docker"))
+        self.assertEqual(dict(record), dict(row, source="docker"))
+        self.assertEqual(record["Size"], "77.8MB")
+        self.assertEqual((record.size, record.created), (77800000, 1700000000))
+
+    def test_legacy_mapping(self):
+        """Test that records serialize to and behave like the legacy dict shape."""
+        record = ImageRecord(
+            id="0123456789ab",
+            repository="alpine",
+            tag="3.19",
+            created=1700000000,
+            size=1024,
+            source="podman",
+        )
+        expected = {
+            "Repository": "alpine",
+            "Tag": "3.19",
+            "ID": "0123456789ab",
+            "CreatedAt": "2023-11-14 22:13:20 +0000 UTC",
+            "Size": "1.00KB",
+            "source": "podman",
+        }
+        self.assertEqual(record.to_dict(), expected)
+        self.assertEqual(dict(record), expected)
+        self.assertEqual(record["Size"], "1.00KB")
+        self.assertEqual(record.get("Digest", "<none>"), "<none>")
+        self.assertEqual(json.loads(json.dumps(record.to_dict())), expected)
+
+
+    def test_host(self):
+        """Test that a fleet host is only part of the mapping when set."""
+        record = ImageRecord(id="0123456789ab", source="docker", host="web1")
+        self.assertEqual(record["host"], "web1")
+        self.assertEqual(record.to_dict()["host"], "web1")
+        self.assertEqual(ImageRecord.from_dict(dict(record)).host, "web1")
+
+        local = ImageRecord(id="0123456789ab", source="docker")
+        self.assertNotIn("host", local)
+        self.assertNotIn("host", local.to_dict())
+
+    def test_details(self):
+        """Test that inspect details are only part of the mapping once enriched."""
+        record = ImageRecord(id="0123456789ab", source="docker")
+        self.assertNotIn("labels", record)
+        record.labels = {"maintainer": "ops"}
+        record.dangling = False
+        self.assertEqual(list(record)[-2:], ["labels", "dangling"])
+        restored = ImageRecord.from_dict(json.loads(json.dumps(dict(record))))
+        self.assertEqual((restored.labels, restored.dangling), ({"maintainer": "ops"}, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Tests for the plugins module of Container Inventory.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from container_inventory import plugins
+from container_inventory.models import ImageRecord
+from container_inventory.plugins import (
+    Analyzer,
+    discover_analyzers,
+    run_analyzers,
+    select_analyzers,
+)
+
+SCRIPT = '''
+from container_inventory.plugins import Analyzer, FunctionAnalyzer
+
+
+class Tags(Analyzer):
+    name = "tags"
+
+    def analyze(self, images):
+        return sorted(image.tag for image in images)
+
+
+LARGEST = FunctionAnalyzer(lambda images: max(image.size for image in images), "largest")
+'''
+
+
+def scanned_images():
+    """A docker and a podman image."""
+    return [
+        ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", size=100, source="docker"),
+        ImageRecord(id="bbbbbbbbbbbb", repository="nginx", tag="1.25", size=50, source="podman"),
+    ]
+
+
+class Counting(Analyzer):
+    """Counts images; records which thread ran it."""
+
+    def __init__(self, name, barrier=None):
+        self.name = name
+        self.barrier = barrier
+        self.seen = None
+
+    def analyze(self, images):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        self.seen = images
+        return len(images)
+
+
+class TestPlugins(unittest.TestCase):
+    """Tests for analyzer discovery and execution."""
+
+    def test_discover(self):
+        """Test finding built-in, custom script and entry point analyzers."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            package = os.path.join(temp_dir, "plugin_scripts")
+            os.makedirs(package)
+            open(os.path.join(package, "__init__.py"), "w").close()
+            with open(os.path.join(package, "custom_script.py"), "w") as f:
+                f.write(SCRIPT)
+            with open(os.path.join(package, "broken.py"), "w") as f:
+                f.write("raise RuntimeError('boom')\n")
+            with open(os.path.join(package, "plain.py"), "w") as f:
+                f.write("def analyze(images):\n    return len(images)\n")
+
+            class EntryPoint:
+                name = "from-entry-point"
+                value = "dist.module:func"
+
+                def load(self):
+                    return lambda images: "entry point"
+
+            sys.path.insert(0, temp_dir)
+            try:
+                with patch.object(plugins, "_entry_points", return_value=[EntryPoint()]):
+                    found = discover_analyzers("plugin_scripts")
+            finally:
+                sys.path.remove(temp_dir)
+                for name in [m for m in sys.modules if m.startswith("plugin_scripts")]:
+                    del sys.modules[name]
+        finally:
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual(
+            sorted(found), ["from-entry-point", "largest", "plain", "summary", "tags"]
+        )
+        results = run_analyzers(list(found.values()), scanned_images())
+        self.assertEqual(results["tags"]["result"], ["1.25", "3.19"])
+        self.assertEqual(results["largest"]["result"], 100)
+        self.assertEqual(results["plain"]["result"], 2)
+        self.assertEqual(results["from-entry-point"]["result"], "entry point")
+        self.assertEqual(results["summary"]["result"][0]["source"], "docker")
+
+    def test_example_script(self):
+        """Test that the bundled example script is discovered and runs."""
+        found = discover_analyzers()
+        result = run_analyzers([found["example"]], scanned_images())["example"]
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["result"]["by_runtime"], {"docker": 1, "podman": 1})
+        self.assertEqual(result["result"]["size_analysis"]["largest_image"], "alpine:3.19")
+
+    def test_select(self):
+        """Test selecting analyzers by name."""
+        available = {"a": Counting("a"), "b": Counting("b")}
+        self.assertEqual([a.name for a in select_analyzers(available, ["all"])], ["a", "b"])
+        self.assertEqual([a.name for a in select_analyzers(available, ["b", "b"])], ["b"])
+        with self.assertRaises(ValueError):
+            select_analyzers(available, ["c"])
+
+    def test_run_concurrently_on_shared_images(self):
+        """Test that analyzers run at the same time on one shared tuple of images."""
+        barrier = threading.Barrier(3)
+        analyzers = [Counting(name, barrier) for name in ("a", "b", "c")]
+        results = run_analyzers(analyzers, iter(scanned_images()), workers=3)
+
+        self.assertEqual(list(results), ["a", "b", "c"])
+        self.assertEqual([r["result"] for r in results.values()], [2, 2, 2])
+        self.assertIsInstance(analyzers[0].seen, tuple)
+        self.assertIs(analyzers[0].seen, analyzers[1].seen)
+
+    def test_errors_and_timeouts(self):
+        """Test that failing and hanging analyzers are reported without stopping the rest."""
+        release = threading.Event()
+
+        class Failing(Analyzer):
+            name = "failing"
+
+            def analyze(self, images):
+                raise RuntimeError("boom")
+
+        class Hanging(Analyzer):
+            name = "hanging"
+
+            def analyze(self, images):
+                release.wait(5)
+
+        try:
+            results = run_analyzers(
+                [Hanging(), Failing(), Counting("ok")], scanned_images(), workers=1, timeout=0.3
+            )
+        finally:
+            release.set()
+        self.assertEqual(results["failing"]["error"], "RuntimeError: boom")
+        self.assertIn("timed out", results["hanging"]["error"])
+        self.assertEqual(results["ok"]["result"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Tests for the reference module of Container Inventory.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.reference import image_references, parse_reference
+
+
+class TestParseReference(unittest.TestCase):
+    """Tests for reference parsing."""
+
+    def test_parse_reference(self):
+        """Test splitting references into repository and tag."""
+        self.assertEqual(parse_reference("alpine:3.19"), ("alpine", "3.19"))
+        self.assertEqual(
+            parse_reference("docker.io/library/alpine:latest"),
+            ("docker.io/library/alpine", "latest"),
+        )
+        self.assertEqual(
+            parse_reference("registry:5000/team/app:1.2"), ("registry:5000/team/app", "1.2")
+        )
+        self.assertEqual(
+            parse_reference("registry:5000/team/app"), ("registry:5000/team/app", "<none>")
+        )
+        self.assertEqual(parse_reference("alpine@sha256:abcd"), ("alpine", "<none>"))
+        self.assertEqual(parse_reference("alpine:3.19@sha256:abcd"), ("alpine", "3.19"))
+        self.assertEqual(parse_reference("<none>:<none>"), ("<none>", "<none>"))
+
+    def test_image_references(self):
+        """Test expanding and deduplicating an image's names."""
+        self.assertEqual(image_references(["a:1", "b:2", "a:1"]), [("a", "1"), ("b", "2")])
+        self.assertEqual(image_references([]), [("<none>", "<none>")])
+        self.assertEqual(image_references(None), [("<none>", "<none>")])
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    def test_podman_names_expand(self, mock_check):
+        """Test that every Podman name becomes its own row."""
+        mock_check.return_value = True
+        inventory = ContainerInventory("podman")
+        records = list(
+            inventory._normalize_podman_images(
+                [
+                    {
+                        "Id": "abcdef0123456789",
+                        "Names": ["localhost:5000/app:1.2", "quay.io/team/app:latest"],
+                        "Created": 1700000000,
+                        "Size": 2048,
+                    },
+                    {"Id": "0123456789abcdef", "Size": 1024},
+                ]
+            )
+        )
+        self.assertEqual(
+            [(r.id, r.repository, r.tag) for r in records],
+            [
+                ("abcdef012345", "localhost:5000/app", "1.2"),
+                ("abcdef012345", "quay.io/team/app", "latest"),
+                ("0123456789ab", "<none>", "<none>"),
+            ],
+        )
+        # Saved with the creation time as podman printed it
+        self.assertEqual(records[1].to_dict()["CreatedAt"], "1700000000")
+        self.assertEqual(records[1].created, 1700000000)
+
+
+if __name__ == "__main__":
+    unittest.main()
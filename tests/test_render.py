@@ -0,0 +1,69 @@
+"""
+Tests for the render module of Container Inventory.
+"""
+
+import io
+import unittest
+from unittest.mock import MagicMock
+
+from container_inventory.colors import Colors
+from container_inventory.models import ImageRecord
+from container_inventory.render import TableRenderer
+
+
+def images(count):
+    """Build image records with increasing repository name lengths."""
+    return [
+        ImageRecord(
+            id=f"{i:012d}", repository="r" * (i + 1), tag="latest", size=1024, source="docker"
+        )
+        for i in range(count)
+    ]
+
+
+class TestTableRenderer(unittest.TestCase):
+    """Tests for the TableRenderer class."""
+
+    def test_render(self):
+        """Test the table layout and column widths."""
+        table = TableRenderer()
+        table.extend(images(11))
+        lines = table.render().split("\n")
+
+        self.assertEqual(lines[1], Colors.BOLD + "Container Image Inventory" + Colors.RESET)
+        self.assertIn(f"{Colors.GREEN}{'Repository':<11}{Colors.RESET}", lines[3])
+        self.assertEqual(len(lines[4]), 12 + 11 + 6 + 10 + 6 + 6 + 18)
+        self.assertEqual(
+            lines[5], f"000000000000 | {'r':<11} | latest | {'':<10} | 1.00KB | docker"
+        )
+        self.assertEqual(len(lines), 5 + 11 + 2)
+        self.assertEqual(lines[-2:], ["", ""])
+
+    def test_single_write(self):
+        """Test that the table is written with one call."""
+        table = TableRenderer()
+        table.extend(images(100))
+        stream = MagicMock()
+        table.write(stream)
+        stream.write.assert_called_once()
+
+    def test_pagination(self):
+        """Test truncating to a page of rows."""
+        table = TableRenderer(max_rows=3, page=2)
+        passed = list(table.observe(images(10)))
+        self.assertEqual(len(passed), 10)
+        self.assertEqual([row[0] for row in table.rows], [f"{i:012d}" for i in (3, 4, 5)])
+        self.assertIn("Showing images 4-6 of 10", table.render())
+
+        # Widths only account for the rows shown
+        self.assertEqual(table.widths[1], 10)
+
+    def test_empty(self):
+        """Test rendering with no images."""
+        stream = io.StringIO()
+        TableRenderer().write(stream)
+        self.assertEqual(stream.getvalue(), "No images found.\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
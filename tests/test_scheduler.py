@@ -0,0 +1,127 @@
+"""
+Tests for the scheduler module of Container Inventory.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from container_inventory import scheduler
+from container_inventory.cache import JsonCache
+from container_inventory.models import ImageRecord
+from container_inventory.scheduler import ScanScheduler, store_fingerprint
+
+
+class TestScanScheduler(unittest.TestCase):
+    """Tests for the ScanScheduler class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = JsonCache("schedule.json", self.temp_dir)
+        self.log = os.path.join(self.temp_dir, "decisions.jsonl")
+        self.fingerprint = "a"
+        self.load = 0.2
+        patches = [
+            patch.object(scheduler, "store_fingerprint", lambda inventory: self.fingerprint),
+            patch.object(scheduler, "load_per_cpu", lambda: self.load),
+            patch("builtins.print"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_at(self, now):
+        """Decide at time ``now``, recording the scan if there is one."""
+        with patch.object(scheduler.time, "time", return_value=now):
+            planner = ScanScheduler(
+                "inventory.json",
+                min_interval=600,
+                max_interval=3600,
+                max_load=1.0,
+                log_file=self.log,
+                cache=self.cache,
+            )
+            decision = planner.decide(MagicMock())
+        if decision.scan:
+            planner.record_scan(decision)
+        return decision
+
+    def test_adaptive_interval(self):
+        """Test that unchanged images back off and changes shorten the interval."""
+        self.assertEqual(self.run_at(0).reason, "no previous scan")
+        self.assertEqual(self.run_at(300).action, "skip")  # Not due
+
+        skipped = self.run_at(600)
+        self.assertEqual((skipped.action, skipped.reason), ("skip", "no image changes"))
+        self.assertEqual(skipped.interval, 1200)
+        self.assertEqual(self.run_at(1500).reason, "next check in 5m")
+        self.assertEqual(self.run_at(1800).interval, 2400)
+
+        self.fingerprint = "b"
+        self.assertEqual(self.run_at(3000).reason, "next check in 20m")
+        self.assertEqual(self.run_at(3600).reason, "last scan 1h ago")
+        self.fingerprint = "c"
+        scanned = self.run_at(6000)
+        self.assertEqual((scanned.action, scanned.reason), ("scan", "images changed"))
+        self.assertEqual(scanned.interval, 1200)
+
+        with open(self.log) as f:
+            entries = [json.loads(line) for line in f]
+        actions = [e["action"] for e in entries]
+        self.assertEqual(actions, ["scan"] + ["skip"] * 5 + ["scan", "scan"])
+        self.assertEqual(entries[-1]["since_scan"], 2400)
+
+    def test_load_defers_until_forced(self):
+        """Test that a busy host defers scans, but not past the maximum interval."""
+        self.run_at(0)
+        self.fingerprint = "b"
+        self.load = 3.0
+        deferred = self.run_at(600)
+        self.assertEqual(deferred.action, "defer")
+        self.assertIn("load 3.00 per CPU", deferred.reason)
+        self.assertEqual(self.run_at(900).action, "defer")  # Deferral is not a check
+
+        forced = self.run_at(3600)
+        self.assertEqual((forced.action, forced.reason), ("scan", "last scan 1h ago"))
+        self.fingerprint = "c"
+        self.load = 0.5
+        self.assertEqual(self.run_at(4200).action, "scan")
+
+    def test_fingerprint(self):
+        """Test fingerprints from image store metadata and from image listings."""
+        metadata = os.path.join(self.temp_dir, "repositories.json")
+        with open(metadata, "w") as f:
+            f.write("{}")
+        inventory = MagicMock(fetch_errors={})
+        inventory._selected_runtimes.return_value = ["docker", "podman"]
+        inventory.iter_images.return_value = [
+            ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", source="podman")
+        ]
+
+        def files(runtime):
+            return [metadata] if runtime == "docker" else []
+
+        with patch.object(scheduler, "store_files", files):
+            first = store_fingerprint(inventory)
+            self.assertEqual(store_fingerprint(inventory), first)
+            inventory.iter_images.assert_called_with(["podman"])
+
+            os.utime(metadata, ns=(0, 10**9))
+            touched = store_fingerprint(inventory)
+            self.assertNotEqual(touched, first)
+
+            inventory.iter_images.return_value = []
+            self.assertNotEqual(store_fingerprint(inventory), touched)
+
+            inventory.fetch_errors = {"podman": "cannot connect"}
+            self.assertIsNone(store_fingerprint(inventory))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for the socket_api module of Container Inventory.
+"""
+
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.socket_api import RuntimeAPIClient, RuntimeAPIError, default_socket_path
+
+DOCKER_IMAGES = [
+    {
+        "Id": "sha256:0123456789abcdef0123",
+        "RepoTags": ["alpine:3.19", "registry:5000/team/alpine:latest"],
+        "Created": 1700000000,
+        "Size": 7340032,
+    },
+    {"Id": "sha256:fedcba9876543210fedc", "RepoTags": None, "Created": 1700000000, "Size": 1024},
+]
+
+PODMAN_IMAGES = [
+    {
+        "Id": "abcdef0123456789abcd",
+        "Names": ["quay.io/podman/hello:latest"],
+        "Created": 1700000000,
+        "Size": 2048,
+    }
+]
+
+
+class FakeRuntimeHandler(BaseHTTPRequestHandler):
+    """Serve a minimal subset of the Docker and libpod APIs."""
+
+    protocol_version = "HTTP/1.1"
+
+    routes = {
+        "/_ping": b"OK",
+        "/images/json": json.dumps(DOCKER_IMAGES).encode(),
+        "/v4.0.0/libpod/_ping": b"OK",
+        "/v4.0.0/libpod/images/json": json.dumps(PODMAN_IMAGES).encode(),
+    }
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = self.routes.get(self.path)
+        self.send_response(200 if body is not None else 404)
+        body = body or b"not found"
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeRuntimeServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded HTTP server on a Unix socket that counts connections."""
+
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(path, FakeRuntimeHandler)
+        self.requests = []
+        self.connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class TestRuntimeAPIClient(unittest.TestCase):
+    """Tests for the RuntimeAPIClient class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "runtime.sock")
+        self.server = FakeRuntimeServer(self.socket_path)
+        threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_keep_alive(self):
+        """Test that requests reuse one pooled connection."""
+        client = RuntimeAPIClient("docker", self.socket_path, timeout=5)
+        self.assertTrue(client.ping())
+        self.assertEqual(len(client.list_images()), 2)
+        client.close()
+
+        self.assertEqual(self.server.requests, ["/_ping", "/images/json"])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_http_error(self):
+        """Test that a non-200 response raises RuntimeAPIError."""
+        client = RuntimeAPIClient("docker", self.socket_path, timeout=5)
+        with self.assertRaises(RuntimeAPIError):
+            client.request("/missing")
+        client.close()
+
+    def test_default_socket_path(self):
+        """Test locating sockets through the environment."""
+        with patch.dict(os.environ, {"DOCKER_HOST": f"unix://{self.socket_path}"}):
+            self.assertEqual(default_socket_path("docker"), self.socket_path)
+        with patch.dict(os.environ, {"DOCKER_HOST": "tcp://127.0.0.1:2375"}):
+            self.assertIsNone(default_socket_path("docker"))
+        with patch.dict(os.environ, {"CONTAINER_HOST": f"unix://{self.tmpdir.name}/none.sock"}):
+            self.assertIsNone(default_socket_path("podman"))
+
+    @patch("container_inventory.core.subprocess.run", side_effect=AssertionError("CLI used"))
+    @patch("container_inventory.core.default_socket_path")
+    def test_inventory_uses_socket(self, mock_socket_path, mock_run):
+        """Test that ContainerInventory prefers the API socket over the CLI."""
+        mock_socket_path.return_value = self.socket_path
+        inventory = ContainerInventory("all")
+        self.assertTrue(inventory.docker_available)
+        self.assertTrue(inventory.podman_available)
+
+        images = inventory.get_images()
+        self.assertEqual(
+            [(img["source"], img["Repository"], img["Tag"]) for img in images],
+            [
+                ("docker", "alpine", "3.19"),
+                ("docker", "registry:5000/team/alpine", "latest"),
+                ("docker", "<none>", "<none>"),
+                ("podman", "quay.io/podman/hello", "latest"),
+            ],
+        )
+        self.assertEqual(images[0]["ID"], "0123456789ab")
+        self.assertEqual(images[0]["Size"], "7.00MB")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Tests for the store module of Container Inventory.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from container_inventory.store import LEGACY_SCAN_ID, InventoryStore, is_legacy_file
+
+
+class TestInventoryStore(unittest.TestCase):
+    """Tests for the InventoryStore class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "inventory.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_scan(self):
+        """Test that each scan is appended as stamped JSON lines."""
+        store = InventoryStore(self.path)
+        first = store.append_scan(
+            [{"ID": "123", "Repository": "a"}], timestamp="2025-01-01T00:00:00Z"
+        )
+        second = store.append_scan(
+            [{"ID": "456", "Repository": "b"}, {"ID": "789", "Repository": "c"}],
+            timestamp="2025-01-02T00:00:00Z",
+        )
+
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["scan_id"], first)
+        self.assertEqual(json.loads(lines[2])["scan_id"], second)
+
+        records = list(store.iter_records(scan_id=second))
+        self.assertEqual([r["ID"] for r in records], ["456", "789"])
+
+        records = list(store.iter_records(until="2025-01-01T12:00:00Z"))
+        self.assertEqual([r["ID"] for r in records], ["123"])
+
+    def test_migrate_legacy(self):
+        """Test migrating a legacy JSON array file to JSON Lines."""
+        with open(self.path, "w") as f:
+            json.dump([{"ID": "123"}, {"ID": "456"}], f, indent=2)
+        self.assertTrue(is_legacy_file(self.path))
+
+        store = InventoryStore(self.path)
+        self.assertEqual(store.migrate_legacy(), 2)
+        self.assertFalse(is_legacy_file(self.path))
+        self.assertEqual(store.migrate_legacy(), 0)
+
+        records = list(store.iter_records())
+        self.assertEqual([r["ID"] for r in records], ["123", "456"])
+        self.assertTrue(all(r["scan_id"] == LEGACY_SCAN_ID for r in records))
+
+    def test_iter_records_skips_torn_line(self):
+        """Test that a partially written final line is ignored."""
+        store = InventoryStore(self.path)
+        store.append_scan([{"ID": "123"}])
+        with open(self.path, "a") as f:
+            f.write('{"scan_id": "x", "ID"')
+
+        self.assertEqual([r["ID"] for r in store.iter_records()], ["123"])
+
+    def test_append_after_torn_line(self):
+        """Test that a scan appended after a torn final line keeps its first record."""
+        store = InventoryStore(self.path)
+        store.append_scan([{"ID": "123"}])
+        with open(self.path, "a") as f:
+            f.write('{"scan_id": "x", "ID"')
+
+        store.append_scan([{"ID": "456"}, {"ID": "789"}])
+        self.assertEqual([r["ID"] for r in store.iter_records()], ["123", "456", "789"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for the streaming module of Container Inventory.
+"""
+
+import json
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.models import ImageRecord
+from container_inventory.streaming import iter_command_output, iter_json_array
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Tests for iter_json_array."""
+
+    def test_chunked_input(self):
+        """Test decoding elements split across arbitrary chunk boundaries."""
+        document = json.dumps([{"Id": "a", "Names": ["x:1"]}, {"Id": "b"}, 12345, "é"], indent=2)
+        for size in (1, 2, 7, len(document)):
+            chunks = [document[i : i + size].encode() for i in range(0, len(document), size)]
+            self.assertEqual(
+                list(iter_json_array(chunks)),
+                [{"Id": "a", "Names": ["x:1"]}, {"Id": "b"}, 12345, "é"],
+            )
+
+    def test_empty_and_invalid(self):
+        """Test empty output and malformed arrays."""
+        self.assertEqual(list(iter_json_array([])), [])
+        self.assertEqual(list(iter_json_array(["[]\n"])), [])
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(['[{"Id": "a"}']))
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(['{"Id": "a"}']))
+
+
+class TestIterCommandOutput(unittest.TestCase):
+    """Tests for iter_command_output."""
+
+    def test_lines(self):
+        """Test reading process output line by line."""
+        lines = iter_command_output([sys.executable, "-c", "print('a'); print('b')"])
+        self.assertEqual(list(lines), ["a\n", "b\n"])
+
+    def test_failure(self):
+        """Test that a non-zero exit raises with the captured stderr."""
+        argv = [sys.executable, "-c", "import sys; sys.stderr.write('boom'); sys.exit(3)"]
+        with self.assertRaises(subprocess.CalledProcessError) as ctx:
+            list(iter_command_output(argv))
+        self.assertEqual(ctx.exception.returncode, 3)
+        self.assertEqual(ctx.exception.stderr, "boom")
+
+    def test_timeout(self):
+        """Test that a hung process is killed after its timeout."""
+        argv = [sys.executable, "-c", "import time; print('a', flush=True); time.sleep(30)"]
+        lines = []
+        with self.assertRaises(subprocess.TimeoutExpired):
+            for line in iter_command_output(argv, timeout=0.5):
+                lines.append(line)
+        self.assertEqual(lines, ["a\n"])
+
+
+class TestIterImages(unittest.TestCase):
+    """Tests for ContainerInventory.iter_images."""
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._iter_docker_images")
+    @patch("container_inventory.core.ContainerInventory._iter_podman_images")
+    def test_records_stream_before_runtime_finishes(self, mock_podman, mock_docker, mock_check):
+        """Test that records are yielded while a runtime is still listing."""
+        mock_check.return_value = True
+        release = threading.Event()
+
+        def docker_images():
+            yield ImageRecord(id="123")
+            release.wait(5)
+            yield ImageRecord(id="456")
+
+        mock_docker.side_effect = docker_images
+        mock_podman.side_effect = lambda: iter([])
+
+        images = ContainerInventory("docker").iter_images()
+        self.assertEqual(next(images).id, "123")
+        release.set()
+        self.assertEqual([image.id for image in images], ["456"])
+
+
+if __name__ == "__main__":
+    unittest.main()
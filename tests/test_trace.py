@@ -0,0 +1,78 @@
+"""
+Tests for the trace module of Container Inventory.
+"""
+
+import json
+import os
+import pstats
+import socket
+import sys
+import tempfile
+import unittest
+
+from container_inventory.streaming import iter_command_output
+from container_inventory.trace import TRACER, Tracer, journal_fields, journal_send, profiled
+
+
+class TestTracer(unittest.TestCase):
+    """Tests for the Tracer class."""
+
+    def tearDown(self):
+        TRACER.enabled = False
+        TRACER.reset()
+
+    def test_disabled(self):
+        """Test that a disabled tracer records nothing."""
+        tracer = Tracer()
+        with tracer.phase("fetch"):
+            tracer.count("records")
+        tracer.record_io("command", "docker images", 0.1, 10)
+        report = tracer.report()
+        self.assertEqual((report["phases"], report["counters"], report["io"]), ({}, {}, []))
+
+    def test_report(self):
+        """Test phases, counters and commands in the trace."""
+        TRACER.enable()
+        for _ in range(2):
+            with TRACER.phase("save"):
+                TRACER.count("records.docker", 3)
+        lines = list(iter_command_output([sys.executable, "-c", "print('x' * 9)"]))
+        self.assertEqual(lines, ["x" * 9 + "\n"])
+
+        report = json.loads(json.dumps(TRACER.report()))
+        self.assertEqual(report["phases"]["save"]["calls"], 2)
+        self.assertEqual(report["counters"], {"records.docker": 6})
+        self.assertEqual(report["io_totals"]["command"]["count"], 1)
+        self.assertEqual(report["io"][0]["bytes"], 10)
+        self.assertNotIn("error", report["io"][0])
+        self.assertGreater(report["peak_rss"]["self"], 0)
+
+    def test_journal(self):
+        """Test sending a trace as journal fields."""
+        TRACER.enable()
+        TRACER.add_phase("fetch.web1/podman", 1.5)
+        fields = journal_fields(TRACER.report())
+        self.assertEqual(fields["PHASE_FETCH_WEB1_PODMAN_SECONDS"], "1.500000")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            address = os.path.join(tmpdir, "journal")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.bind(address)
+                self.assertTrue(journal_send({"MESSAGE": "one\ntwo", "PRIORITY": "6"}, address))
+                data = sock.recv(65536)
+        self.assertEqual(data, b"MESSAGE\n" + (7).to_bytes(8, "little") + b"one\ntwo\nPRIORITY=6\n")
+        self.assertFalse(journal_send({"MESSAGE": "lost"}, address))
+
+    def test_profiled(self):
+        """Test writing a profile and its text report."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "run.prof")
+            with profiled(path):
+                sorted(str(i) for i in range(1000))
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
+            with open(path + ".txt") as f:
+                self.assertIn("allocation sites", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
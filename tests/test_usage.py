@@ -0,0 +1,142 @@
+"""
+Tests for the usage module of Container Inventory.
+"""
+
+import json
+import subprocess
+import unittest
+from unittest.mock import MagicMock, patch
+
+from container_inventory.core import ContainerInventory
+from container_inventory.discovery import RuntimeAPIError
+from container_inventory.models import ImageRecord
+from container_inventory.usage import ContainerUsage
+
+DOCKER_PS = [
+    {"ID": "c1c1c1c1c1c1ffff", "Image": "alpine:3.19", "Names": "web", "State": "running"},
+    {"ID": "c2c2c2c2c2c2ffff", "Image": "alpine", "Names": "job", "State": "exited"},
+]
+
+PODMAN_PS = [{"Id": "c3c3c3c3c3c3ffff", "ImageID": "bbbbbbbbbbbbffff", "Names": ["db"]}]
+
+
+def record(image_id, repository, source="docker", tag="latest", size=10):
+    """Build an image record."""
+    return ImageRecord(id=image_id, repository=repository, tag=tag, size=size, source=source)
+
+
+def fake_runtime(argv, timeout=None):
+    """Answer ps -a and container inspect from the fixtures."""
+    if argv[:2] == ["podman", "ps"]:
+        return iter([json.dumps(PODMAN_PS)])
+    if argv[:2] == ["docker", "ps"]:
+        return iter(json.dumps(row) + "\n" for row in DOCKER_PS)
+    # Both containers run the same image, under different references
+    return iter(f"{container_id} sha256:aaaaaaaaaaaaffff\n" for container_id in argv[5:])
+
+
+class TestContainerUsage(unittest.TestCase):
+    """Tests for the ContainerUsage class."""
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._api_client")
+    @patch("container_inventory.usage.iter_command_output")
+    def test_usage(self, mock_output, mock_client, mock_check):
+        """Test one listing per runtime, annotated counts and the unused report."""
+        mock_check.return_value = True
+        mock_client.return_value = None
+        mock_output.side_effect = fake_runtime
+
+        usage = ContainerUsage(ContainerInventory())
+        self.assertEqual(usage.load(), 3)
+        self.assertEqual(
+            [call[0][0][:3] for call in mock_output.call_args_list],
+            [
+                ["docker", "ps", "-a"],
+                ["docker", "container", "inspect"],
+                ["podman", "ps", "-a"],
+            ],
+        )
+
+        images = [
+            record("aaaaaaaaaaaa", "alpine", tag="3.19"),
+            record("aaaaaaaaaaaa", "alpine"),
+            record("dddddddddddd", "nginx", size=30),
+            record("bbbbbbbbbbbb", "postgres", "podman", size=20),
+            record("aaaaaaaaaaaa", "alpine", "podman"),
+        ]
+        annotated = list(usage.annotate(images))
+        self.assertEqual(
+            [(image.containers, image.running) for image in annotated],
+            [(2, 1), (2, 1), (0, 0), (1, 0), (0, 0)],
+        )
+        self.assertEqual(annotated[0]["containers"], 2)
+
+        unused, reclaimable = usage.unused()
+        self.assertEqual(
+            [(image.id, image.source) for image in unused],
+            [("dddddddddddd", "docker"), ("aaaaaaaaaaaa", "podman")],
+        )
+        self.assertEqual(reclaimable, 40)
+
+    @patch("builtins.print")
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._api_client")
+    @patch("container_inventory.usage.iter_command_output")
+    def test_failures(self, mock_output, mock_client, mock_check, mock_print):
+        """Test that a runtime that cannot be listed is left out of the counts."""
+        mock_check.return_value = True
+        mock_client.return_value = None
+
+        def flaky_runtime(argv, timeout=None):
+            if argv[:2] == ["podman", "ps"]:
+                raise subprocess.TimeoutExpired(argv, timeout)
+            if argv[:3] == ["docker", "container", "inspect"]:
+                # The second container was removed after it was listed
+                return self.fail_after(
+                    ["c1c1c1c1c1c1ffff sha256:aaaaaaaaaaaaffff\n"],
+                    "Error: No such container: c2c2c2c2c2c2ffff",
+                )
+            return fake_runtime(argv, timeout)
+
+        mock_output.side_effect = flaky_runtime
+        usage = ContainerUsage(ContainerInventory())
+        self.assertEqual(usage.load(), 2)
+        self.assertEqual(list(usage.failed), ["podman"])
+
+        images = [record("aaaaaaaaaaaa", "alpine"), record("bbbbbbbbbbbb", "postgres", "podman")]
+        annotated = list(usage.annotate(images))
+        self.assertEqual(
+            [(image.containers, image.running) for image in annotated], [(1, 1), (None, None)]
+        )
+        self.assertEqual(usage.unused(), ([], 0))
+
+    @patch("container_inventory.core.ContainerInventory._check_tool_availability")
+    @patch("container_inventory.core.ContainerInventory._api_client")
+    @patch("container_inventory.usage.iter_command_output")
+    def test_api_failure_part_way(self, mock_output, mock_client, mock_check):
+        """Test that containers read from the API before it failed are not counted twice."""
+        mock_check.return_value = True
+        mock_output.side_effect = fake_runtime
+        client = MagicMock()
+        client.iter_containers.side_effect = lambda: self.fail_after(
+            [PODMAN_PS[0]], "connection reset", RuntimeAPIError
+        )
+        mock_client.side_effect = lambda runtime: client if runtime == "podman" else None
+
+        usage = ContainerUsage(ContainerInventory())
+        with patch("builtins.print"):
+            self.assertEqual(usage.load(["podman"]), 1)
+        self.assertEqual(len(usage.containers[("podman", "bbbbbbbbbbbb")]), 1)
+
+    @staticmethod
+    def fail_after(items, error, exception=None):
+        """Yield items, then fail like a command or API request."""
+        yield from items
+        if exception is not None:
+            raise exception(error)
+        raise subprocess.CalledProcessError(1, ["docker"], stderr=error)
+
+
+if __name__ == "__main__":
+    unittest.main()
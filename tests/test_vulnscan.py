@@ -0,0 +1,131 @@
+"""
+Tests for the vulnscan module of Container Inventory.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from container_inventory.cache import JsonCache
+from container_inventory.models import ImageRecord
+from container_inventory.vulnscan import (
+    VulnerabilityScanner,
+    scanner_command,
+    summarize,
+)
+
+# Stub scanner: logs its argument and prints a trivy report with one
+# critical and one high vulnerability, or fails for images named 'broken'
+STUB_SCANNER = """
+import json, sys
+with open(sys.argv[1], "a") as f:
+    f.write(sys.argv[2] + "\\n")
+if sys.argv[2].startswith("broken"):
+    sys.exit("cannot pull image")
+vulnerabilities = [{"Severity": "CRITICAL"}, {"Severity": "HIGH"}]
+print(json.dumps({"Results": [{"Vulnerabilities": vulnerabilities}]}))
+"""
+
+# Scanners are named after their program, here the interpreter running the stub
+STUB_NAME = os.path.basename(sys.executable)
+
+
+def scanned_images():
+    """Two tags of one image and a second image."""
+    return [
+        ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="3.19", source="docker"),
+        ImageRecord(id="aaaaaaaaaaaa", repository="alpine", tag="latest", source="docker"),
+        ImageRecord(id="bbbbbbbbbbbb", repository="nginx", tag="1.25", source="docker"),
+    ]
+
+
+class TestVulnerabilityScanner(unittest.TestCase):
+    """Tests for the VulnerabilityScanner class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.script = os.path.join(self.temp_dir, "scanner.py")
+        with open(self.script, "w") as f:
+            f.write(STUB_SCANNER)
+        self.log = os.path.join(self.temp_dir, "scanned.log")
+        self.cache = JsonCache("vulnerabilities.json", self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def scanner(self, **kwargs):
+        command = f"{sys.executable} {self.script} {self.log} {{image}}"
+        return VulnerabilityScanner(command, cache=self.cache, **kwargs)
+
+    def scanned(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as f:
+            return f.read().split()
+
+    def test_scan_once_per_image(self):
+        """Test that each image is scanned once and later runs use the cache."""
+        scanner = self.scanner(workers=2)
+        images = scanner.scan(scanned_images())
+        self.assertEqual(sorted(self.scanned()), ["alpine:3.19", "nginx:1.25"])
+        self.assertEqual(
+            images[1].security, {"total": 2, "critical": 1, "high": 1, "scanner": STUB_NAME}
+        )
+        self.assertEqual(scanner.scanned, 2)
+
+        scanner = self.scanner()
+        images = scanner.scan(scanned_images())
+        self.assertEqual(len(self.scanned()), 2)
+        self.assertEqual((scanner.scanned, scanner.cached), (0, 2))
+        self.assertEqual(images[2].security["critical"], 1)
+
+    def test_new_images_first_and_rescan_budget(self):
+        """Test that new images go first and stale results are rescanned within the budget."""
+        stale = time.time() - 3600
+        key = f"{STUB_NAME}:docker:aaaaaaaaaaaa"
+        self.cache.save({key: {"security": {"total": 0}, "scanned": stale, "seen": stale}})
+
+        self.scanner(workers=1, max_age=60).scan(scanned_images())
+        self.assertEqual(self.scanned(), ["nginx:1.25", "alpine:3.19"])
+
+        self.cache.save({key: {"security": {"total": 0}, "scanned": stale, "seen": stale}})
+        os.unlink(self.log)
+        scanner = self.scanner(workers=1, max_age=60, budget=0)
+        images = scanner.scan(scanned_images())
+        self.assertEqual(self.scanned(), ["nginx:1.25"])
+        self.assertEqual(scanner.deferred, 1)
+        self.assertEqual(images[0].security, {"total": 0})
+
+    def test_errors(self):
+        """Test that a failed scan is reported and retried on the next run."""
+        images = [ImageRecord(id="cccccccccccc", repository="broken", tag="1", source="docker")]
+        scanner = self.scanner()
+        scanner.scan(images)
+        self.assertIn("cannot pull image", scanner.errors["broken:1"])
+        self.assertIsNone(images[0].security)
+
+        self.scanner().scan(images)
+        self.assertEqual(self.scanned(), ["broken:1", "broken:1"])
+
+    def test_summarize(self):
+        """Test reading trivy, grype and syft reports."""
+        grype = {"matches": [{"vulnerability": {"severity": "Medium"}}]}
+        self.assertEqual(summarize(grype), {"total": 1, "medium": 1})
+        self.assertEqual(summarize({"artifacts": [{}, {}]}), {"packages": 2})
+        self.assertEqual(summarize({"Results": [{"Target": "x"}]}), {"total": 0})
+        with self.assertRaises(ValueError):
+            summarize({})
+
+    def test_scanner_command(self):
+        """Test resolving scanner names and command templates."""
+        self.assertEqual(scanner_command("grype")[0], "grype")
+        self.assertEqual(scanner_command("/opt/bin/scan --json {image}")[0], "scan")
+        with self.assertRaises(ValueError):
+            scanner_command("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()